@@ -2,6 +2,7 @@ from flask import Flask, render_template, jsonify
 import os
 import logging
 from datetime import datetime
+from utils.data_loader import read_data_status
 
 app = Flask(__name__)
 
@@ -24,12 +25,15 @@ def index():
 @app.route('/status')
 def status():
     """
-    API endpoint for bot status
+    API endpoint for bot status, including dataset readiness
     """
+    data = read_data_status()
     return jsonify({
         'status': 'online',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'ready': bool(data) and all(entry.get('state') == 'ready' for entry in data.values()),
+        'data': data
     })
 
 @app.route('/health')
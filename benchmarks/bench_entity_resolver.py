@@ -0,0 +1,31 @@
+"""
+Benchmark entity resolution latency over a full-size player list
+
+Usage: python -m benchmarks.bench_entity_resolver [player_count]
+"""
+import sys
+import time
+
+from benchmarks.synthetic import synthetic_ipl_data
+from ml.entity_resolver import EntityResolver
+
+def timed(label, resolver, queries, rounds=2000):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            resolver.resolve(query)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {elapsed / (rounds * len(queries)) * 1e6:8.1f} us/query")
+
+def main():
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    started = time.perf_counter()
+    resolver = EntityResolver.from_ipl_data(synthetic_ipl_data(player_count, match_count=0))
+    print(f"Built resolver over {len(resolver)} entities in {time.perf_counter() - started:.3f}s")
+
+    timed("exact", resolver, ['virat kohli', 'vk', 'csk', 'chennai', 'thala'])
+    timed("fuzzy", resolver, ['viraat kohly', 'bumra', 'royal chalengers', 'rohith sharma'])
+
+if __name__ == '__main__':
+    main()
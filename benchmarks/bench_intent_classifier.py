@@ -0,0 +1,51 @@
+"""
+Benchmark training and batch inference of the local intent classifier
+
+Usage: python -m benchmarks.bench_intent_classifier [message_count]
+"""
+import random
+import sys
+import time
+
+from ml.intent_classifier import IntentClassifier
+
+TEMPLATES = {
+    'match_info': ["what was the score in {t} vs {u}", "who won {t} against {u}", "{t} {u} result"],
+    'player_info': ["tell me about player {p}", "how good is batsman {p}", "{p} bowler career"],
+    'team_info': ["tell me about team {t}", "who is in the {t} squad", "{t} franchise owner"],
+    'stats_info': ["{p} stats", "ipl statistics {t}", "{t} record this season"],
+    'conversation': ["how are you", "i love cricket", "you are funny", "good night", "lol ok"],
+}
+TEAMS = ['csk', 'mi', 'rcb', 'kkr', 'srh', 'dc', 'rr', 'pbks']
+PLAYERS = ['kohli', 'dhoni', 'rohit', 'bumrah', 'gill', 'jadeja']
+
+def synthetic_messages(count, seed=3):
+    rng = random.Random(seed)
+    texts, intents = [], []
+    for _ in range(count):
+        intent = rng.choice(list(TEMPLATES))
+        texts.append(rng.choice(TEMPLATES[intent]).format(
+            t=rng.choice(TEAMS), u=rng.choice(TEAMS), p=rng.choice(PLAYERS)
+        ))
+        intents.append(intent)
+    return texts, intents
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    texts, intents = synthetic_messages(count)
+
+    started = time.perf_counter()
+    model = IntentClassifier.train(texts[:20000], intents[:20000])
+    print(f"Trained on 20,000 messages in {time.perf_counter() - started:.2f}s")
+
+    for batch_size in (1, 100, 10000):
+        batches = [texts[i:i + batch_size] for i in range(0, min(count, batch_size * 200), batch_size)]
+        total = sum(len(batch) for batch in batches)
+        started = time.perf_counter()
+        for batch in batches:
+            model.predict(batch)
+        elapsed = time.perf_counter() - started
+        print(f"batch size {batch_size:>6}: {total / elapsed:>10,.0f} msgs/s")
+
+if __name__ == '__main__':
+    main()
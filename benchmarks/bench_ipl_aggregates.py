@@ -0,0 +1,50 @@
+"""
+Benchmark materializing player and team aggregates: full build, snapshot
+load, and an incremental build after a new season is appended
+
+Usage: python -m benchmarks.bench_ipl_aggregates [match_count]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_synthetic_csvs
+from ml.ipl_stats import dataset_ipl_data
+from utils.ipl_aggregates import IPLAggregates, load_aggregates, AGGREGATES_FILE
+from utils.ipl_dataset import load_dataset
+
+def timed(label, func, rounds=5):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    print(f"{label:<30} {(time.perf_counter() - started) / rounds * 1e3:8.1f} ms")
+    return result
+
+def main():
+    match_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1100
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        write_synthetic_csvs(Path(temp_dir) / 'ipl', match_count)
+        cache_dir = Path(temp_dir) / 'cache'
+        dataset = load_dataset(Path(temp_dir) / 'ipl', cache_dir)
+        print(f"{dataset.num_matches} matches, {dataset.num_deliveries} deliveries, {len(dataset.seasons)} seasons")
+
+        full = timed("full build", lambda: IPLAggregates.build(dataset))
+        full.save(cache_dir / AGGREGATES_FILE)
+        timed("snapshot load", lambda: load_aggregates(dataset, cache_dir))
+
+        # Pretend the last season is new: drop it from the previous snapshot
+        previous = IPLAggregates(
+            full.seasons[:-1], full.fingerprints[:-1], full.player_names, full.team_names,
+            {metric: values[:-1] for metric, values in full.players.items()},
+            {metric: values[:-1] for metric, values in full.teams.items()},
+        )
+        timed("incremental (one new season)", lambda: IPLAggregates.build(dataset, previous))
+
+        dataset.aggregates = full
+        records = timed("store records", lambda: dataset_ipl_data(dataset))
+        print(f"{len(records['players'])} player records, {len(records['teams'])} team records")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+"""
+Benchmark IPL dataset loading: parsing the CSVs vs the memory-mapped cache
+
+Usage: python -m benchmarks.bench_ipl_dataset [match_count]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_synthetic_csvs
+from utils.ipl_dataset import IPLDataset, load_dataset
+
+def main():
+    match_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1100
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        source_dir, cache_dir = Path(temp_dir) / 'ipl', Path(temp_dir) / 'cache'
+        write_synthetic_csvs(source_dir, match_count)
+        size = sum(path.stat().st_size for path in source_dir.glob('*.csv'))
+
+        started = time.perf_counter()
+        dataset = load_dataset(source_dir, cache_dir)
+        parse_time = time.perf_counter() - started
+        print(
+            f"Parsed {dataset.num_matches} matches / {dataset.num_deliveries} deliveries "
+            f"({size / 1e6:.1f} MB CSV) in {parse_time:.2f}s"
+        )
+
+        cache_size = sum(path.stat().st_size for path in cache_dir.iterdir())
+        started = time.perf_counter()
+        for _ in range(20):
+            dataset = load_dataset(source_dir, cache_dir)
+        load_time = (time.perf_counter() - started) / 20
+        print(f"Loaded memory-mapped cache ({cache_size / 1e6:.1f} MB) in {load_time * 1e3:.1f} ms")
+
+        started = time.perf_counter()
+        IPLDataset.load(cache_dir, mmap=False)
+        print(f"Loaded cache into RAM in {(time.perf_counter() - started) * 1e3:.1f} ms")
+
+if __name__ == '__main__':
+    main()
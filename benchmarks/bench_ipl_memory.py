@@ -0,0 +1,51 @@
+"""
+Report the memory footprint of the in-memory IPL model: slotted records vs
+dicts of strings for players, teams and matches, and the columnar deliveries
+
+Usage: python -m benchmarks.bench_ipl_memory [match_count]
+"""
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.synthetic import write_synthetic_csvs
+from ml.ipl_records import deep_sizeof, memory_report
+from ml.ipl_stats import dataset_ipl_data
+from utils.ipl_aggregates import load_aggregates
+from utils.ipl_dataset import load_dataset
+
+# Deliveries held as dicts of strings to measure the per-delivery baseline
+SAMPLE_DELIVERIES = 2000
+
+def main():
+    match_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1100
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        write_synthetic_csvs(Path(temp_dir) / 'ipl', match_count)
+        cache_dir = Path(temp_dir) / 'cache'
+        dataset = load_dataset(Path(temp_dir) / 'ipl', cache_dir)
+        dataset.aggregates = load_aggregates(dataset, cache_dir)
+
+        print(f"{'section':<12} {'count':>8} {'records KB':>12} {'dicts KB':>12} {'saved':>8}")
+        for section, line in memory_report(dataset_ipl_data(dataset)).items():
+            saved = 1 - line['bytes_records'] / line['bytes_dicts'] if line['bytes_dicts'] else 0
+            print(
+                f"{section:<12} {line['records']:>8} {line['bytes_records'] / 1024:>12.1f} "
+                f"{line['bytes_dicts'] / 1024:>12.1f} {saved:>8.0%}"
+            )
+
+        # Columnar deliveries vs one dict of strings per delivery, extrapolated
+        names = list(dataset.deliveries)
+        sample = json.loads(json.dumps([
+            {name: str(dataset.deliveries[name][row]) for name in names} for row in range(SAMPLE_DELIVERIES)
+        ]))
+        dict_bytes = deep_sizeof(sample) / SAMPLE_DELIVERIES * dataset.num_deliveries
+        columns = sum(dataset.deliveries[name].nbytes for name in names)
+        print(
+            f"{'deliveries':<12} {dataset.num_deliveries:>8} {columns / 1024:>12.1f} "
+            f"{dict_bytes / 1024:>12.1f} {1 - columns / dict_bytes:>8.0%}"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark the vectorized stats engine over a full-history synthetic dataset
+
+Usage: python -m benchmarks.bench_ipl_stats [match_count]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import write_synthetic_csvs
+from ml.stats_engine import aggregate_leaderboard, all_time_stats, compute_leaderboard, compute_stats
+from utils.ipl_aggregates import load_aggregates
+from utils.ipl_partitions import load_partitions
+from utils.ipl_matchups import MatchupIndex
+from utils.ipl_winprob import WinProbabilityTable
+from utils.ipl_dataset import load_dataset
+
+def timed(label, func, rounds=20):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    print(f"{label:<24} {(time.perf_counter() - started) / rounds * 1e3:8.2f} ms/query")
+
+def main():
+    match_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1100
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        write_synthetic_csvs(Path(temp_dir) / 'ipl', match_count)
+        dataset = load_dataset(Path(temp_dir) / 'ipl', Path(temp_dir) / 'cache')
+        print(f"{dataset.num_matches} matches, {dataset.num_deliveries} deliveries")
+
+        timed("all time", lambda: compute_stats(dataset))
+        timed("one season", lambda: compute_stats(dataset, season=2016))
+        timed("one team", lambda: compute_stats(dataset, team_id=0))
+        timed("one venue", lambda: compute_stats(dataset, venue_id=0))
+
+        timed("top 10 runs", lambda: compute_leaderboard(dataset, 'runs'))
+        timed("top 10 economy", lambda: compute_leaderboard(dataset, 'economy'))
+        timed("top 10 sixes, death", lambda: compute_leaderboard(dataset, 'sixes', season=2016, phase='death'))
+
+        # Season partitions and all-time aggregates
+        cache_dir = Path(temp_dir) / 'cache'
+        dataset.aggregates = load_aggregates(dataset, cache_dir)
+        dataset.partitions = load_partitions(dataset, cache_dir, compute_stats)
+        season = dataset.partitions.view(2016)
+
+        timed("all time (aggregates)", lambda: all_time_stats(dataset))
+        timed("one season (partition)", lambda: compute_stats(season, season=2016))
+        timed("top 10 runs (aggregates)", lambda: aggregate_leaderboard(dataset.aggregates, 'runs'))
+        timed("load cold partition", lambda: dataset.partitions.loaded.clear() or dataset.partitions.view(2012))
+
+        # Batter-vs-bowler matchups and phase splits
+        timed("build matchup index", lambda: MatchupIndex.build(dataset), rounds=3)
+        dataset.matchups = MatchupIndex.build(dataset)
+        timed("one matchup (index)", lambda: dataset.matchups.matchup(0, 1))
+        timed("one phase split (index)", lambda: dataset.matchups.phase_split(0))
+
+        # Win-probability table
+        timed("build win probability", lambda: WinProbabilityTable.build(dataset), rounds=3)
+        table = WinProbabilityTable.build(dataset)
+        timed("win probability lookup", lambda: table.lookup(2, 24, 50, 6))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark IPL store lookups at full-dataset scale
+
+Usage: python -m benchmarks.bench_ipl_store [player_count] [match_count]
+"""
+import sys
+import time
+
+from benchmarks.synthetic import synthetic_ipl_data
+from ml.ipl_store import IPLStore
+
+def timed(label, func, args, rounds=5000):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for arg in args:
+            func(*arg)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed / (rounds * len(args)) * 1e6:8.1f} us/lookup")
+
+def main():
+    player_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    match_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    data = synthetic_ipl_data(player_count, match_count)
+
+    started = time.perf_counter()
+    store = IPLStore(data)
+    print(
+        f"Built store over {len(store.players)} players and {len(store.matches)} matches "
+        f"in {time.perf_counter() - started:.3f}s"
+    )
+
+    timed("player (exact name)", store.get_player, [('Virat Kohli',), ('ms dhoni',)])
+    timed("player (nickname)", store.get_player, [('thala',), ('hitman',)])
+    timed("player (misspelled)", store.get_player, [('viraat kohly',), ('bumra',)])
+    timed("team", store.get_team, [('csk',), ('mumbai indians',)])
+    timed("team players", store.get_team_players, [('rcb',), ('kkr',)])
+    timed("match (fixture)", store.get_match, [('csk', 'mi'), ('rcb', 'kolkata')])
+    timed("head to head", store.head_to_head, [('csk', 'mi'), ('rcb', 'kolkata')])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark learn_response throughput with the journaled store
+
+Usage: python -m benchmarks.bench_learned_responses [entry_count ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from ml import conversation_model
+
+def run(entry_count):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        conversation_model.LEARNED_RESPONSES_PATH = Path(temp_dir) / 'learned_responses.json'
+        conversation_model.LEARNED_RESPONSES_JOURNAL_PATH = Path(temp_dir) / 'learned_responses.jsonl'
+        conversation_model.learned_responses = {'english': {}, 'telugu': {}}
+        conversation_model.load_learned_responses()
+
+        started = time.perf_counter()
+        for i in range(entry_count):
+            conversation_model.learn_response(f"what about question number {i}", f"answer {i}")
+        learn_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        conversation_model.load_learned_responses()
+        load_time = time.perf_counter() - started
+        conversation_model._close_journal()
+
+        print(
+            f"{entry_count:>8} entries: {entry_count / learn_time:,.0f} learns/s, "
+            f"reload {load_time:.2f}s"
+        )
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    for count in counts:
+        run(count)
+
+if __name__ == '__main__':
+    main()
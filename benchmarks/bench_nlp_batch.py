@@ -0,0 +1,45 @@
+"""
+Benchmark batch text normalization and intent detection
+
+Usage: python -m benchmarks.bench_nlp_batch [message_count]
+"""
+import random
+import sys
+import time
+from collections import deque
+
+from ml.nlp_processor import process_text, process_texts, detect_intent, detect_intents, detect_languages
+
+SAMPLE_MESSAGES = [
+    "Hello! How are you doing today?",
+    "What was the score in CSK vs MI yesterday?",
+    "Tell me about the player Virat Kohli, please.",
+    "Which team has won the most titles?",
+    "When is the next fixture for RCB??",
+    "Show me the stats for Jasprit Bumrah!!!",
+    "నమస్కారం, మీరు ఎలా ఉన్నారు?",
+    "ok thanks, bye",
+    "ee roju match evaru gelicharu?",
+]
+
+def timed(label, count, func):
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed:6.2f}s  {count / elapsed:>12,.0f} msgs/s")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    rng = random.Random(7)
+    messages = [rng.choice(SAMPLE_MESSAGES) for _ in range(count)]
+
+    print(f"{count:,} messages")
+    timed("process_text (loop)", count, lambda: [process_text(m) for m in messages])
+    timed("process_texts (auto)", count, lambda: deque(process_texts(messages), maxlen=0))
+    timed("process_texts (english)", count, lambda: deque(process_texts(messages, 'english'), maxlen=0))
+    timed("detect_intent (loop)", count, lambda: [detect_intent(m) for m in messages])
+    timed("detect_intents (batch)", count, lambda: deque(detect_intents(messages), maxlen=0))
+    timed("detect_languages (batch)", count, lambda: deque(detect_languages(messages), maxlen=0))
+
+if __name__ == '__main__':
+    main()
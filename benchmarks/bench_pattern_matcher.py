@@ -0,0 +1,54 @@
+"""
+Benchmark learned-response lookup against the number of learned patterns
+
+Usage: python -m benchmarks.bench_pattern_matcher [pattern_count ...]
+"""
+import random
+import string
+import sys
+import time
+
+from ml.pattern_matcher import PatternMatcher
+
+def random_phrase(rng, words=5):
+    """
+    Build a random lowercase phrase similar to a learned key phrase
+    """
+    return ' '.join(
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 8)))
+        for _ in range(rng.randint(1, words))
+    )
+
+def run(pattern_count, lookups=10000, seed=42):
+    rng = random.Random(seed)
+    patterns = {random_phrase(rng): f"response {i}" for i in range(pattern_count)}
+
+    started = time.perf_counter()
+    matcher = PatternMatcher(patterns)
+    build_time = time.perf_counter() - started
+
+    keys = list(patterns)
+    messages = []
+    for i in range(lookups):
+        if i % 2:
+            messages.append(f"tell me about {rng.choice(keys)} please")
+        else:
+            messages.append(random_phrase(rng, words=12))
+
+    started = time.perf_counter()
+    for message in messages:
+        matcher.match(message)
+    lookup_time = time.perf_counter() - started
+
+    print(
+        f"{pattern_count:>8} patterns: build {build_time:.2f}s, "
+        f"lookup {lookup_time / lookups * 1e6:.1f} us/message"
+    )
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [1000, 10000, 100000]
+    for count in counts:
+        run(count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark response rendering: inline f-strings vs compiled templates vs the render cache
+
+Usage: python -m benchmarks.bench_response_templates [rounds]
+"""
+import sys
+import time
+
+from ml.ipl_stats import sample_ipl_data
+from ml.response_templates import RenderCache, render
+
+def inline_card(player_info):
+    message = (
+        f"🏏 **{player_info['name']}**\n\n"
+        f"• Team: {player_info['team']}\n"
+        f"• Role: {player_info['role']}\n"
+        f"• Matches: {player_info['matches']}\n"
+        f"• Runs: {player_info['runs']}\n"
+        f"• Wickets: {player_info['wickets']}\n"
+    )
+    if 'average' in player_info:
+        message += f"• Average: {player_info['average']}\n"
+    if 'strike_rate' in player_info:
+        message += f"• Strike Rate: {player_info['strike_rate']}\n"
+    if 'economy' in player_info:
+        message += f"• Economy: {player_info['economy']}\n"
+    message += f"\n_Data from local database - may not be current_"
+    return message
+
+def timed(label, func, rounds):
+    players = list(sample_ipl_data['players'].items())
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for key, player in players:
+            func(key, player)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {elapsed / (rounds * len(players)) * 1e6:8.2f} us/render")
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    cache = RenderCache()
+
+    timed("inline f-string", lambda key, player: inline_card(player), rounds)
+    timed("compiled template", lambda key, player: render('player_card', player), rounds)
+    timed("render cache (hit)", lambda key, player: cache.get('player_card', key, 1, player), rounds)
+    timed("chat (telugu)", lambda key, player: render('player_info', player, 'telugu'), rounds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Synthetic IPL data at full-history scale for benchmarks
+"""
+import random
+import string
+
+from ml.ipl_stats import sample_ipl_data
+
+TEAM_CODES = ['CSK', 'MI', 'RCB', 'KKR', 'DC', 'PBKS', 'RR', 'SRH', 'GT', 'LSG']
+
+def random_name(rng):
+    first = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 8)))
+    last = ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+    return f"{first} {last}".title()
+
+def synthetic_ipl_data(player_count=1000, match_count=1000, seed=11):
+    """
+    Sample data padded with synthetic teams, players and matches
+    """
+    rng = random.Random(seed)
+
+    teams = dict(sample_ipl_data['teams'])
+    for code in TEAM_CODES:
+        teams.setdefault(code.lower(), {
+            'name': code,
+            'full_name': f"{code} Cricket Club",
+            'home_ground': f"{code} Stadium",
+            'captain': random_name(rng),
+            'championships': str(rng.randint(0, 5)),
+        })
+
+    players = dict(sample_ipl_data['players'])
+    while len(players) < player_count:
+        name = random_name(rng)
+        players[name.lower()] = {
+            'name': name,
+            'team': rng.choice(TEAM_CODES),
+            'role': rng.choice(['Batsman', 'Bowler', 'All-rounder', 'Wicket-keeper Batsman']),
+            'matches': str(rng.randint(1, 250)),
+            'runs': str(rng.randint(0, 7000)),
+            'wickets': str(rng.randint(0, 180)),
+        }
+
+    matches = dict(sample_ipl_data['matches'])
+    for i in range(match_count):
+        team1, team2 = rng.sample(TEAM_CODES, 2)
+        year = rng.randint(2008, 2024)
+        matches[f"{team1.lower()} vs {team2.lower()} {i}"] = {
+            'team1': team1,
+            'team2': team2,
+            'date': f"{year}-{rng.randint(3, 5):02d}-{rng.randint(1, 28):02d}",
+            'venue': teams[rng.choice([team1, team2]).lower()]['home_ground'],
+            'result': f"{rng.choice([team1, team2])} won by {rng.randint(1, 9)} wickets",
+        }
+
+    return {'teams': teams, 'players': players, 'matches': matches}
+
+TEAM_NAMES = {
+    'CSK': 'Chennai Super Kings', 'MI': 'Mumbai Indians', 'RCB': 'Royal Challengers Bangalore',
+    'KKR': 'Kolkata Knight Riders', 'DC': 'Delhi Capitals', 'PBKS': 'Punjab Kings',
+    'RR': 'Rajasthan Royals', 'SRH': 'Sunrisers Hyderabad', 'GT': 'Gujarat Titans',
+    'LSG': 'Lucknow Super Giants',
+}
+
+DISMISSAL_KINDS = ['caught', 'bowled', 'lbw', 'run out', 'stumped']
+
+def _simulate_innings(rng, batters, bowlers, target=None):
+    """
+    Simulate one T20 innings: rows of (over, ball, batter, non striker, bowler,
+    batter runs, extra runs, extras type, player dismissed, dismissal kind)
+    """
+    rows = []
+    total = wickets = 0
+    striker, non_striker, next_batter = batters[0], batters[1], 2
+
+    for over in range(20):
+        bowler = bowlers[over % len(bowlers)]
+        legal = ball = 0
+        while legal < 6:
+            ball += 1
+            roll = rng.random()
+            runs = extras = 0
+            extras_type = dismissed = kind = ''
+            if roll < 0.04:
+                extras, extras_type = 1, 'wides'
+            elif roll < 0.09:
+                extras, extras_type = rng.choice([1, 4]), 'legbyes'
+                legal += 1
+            elif roll < 0.145:
+                dismissed, kind = striker, rng.choice(DISMISSAL_KINDS)
+                legal += 1
+            else:
+                runs = rng.choices([0, 1, 2, 3, 4, 6], weights=[35, 35, 8, 1, 14, 7])[0]
+                legal += 1
+
+            rows.append((over, ball, striker, non_striker, bowler, runs, extras, extras_type, dismissed, kind))
+            total += runs + extras
+            if runs % 2:
+                striker, non_striker = non_striker, striker
+            if dismissed:
+                wickets += 1
+                if wickets == 10 or next_batter >= len(batters):
+                    return rows, total, wickets
+                striker, next_batter = batters[next_batter], next_batter + 1
+            if target is not None and total >= target:
+                return rows, total, wickets
+
+        striker, non_striker = non_striker, striker
+
+    return rows, total, wickets
+
+def write_synthetic_csvs(directory, match_count=1100, seed=7):
+    """
+    Write Kaggle-format matches.csv and deliveries.csv with simulated matches
+
+    The default size matches the full IPL history (about 260k deliveries).
+    """
+    import csv
+    from pathlib import Path
+
+    rng = random.Random(seed)
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    squads = {code: [random_name(rng) for _ in range(18)] for code in TEAM_CODES}
+    venues = {code: f"{TEAM_NAMES[code].split()[0]} Stadium" for code in TEAM_CODES}
+
+    with open(directory / 'matches.csv', 'w', newline='', encoding='utf-8') as match_file, \
+         open(directory / 'deliveries.csv', 'w', newline='', encoding='utf-8') as delivery_file:
+        matches = csv.writer(match_file)
+        deliveries = csv.writer(delivery_file)
+        matches.writerow(['id', 'season', 'city', 'date', 'match_type', 'player_of_match', 'venue',
+                          'team1', 'team2', 'toss_winner', 'toss_decision', 'winner', 'result',
+                          'result_margin'])
+        deliveries.writerow(['match_id', 'inning', 'batting_team', 'bowling_team', 'over', 'ball',
+                             'batter', 'bowler', 'non_striker', 'batsman_runs', 'extra_runs',
+                             'total_runs', 'extras_type', 'is_wicket', 'player_dismissed', 'dismissal_kind'])
+
+        for match_id in range(1, match_count + 1):
+            season = 2008 + (match_id - 1) * 17 // match_count
+            team1, team2 = rng.sample(TEAM_CODES, 2)
+            first, second = (team1, team2) if rng.random() < 0.5 else (team2, team1)
+
+            innings = []
+            target = None
+            for batting, bowling in ((first, second), (second, first)):
+                batters = rng.sample(squads[batting], 11)
+                bowlers = rng.sample(squads[bowling], 5)
+                rows, total, wickets = _simulate_innings(rng, batters, bowlers, target)
+                innings.append((batting, bowling, rows, total, wickets))
+                target = total + 1
+
+            (_, _, _, first_total, _), (_, _, _, second_total, second_wickets) = innings
+            if second_total > first_total:
+                winner, result, margin = second, 'wickets', 10 - second_wickets
+            elif second_total < first_total:
+                winner, result, margin = first, 'runs', first_total - second_total
+            else:
+                winner, result, margin = '', 'tie', ''
+
+            matches.writerow([
+                match_id, season, TEAM_NAMES[team1].split()[0], f"{season}-{rng.randint(3, 5):02d}-{rng.randint(1, 28):02d}",
+                'League', rng.choice(squads[winner or team1]), venues[team1], TEAM_NAMES[team1],
+                TEAM_NAMES[team2], TEAM_NAMES[first], 'bat', TEAM_NAMES[winner] if winner else 'NA',
+                result, margin,
+            ])
+
+            for inning, (batting, bowling, rows, _, _) in enumerate(innings, 1):
+                for over, ball, batter, non_striker, bowler, runs, extras, extras_type, dismissed, kind in rows:
+                    deliveries.writerow([
+                        match_id, inning, TEAM_NAMES[batting], TEAM_NAMES[bowling], over, ball,
+                        batter, bowler, non_striker, runs, extras, runs + extras, extras_type or 'NA',
+                        1 if dismissed else 0, dismissed or 'NA', kind or 'NA',
+                    ])
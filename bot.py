@@ -4,11 +4,16 @@ import asyncio
 from telethon import TelegramClient, events
 from dotenv import load_dotenv
 from database.mongo_client import MongoDBClient
+from handlers.blacklist_handler import setup_blacklist_handlers
 from handlers.command_handler import setup_command_handlers
 from handlers.message_handler import setup_message_handlers
 from handlers.admin_handler import setup_admin_handlers
 from utils.config import load_config
-from utils.data_loader import load_ipl_data, load_telugu_nlp_data
+from utils.data_loader import load_telugu_nlp_data, set_data_status
+from ml.ipl_stats import build_ipl_store, reload_ipl_store
+from ml.custom_responses import custom_responses
+from ml.intent_classifier import load_intent_classifier
+from utils.broadcast import broadcasts
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +31,27 @@ if os.getenv('GEMINI_API_KEY'):
 else:
     logger.warning("Gemini API key not found in environment variables - AI features will be limited")
 
+async def load_datasets():
+    """
+    Load the datasets in the background and swap in the full IPL store
+
+    Until the IPL store is ready, handlers answer from the sample data or
+    Gemini AI.
+    """
+    set_data_status('ipl', 'loading')
+    set_data_status('telugu_nlp', 'loading')
+
+    try:
+        await reload_ipl_store()
+    except Exception as e:
+        logger.error(f"Error loading IPL data in the background: {e}")
+        set_data_status('ipl', 'failed', error=str(e))
+
+    if await load_telugu_nlp_data() is not None:
+        set_data_status('telugu_nlp', 'ready')
+    else:
+        set_data_status('telugu_nlp', 'failed')
+
 async def main():
     # Load configuration
     config = load_config()
@@ -40,18 +66,30 @@ async def main():
         config['API_HASH']
     )
 
-    # Setup handlers
+    # Setup handlers (the blacklist check first, so it runs before the others)
+    setup_blacklist_handlers(client, db_client)
     setup_command_handlers(client, db_client)
     setup_message_handlers(client, db_client)
     setup_admin_handlers(client, db_client)
 
-    # Load datasets
-    await load_ipl_data()
-    await load_telugu_nlp_data()
+    # Serve from the sample data straight away; the datasets load in the
+    # background and the full store is swapped in when it is ready
+    build_ipl_store()
+    loader = asyncio.create_task(load_datasets())  # keep a reference to the running task
+
+    # Load the local intent classifier weights, if trained
+    load_intent_classifier()
+
+    # Compile admin custom responses and keep them in sync with the database
+    custom_responses.load(db_client)
+    poller = asyncio.create_task(custom_responses.poll(db_client))  # keep a reference to the running task
 
     # Start the client
     await client.start(bot_token=config['BOT_TOKEN'])
 
+    # Pick up a broadcast interrupted by a restart
+    broadcasts.resume(client, db_client)
+
     # Run the client until disconnected
     logger.info("Bot started successfully!")
     await client.run_until_disconnected()
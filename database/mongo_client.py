@@ -1,6 +1,7 @@
 import logging
 import copy
 import time
+from itertools import islice
 
 # Import pymongo conditionally to allow running without it
 try:
@@ -11,6 +12,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Documents fetched per page when streaming a collection
+CURSOR_BATCH_SIZE = 500
+
 # In-memory collection class to simulate MongoDB collections
 class MemoryCollection:
     def __init__(self, name, data=None):
@@ -43,6 +47,26 @@ class MemoryCollection:
 
         return results
 
+    def iter_find(self, query=None, projection=None, sort=None):
+        """
+        Yield matching documents one at a time
+
+        Unlike find(), only the yielded documents are copied, so memory
+        does not grow with the collection. A sort orders references to the
+        matching documents, not copies.
+        """
+        documents = (doc for doc in self.data if not query or self._matches_query(doc, query))
+        if sort:
+            documents = list(documents)
+            for field, direction in reversed(sort):
+                documents.sort(key=lambda doc: doc.get(field, None), reverse=direction < 0)
+
+        for doc in documents:
+            if projection:
+                yield {key: copy.deepcopy(doc[key]) for key, include in projection.items() if include and key in doc}
+            else:
+                yield copy.deepcopy(doc)
+
     def find_one(self, query=None, projection=None):
         """
         Simulate MongoDB find_one operation
@@ -78,13 +102,29 @@ class MemoryCollection:
                 return True
         return False
 
+    def delete_one(self, query):
+        """
+        Simulate MongoDB delete_one operation
+        """
+        for i, doc in enumerate(self.data):
+            if self._matches_query(doc, query):
+                del self.data[i]
+                return True
+        return False
+
     def count_documents(self, query=None):
         """
         Simulate MongoDB count_documents operation
         """
-        if query is None:
-            query = {}
-        return len(self._filter_data(query))
+        if not query:
+            return len(self.data)
+        return sum(1 for doc in self.data if self._matches_query(doc, query))
+
+    def estimated_document_count(self):
+        """
+        Simulate MongoDB estimated_document_count operation
+        """
+        return len(self.data)
 
     def _filter_data(self, query):
         """
@@ -168,6 +208,12 @@ class MemoryCollection:
 
         return results
 
+class MemoryDatabase(dict):
+    """
+    Dictionary of in-memory collections that also accepts attributes
+    (such as the simulated command method)
+    """
+
 class MongoDBClient:
     """
     MongoDB client for handling database operations
@@ -254,12 +300,12 @@ class MongoDBClient:
         logger.info("Setting up in-memory database")
         self.client = None
         # Create a simple in-memory database using dictionaries
-        self.db = {
+        self.db = MemoryDatabase({
             'users': [],
             'messages': [],
             'blacklist': [],
             'custom_responses': []
-        }
+        })
 
         # Add command method to the db dictionary for compatibility
         self.db.command = self._memory_db_command
@@ -314,6 +360,47 @@ class MongoDBClient:
 
         return self.db[collection_name]
 
+    def iter_pages(self, collection_name, query=None, projection=None, sort=None, batch_size=CURSOR_BATCH_SIZE):
+        """
+        Stream a collection as lists of at most batch_size documents
+
+        MongoDB collections are read through a cursor that fetches one
+        batch per page; in-memory collections through a generator. Either
+        way only one page is held at a time.
+        """
+        collection = self.get_collection(collection_name)
+        if collection is None:
+            return
+
+        if isinstance(collection, MemoryCollection):
+            documents = collection.iter_find(query or {}, projection, sort)
+        else:
+            documents = collection.find(query or {}, projection, sort=sort, batch_size=batch_size)
+
+        try:
+            while True:
+                page = list(islice(documents, batch_size))
+                if not page:
+                    return
+                yield page
+        finally:
+            close = getattr(documents, 'close', None)
+            if close is not None:
+                close()
+
+    def iter_user_pages(self, query=None, projection=None, batch_size=CURSOR_BATCH_SIZE):
+        """
+        Stream users in user_id order, in pages (only user_id by default)
+        """
+        return self.iter_pages('users', query, projection or {'user_id': 1}, [('user_id', 1)], batch_size)
+
+    def count_users(self):
+        """
+        Number of users, from collection metadata rather than a full count
+        """
+        users = self.get_collection('users')
+        return users.estimated_document_count() if users is not None else 0
+
     def save_user(self, user_data):
         """
         Save user data to the database
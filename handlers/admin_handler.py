@@ -2,6 +2,10 @@ import logging
 import os
 from telethon import events
 from datetime import datetime, timedelta
+from ml.custom_responses import custom_responses
+from ml.ipl_stats import reload_ipl_store
+from utils.broadcast import broadcasts
+from utils.blacklist import blacklist
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +33,13 @@ def setup_admin_handlers(client, db_client):
             "🔐 **Admin Commands**\n\n"
             "• /stats_admin - Get bot usage statistics\n"
             "• /broadcast <message> - Send a message to all users\n"
+            "• /broadcast_status - Show the progress of the running broadcast\n"
+            "• /broadcast_cancel - Stop the running broadcast\n"
             "• /blacklist <user_id> - Blacklist a user\n"
             "• /whitelist <user_id> - Remove a user from blacklist\n"
             "• /db_status - Check database status\n"
             "• /set_response <trigger>:<response> - Set custom response\n"
+            "• /reload_data - Reload the IPL dataset without a restart\n"
         )
         
         await event.respond(admin_help)
@@ -49,8 +56,8 @@ def setup_admin_handlers(client, db_client):
             users_collection = db_client.get_collection('users')
             messages_collection = db_client.get_collection('messages')
             
-            # Count total users
-            total_users = users_collection.count_documents({})
+            # Count total users (from collection metadata)
+            total_users = db_client.count_users()
             
             # Count active users in the last 24 hours
             yesterday = datetime.now() - timedelta(days=1)
@@ -78,6 +85,8 @@ def setup_admin_handlers(client, db_client):
                 f"• Recent Messages (24h): {recent_messages}\n"
                 f"• Database Size: {db_size_mb:.2f} MB\n"
                 f"• Using Backup DB: {'Yes' if db_client.is_using_backup else 'No'}\n"
+                f"• Blacklisted Users: {len(blacklist)} ({blacklist.mode})\n"
+                f"• Dropped Events (blacklisted): {blacklist.dropped}\n"
             )
             
             await event.respond(stats_message)
@@ -86,6 +95,24 @@ def setup_admin_handlers(client, db_client):
             logger.error(f"Error in stats_admin command: {e}")
             await event.respond(f"Error retrieving statistics: {str(e)}")
     
+    def broadcast_progress(job):
+        """Progress summary of a broadcast job"""
+        remaining = max(job.total - job.processed, 0)
+        percent = job.processed * 100 / job.total if job.total else 100.0
+        message = (
+            "📣 **Broadcast Progress**\n\n"
+            f"• Status: {job.status}\n"
+            f"• Sent: {job.sent}\n"
+            f"• Failed: {job.failed}\n"
+            f"• Progress: {job.processed}/{job.total} ({percent:.1f}%)\n"
+        )
+        if job.status == 'running' and job.rate > 0:
+            message += (
+                f"• Rate: {job.rate:.1f} messages/s\n"
+                f"• Time Left: ~{timedelta(seconds=int(remaining / job.rate))}\n"
+            )
+        return message
+    
     @client.on(events.NewMessage(pattern='/broadcast (.+)'))
     async def broadcast_command(event):
         """Handle /broadcast command"""
@@ -96,29 +123,48 @@ def setup_admin_handlers(client, db_client):
         message = event.pattern_match.group(1).strip()
         
         try:
-            # Get all users
-            users_collection = db_client.get_collection('users')
-            users = users_collection.find({}, {'user_id': 1})
-            
-            sent_count = 0
-            failed_count = 0
+            # Senders run in the background; progress is saved as they go
+            job = broadcasts.start(client, db_client, message, (await event.get_sender()).id)
             
-            await event.respond(f"Broadcasting message to {users_collection.count_documents({})} users...")
+            if job is None:
+                await event.respond("A broadcast is already running. Use /broadcast_status or /broadcast_cancel.")
+                return
             
-            for user in users:
-                try:
-                    await client.send_message(user['user_id'], message)
-                    sent_count += 1
-                except Exception as e:
-                    logger.error(f"Failed to send broadcast to user {user['user_id']}: {e}")
-                    failed_count += 1
+            await event.respond(f"Broadcasting message to {job.total} users... Use /broadcast_status to follow it.")
             
-            await event.respond(f"Broadcast completed. Sent to {sent_count} users. Failed: {failed_count}")
+            job = await broadcasts.wait()
+            await event.respond(f"Broadcast {job.status}. Sent to {job.sent} users. Failed: {job.failed}")
         
         except Exception as e:
             logger.error(f"Error in broadcast command: {e}")
             await event.respond(f"Error broadcasting message: {str(e)}")
     
+    @client.on(events.NewMessage(pattern='/broadcast_status'))
+    async def broadcast_status_command(event):
+        """Handle /broadcast_status command"""
+        if not await is_admin(event):
+            await event.respond("You don't have permission to use admin commands.")
+            return
+        
+        if broadcasts.job is None:
+            await event.respond("No broadcast has run since the bot started.")
+            return
+        
+        await event.respond(broadcast_progress(broadcasts.job))
+    
+    @client.on(events.NewMessage(pattern='/broadcast_cancel'))
+    async def broadcast_cancel_command(event):
+        """Handle /broadcast_cancel command"""
+        if not await is_admin(event):
+            await event.respond("You don't have permission to use admin commands.")
+            return
+        
+        if not broadcasts.cancel():
+            await event.respond("No broadcast is running.")
+            return
+        
+        await event.respond("Cancelling the broadcast after the messages being sent now...")
+    
     @client.on(events.NewMessage(pattern='/blacklist (\d+)'))
     async def blacklist_command(event):
         """Handle /blacklist command"""
@@ -144,6 +190,9 @@ def setup_admin_handlers(client, db_client):
                 'blacklisted_by': (await event.get_sender()).id
             })
             
+            # Takes effect on the user's next event, without a database read
+            blacklist.add(user_id)
+            
             await event.respond(f"User {user_id} has been blacklisted.")
         
         except Exception as e:
@@ -171,6 +220,8 @@ def setup_admin_handlers(client, db_client):
             # Remove from blacklist
             blacklist_collection.delete_one({'user_id': user_id})
             
+            blacklist.remove(user_id)
+            
             await event.respond(f"User {user_id} has been removed from the blacklist.")
         
         except Exception as e:
@@ -253,9 +304,45 @@ def setup_admin_handlers(client, db_client):
                     'created_by': (await event.get_sender()).id
                 })
                 await event.respond(f"Added new response for trigger '{trigger}'.")
+
+            # Serve the new response immediately and notify other instances
+            custom_responses.update(db_client, trigger, response)
         
         except Exception as e:
             logger.error(f"Error in set_response command: {e}")
             await event.respond(f"Error setting custom response: {str(e)}")
     
+    @client.on(events.NewMessage(pattern='/reload_data'))
+    async def reload_data_command(event):
+        """Handle /reload_data command"""
+        if not await is_admin(event):
+            await event.respond("You don't have permission to use admin commands.")
+            return
+        
+        try:
+            await event.respond("Reloading IPL data in the background...")
+            
+            # The current data keeps serving until the new store is swapped in
+            result = await reload_ipl_store()
+            
+            if result is None:
+                await event.respond("A reload is already running.")
+                return
+            
+            store, seconds = result
+            reload_message = (
+                "🔄 **IPL Data Reloaded**\n\n"
+                f"• Version: {store.version}\n"
+                f"• Source: {'Dataset' if store.dataset is not None else 'Sample data'}\n"
+                f"• Matches: {len(store.matches)}\n"
+                f"• Players: {len(store.players)}\n"
+                f"• Build Time: {seconds:.2f}s\n"
+            )
+            
+            await event.respond(reload_message)
+        
+        except Exception as e:
+            logger.error(f"Error in reload_data command: {e}")
+            await event.respond(f"Error reloading IPL data: {str(e)}")
+    
     logger.info("Admin handlers have been set up")
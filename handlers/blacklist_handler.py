@@ -0,0 +1,25 @@
+import logging
+from telethon import events
+from utils.blacklist import blacklist
+
+logger = logging.getLogger(__name__)
+
+def setup_blacklist_handlers(client, db_client):
+    """
+    Set up the blacklist check that runs before every other handler
+
+    Register this before the other handlers: telethon runs handlers in
+    registration order, and StopPropagation keeps the later ones from
+    seeing events of blacklisted users.
+    """
+    blacklist.load(db_client)
+
+    @client.on(events.NewMessage(incoming=True))
+    async def drop_blacklisted(event):
+        """Drop events from blacklisted users before any other work"""
+        # sender_id comes with the update and the list is in memory; only a
+        # Bloom filter hit not seen before reads the database, in a thread
+        if await blacklist.drop(event.sender_id):
+            raise events.StopPropagation
+
+    logger.info("Blacklist handler has been set up")
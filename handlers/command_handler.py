@@ -1,13 +1,72 @@
 import logging
+import re
 from telethon import events
 from datetime import datetime
-from utils.data_loader import get_ipl_data
-from ml.ipl_stats import get_ipl_stats, search_ipl_data
+from utils.data_loader import is_ipl_data_ready
+from ml.ipl_stats import (
+    get_ipl_stats, get_ipl_store, get_leaderboard, get_matchup, get_phase_split, get_win_probability,
+    leaderboard_values, parse_leaderboard_query, parse_win_probability_query, phase_split_values,
+    win_probability_values,
+)
+from ml.stats_engine import find_venue_id
 from ml.nlp_processor import process_telugu_text
+from ml.response_templates import render, render_cached
 from ml import gemini_ai
 
 logger = logging.getLogger(__name__)
 
+# Shown when a local answer needs the IPL dataset that is still loading
+LOADING_MESSAGE = "The full IPL dataset is still loading. Please try again in a minute."
+
+def _live_footer():
+    """
+    Footer fields for responses built from live Gemini data
+    """
+    now = datetime.now()
+    return {'year': now.year, 'updated': now.strftime('%Y-%m-%d')}
+
+# Separator between the teams of a /match query
+MATCH_SEPARATOR = re.compile(r'\s+(?:vs\.?|v\.?|versus|against)\s+', re.IGNORECASE)
+
+def head_to_head_values(record):
+    """
+    Template values for a head-to-head record from the IPL store
+    """
+    last = record['recent'][0]
+    recent = '\n'.join(f"• {match['date']} - {match['result']}" for match in record['recent'][1:])
+    return {
+        **record,
+        'no_result': record['no_result'] or None,
+        'last_date': last['date'],
+        'last_venue': last['venue'],
+        'last_result': last['result'],
+        'recent': recent or None,
+    }
+
+def parse_stats_filters(store, text):
+    """
+    Split /stats arguments into (season, team, venue) filters
+
+    A four-digit year is the season; the rest is a venue if it names one in
+    the loaded dataset, otherwise a team.
+    """
+    season = team = venue = None
+    words = []
+    for word in text.split():
+        if word.isdigit() and len(word) == 4:
+            season = int(word)
+        else:
+            words.append(word)
+
+    rest = ' '.join(words)
+    if rest:
+        if store.dataset is not None and find_venue_id(store.dataset, rest) >= 0:
+            venue = rest
+        else:
+            team = rest
+
+    return season, team, venue
+
 def setup_command_handlers(client, db_client):
     """
     Set up command handlers for the bot
@@ -45,7 +104,8 @@ def setup_command_handlers(client, db_client):
             f"players, teams, and statistics. I can also chat with you in Telugu!\n\n"
             f"Here are some commands you can use:\n"
             f"• /help - Show available commands\n"
-            f"• /stats - Get IPL statistics\n"
+            f"• /stats [season|team|venue] - Get IPL statistics\n"
+            f"• /top <metric> [filters] - Get IPL leaderboards\n"
             f"• /player <name> - Get player information\n"
             f"• /team <name> - Get team information\n"
             f"• /telugu - Switch to Telugu mode\n\n"
@@ -61,11 +121,15 @@ def setup_command_handlers(client, db_client):
             "🤖 **IPL Bot Commands**\n\n"
             "• /start - Start the bot\n"
             "• /help - Show this help message\n"
-            "• /stats - Get IPL statistics\n"
+            "• /stats [season|team|venue] - Get IPL statistics\n"
             "• /player <name> - Get player information\n"
             "• /team <name> - Get team information\n"
             "• /match <team1> vs <team2> - Get match information\n"
-            "• /telugu - Switch to Telugu mode\n"
+            "• /top <metric> [season] [team|venue] [phase] [count] - Get a leaderboard\n"
+            "• /matchup <batter> vs <bowler> - Get a batter-vs-bowler record\n"
+            "• /phases <player> - Get powerplay, middle and death overs splits\n"
+            "• /winprob <situation> - Estimate a side's chances (e.g. CSK need 50 off 24)\n"
+            "• /telugu [script|roman] - Switch to Telugu mode\n"
             "• /admin - Admin commands (for admins only)\n\n"
             "You can also just chat with me normally in English or Telugu, and I'll try to understand and respond!"
         )
@@ -74,64 +138,42 @@ def setup_command_handlers(client, db_client):
 
     @client.on(events.NewMessage(pattern='/stats'))
     async def stats_command(event):
-        """Handle /stats command"""
+        """Handle /stats command (optionally '/stats 2023', '/stats CSK' or '/stats Wankhede')"""
         try:
-            # First, try to get stats from Gemini AI
+            store = get_ipl_store()
+            season, team, venue = parse_stats_filters(store, event.raw_text.partition(' ')[2])
+
+            # With no local dataset, try to get stats from Gemini AI first
             gemini_stats = None
-            if gemini_ai.is_available():
+            if store.dataset is None and gemini_ai.is_available():
                 # Let the user know we're fetching data
                 await event.respond(f"Fetching latest IPL statistics...")
                 gemini_stats = await gemini_ai.get_ipl_stats()
 
             if gemini_stats:
                 # Format the response from Gemini AI
-                stats_message = (
-                    f"📊 **IPL {datetime.now().year} Statistics**\n\n"
-                    f"• Total Matches: {gemini_stats.get('total_matches', 'N/A')}\n"
-                    f"• Most Wins: {gemini_stats.get('most_wins_team', 'N/A')} ({gemini_stats.get('most_wins_count', 'N/A')} wins)\n"
-                    f"• Highest Score: {gemini_stats.get('highest_score_team', 'N/A')} ({gemini_stats.get('highest_score', 'N/A')} runs)\n"
-                    f"• Most Runs: {gemini_stats.get('most_runs_player', 'N/A')} ({gemini_stats.get('most_runs', 'N/A')} runs)\n"
-                    f"• Most Wickets: {gemini_stats.get('most_wickets_player', 'N/A')} ({gemini_stats.get('most_wickets', 'N/A')} wickets)\n"
-                )
-
-                # Add highest individual score if available
-                if 'highest_individual_score' in gemini_stats and 'highest_individual_score_player' in gemini_stats:
-                    stats_message += f"• Highest Individual Score: {gemini_stats['highest_individual_score_player']} ({gemini_stats['highest_individual_score']})\n"
-
-                # Add best bowling figures if available
-                if 'best_bowling_figures' in gemini_stats and 'best_bowling_player' in gemini_stats:
-                    stats_message += f"• Best Bowling: {gemini_stats['best_bowling_player']} ({gemini_stats['best_bowling_figures']})\n"
-
-                # Add points table if available
-                if 'points_table' in gemini_stats:
-                    stats_message += f"\n**Current Points Table:**\n{gemini_stats['points_table']}\n"
-
-                # Add data source
-                stats_message += f"\n_Latest data from IPL {datetime.now().year} - Updated {datetime.now().strftime('%Y-%m-%d')}_"
+                stats_message = render('live_stats_card', {**gemini_stats, **_live_footer()})
 
                 await event.respond(stats_message)
                 return
 
-            # Fallback to local data if Gemini AI is not available or fails
-            stats = get_ipl_stats()
+            # Local data: the ball-by-ball dataset, or the sample records
+            stats = get_ipl_stats(season, team, venue)
 
             if not stats:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
                 await event.respond(f"Sorry, I couldn't retrieve IPL statistics at the moment.")
                 return
 
             # Format the response from local data
-            stats_message = (
-                "📊 **IPL Statistics**\n\n"
-                f"• Total Matches: {stats.get('total_matches', 'N/A')}\n"
-                f"• Most Wins: {stats.get('most_wins_team', 'N/A')} ({stats.get('most_wins_count', 'N/A')} wins)\n"
-                f"• Highest Score: {stats.get('highest_score_team', 'N/A')} ({stats.get('highest_score', 'N/A')} runs)\n"
-                f"• Most Runs: {stats.get('most_runs_player', 'N/A')} ({stats.get('most_runs', 'N/A')} runs)\n"
-                f"• Most Wickets: {stats.get('most_wickets_player', 'N/A')} ({stats.get('most_wickets', 'N/A')} wickets)\n"
+            scope = ', '.join(str(part) for part in (season, team, venue) if part)
+            stats_message = render_cached(
+                'stats_card', ('ipl', season, team, venue), store.version,
+                lambda: {**stats, 'scope': f" ({scope})" if scope else ''},
             )
 
-            # Add data source
-            stats_message += f"\n_Data from local database - may not be current_"
-
             await event.respond(stats_message)
 
         except Exception as e:
@@ -159,66 +201,28 @@ def setup_command_handlers(client, db_client):
 
             if gemini_player_info:
                 # Format the response from Gemini AI
-                player_message = (
-                    f"🏏 **{gemini_player_info.get('name', player_name)}**\n\n"
-                    f"• Team: {gemini_player_info.get('team', 'N/A')}\n"
-                    f"• Role: {gemini_player_info.get('role', 'N/A')}\n"
-                    f"• Country: {gemini_player_info.get('country', 'N/A')}\n"
-                    f"• Matches: {gemini_player_info.get('matches', 'N/A')}\n"
-                    f"• Runs: {gemini_player_info.get('runs', 'N/A')}\n"
-                    f"• Wickets: {gemini_player_info.get('wickets', 'N/A')}\n"
-                )
-
-                # Add batting stats if available
-                if 'batting_avg' in gemini_player_info:
-                    player_message += f"• Batting Average: {gemini_player_info['batting_avg']}\n"
-
-                if 'strike_rate' in gemini_player_info:
-                    player_message += f"• Strike Rate: {gemini_player_info['strike_rate']}\n"
-
-                # Add current form if available
-                if 'current_form' in gemini_player_info:
-                    player_message += f"\n**Current Form:**\n{gemini_player_info['current_form']}\n"
-
-                # Add recent performance if available
-                if 'recent_performance' in gemini_player_info:
-                    player_message += f"\n**Recent Performance:**\n{gemini_player_info['recent_performance']}\n"
-
-                # Add data source
-                player_message += f"\n_Latest data from IPL {datetime.now().year} - Updated {datetime.now().strftime('%Y-%m-%d')}_"
+                player_message = render('live_player_card', {
+                    **gemini_player_info,
+                    'name': gemini_player_info.get('name', player_name),
+                    **_live_footer(),
+                })
 
                 await event.respond(player_message)
                 return
 
             # Fallback to local data if Gemini AI is not available or fails
-            player_info = search_ipl_data('player', player_name)
+            store = get_ipl_store()
+            player_key = store.find_player_key(player_name)
 
-            if not player_info:
+            if player_key is None:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
                 await event.respond(f"Sorry, I couldn't find information about player '{player_name}'.")
                 return
 
             # Format the response from local data
-            player_message = (
-                f"🏏 **{player_info['name']}**\n\n"
-                f"• Team: {player_info['team']}\n"
-                f"• Role: {player_info['role']}\n"
-                f"• Matches: {player_info['matches']}\n"
-                f"• Runs: {player_info['runs']}\n"
-                f"• Wickets: {player_info['wickets']}\n"
-            )
-
-            # Add additional fields if they exist
-            if 'average' in player_info:
-                player_message += f"• Average: {player_info['average']}\n"
-
-            if 'strike_rate' in player_info:
-                player_message += f"• Strike Rate: {player_info['strike_rate']}\n"
-
-            if 'economy' in player_info:
-                player_message += f"• Economy: {player_info['economy']}\n"
-
-            # Add data source
-            player_message += f"\n_Data from local database - may not be current_"
+            player_message = render_cached('player_card', player_key, store.version, store.players[player_key])
 
             await event.respond(player_message)
 
@@ -247,89 +251,213 @@ def setup_command_handlers(client, db_client):
 
             if gemini_team_info:
                 # Format the response from Gemini AI
-                team_message = (
-                    f"🏆 **{gemini_team_info.get('name', team_name)}**\n\n"
-                    f"• Full Name: {gemini_team_info.get('full_name', 'N/A')}\n"
-                    f"• Home Ground: {gemini_team_info.get('home_ground', 'N/A')}\n"
-                    f"• Captain: {gemini_team_info.get('captain', 'N/A')}\n"
-                )
+                team_message = render('live_team_card', {
+                    **gemini_team_info,
+                    'name': gemini_team_info.get('name', team_name),
+                    **_live_footer(),
+                })
 
-                # Add coach if available
-                if 'coach' in gemini_team_info:
-                    team_message += f"• Coach: {gemini_team_info['coach']}\n"
+                await event.respond(team_message)
+                return
 
-                # Add championships if available
-                team_message += f"• Championships: {gemini_team_info.get('championships', 'N/A')}\n"
+            # Fallback to local data if Gemini AI is not available or fails
+            store = get_ipl_store()
+            team_key = store.find_team_key(team_name)
 
-                # Add owner if available
-                if 'owner' in gemini_team_info:
-                    team_message += f"• Owner: {gemini_team_info['owner']}\n"
+            if team_key is None:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
+                await event.respond(f"Sorry, I couldn't find information about team '{team_name}'.")
+                return
 
-                # Add key players if available
-                if 'key_players' in gemini_team_info:
-                    team_message += f"\n**Key Players:**\n{gemini_team_info['key_players']}\n"
+            # Format the response from local data
+            team_message = render_cached('team_card', team_key, store.version, store.teams[team_key])
 
-                # Add recent performance if available
-                if 'recent_performance' in gemini_team_info:
-                    team_message += f"\n**Recent Performance:**\n{gemini_team_info['recent_performance']}\n"
+            await event.respond(team_message)
 
-                # Add data source
-                team_message += f"\n_Latest data from IPL {datetime.now().year} - Updated {datetime.now().strftime('%Y-%m-%d')}_"
+        except Exception as e:
+            logger.error(f"Error in team command: {e}")
+            await event.respond("Sorry, an error occurred while retrieving team information.\nPlease try again later or try with a different team name.")
 
-                await event.respond(team_message)
+            # Try to provide some helpful information even if there's an error
+            try:
+                await event.respond(f"You can try searching for popular teams like CSK, MI, RCB, or KKR.")
+            except:
+                pass
+
+    @client.on(events.NewMessage(pattern='/match (.+)'))
+    async def match_command(event):
+        """Handle /match command ('/match CSK vs MI')"""
+        try:
+            teams = MATCH_SEPARATOR.split(event.pattern_match.group(1).strip())
+            if len(teams) != 2:
+                await event.respond("Please use the format: /match <team1> vs <team2>")
                 return
 
-            # Fallback to local data if Gemini AI is not available or fails
-            team_info = search_ipl_data('team', team_name)
+            # Head-to-head history is answered from the local match index
+            store = get_ipl_store()
+            record = store.head_to_head(teams[0], teams[1])
 
-            if not team_info:
-                await event.respond(f"Sorry, I couldn't find information about team '{team_name}'.")
+            if record:
+                match_message = render_cached(
+                    'head_to_head_card', store.find_fixture(teams[0], teams[1]), store.version,
+                    lambda: head_to_head_values(record),
+                )
+                await event.respond(match_message)
                 return
 
-            # Format the response from local data
-            team_message = (
-                f"🏆 **{team_info['name']}**\n\n"
-                f"• Full Name: {team_info['full_name']}\n"
-                f"• Home Ground: {team_info['home_ground']}\n"
-                f"• Captain: {team_info['captain']}\n"
+            # Fall back to Gemini AI for fixtures without local history
+            gemini_match_info = None
+            if gemini_ai.is_available():
+                await event.respond(f"Fetching latest information about {teams[0]} vs {teams[1]}...")
+                gemini_match_info = await gemini_ai.get_ipl_match_info(teams[0], teams[1])
+
+            if gemini_match_info:
+                match_message = render('live_match_card', {
+                    'team1': teams[0],
+                    'team2': teams[1],
+                    **gemini_match_info,
+                    **_live_footer(),
+                })
+                await event.respond(match_message)
+                return
+
+            if not is_ipl_data_ready():
+                await event.respond(LOADING_MESSAGE)
+                return
+
+            await event.respond(f"Sorry, I couldn't find any matches between '{teams[0]}' and '{teams[1]}'.")
+
+        except Exception as e:
+            logger.error(f"Error in match command: {e}")
+            await event.respond("Sorry, an error occurred while retrieving match information.\nPlease try again later.")
+
+    @client.on(events.NewMessage(pattern='/top'))
+    async def top_command(event):
+        """Handle /top command ('/top runs 2023', '/top economy Wankhede death 5')"""
+        try:
+            store = get_ipl_store()
+            query = parse_leaderboard_query(store, event.raw_text.partition(' ')[2])
+
+            if query is None:
+                await event.respond(
+                    "Please use the format: /top <metric> [season] [team|venue] [powerplay|middle|death] [count]\n"
+                    "Metrics: runs, wickets, sixes, fours, average, strike rate, economy"
+                )
+                return
+
+            rows = get_leaderboard(**query)
+
+            if not rows:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
+                await event.respond("Sorry, I couldn't find a leaderboard for that query.")
+                return
+
+            top_message = render_cached(
+                'leaderboard_card', tuple(query.values()), store.version,
+                lambda: leaderboard_values(query, rows),
             )
 
-            # Add additional fields if they exist
-            if 'coach' in team_info:
-                team_message += f"• Coach: {team_info['coach']}\n"
+            await event.respond(top_message)
 
-            team_message += f"• Championships: {team_info['championships']}\n"
+        except Exception as e:
+            logger.error(f"Error in top command: {e}")
+            await event.respond("Sorry, an error occurred while building the leaderboard.\nPlease try again later.")
 
-            if 'matches_played' in team_info:
-                team_message += f"• Matches Played: {team_info['matches_played']}\n"
+    @client.on(events.NewMessage(pattern='/matchup (.+)'))
+    async def matchup_command(event):
+        """Handle /matchup command ('/matchup Kohli vs Bumrah')"""
+        try:
+            players = MATCH_SEPARATOR.split(event.pattern_match.group(1).strip())
+            if len(players) != 2:
+                await event.respond("Please use the format: /matchup <batter> vs <bowler>")
+                return
 
-            if 'wins' in team_info:
-                team_message += f"• Wins: {team_info['wins']}\n"
+            record = get_matchup(players[0], players[1])
 
-            if 'losses' in team_info:
-                team_message += f"• Losses: {team_info['losses']}\n"
+            if not record:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
+                await event.respond(f"Sorry, I couldn't find any deliveries bowled by '{players[1]}' to '{players[0]}'.")
+                return
 
-            if 'win_percentage' in team_info:
-                team_message += f"• Win Percentage: {team_info['win_percentage']}%\n"
+            store = get_ipl_store()
+            matchup_message = render_cached(
+                'matchup_card', (record['batter'], record['bowler']), store.version, record,
+            )
+            await event.respond(matchup_message)
 
-            # Add data source
-            team_message += f"\n_Data from local database - may not be current_"
+        except Exception as e:
+            logger.error(f"Error in matchup command: {e}")
+            await event.respond("Sorry, an error occurred while retrieving the matchup.\nPlease try again later.")
 
-            await event.respond(team_message)
+    @client.on(events.NewMessage(pattern='/phases (.+)'))
+    async def phases_command(event):
+        """Handle /phases command ('/phases Bumrah')"""
+        try:
+            split = get_phase_split(event.pattern_match.group(1).strip())
+
+            if not split:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
+                await event.respond("Sorry, I couldn't find phase stats for that player.")
+                return
+
+            store = get_ipl_store()
+            phases_message = render_cached(
+                'phase_card', split['name'], store.version, lambda: phase_split_values(split),
+            )
+            await event.respond(phases_message)
 
         except Exception as e:
-            logger.error(f"Error in team command: {e}")
-            await event.respond("Sorry, an error occurred while retrieving team information.\nPlease try again later or try with a different team name.")
+            logger.error(f"Error in phases command: {e}")
+            await event.respond("Sorry, an error occurred while retrieving phase stats.\nPlease try again later.")
 
-            # Try to provide some helpful information even if there's an error
-            try:
-                await event.respond(f"You can try searching for popular teams like CSK, MI, RCB, or KKR.")
-            except:
-                pass
+    @client.on(events.NewMessage(pattern='/winprob'))
+    async def winprob_command(event):
+        """Handle /winprob command ('/winprob CSK need 50 off 24 with 6 wickets in hand')"""
+        try:
+            store = get_ipl_store()
+            query = parse_win_probability_query(store, event.raw_text.partition(' ')[2])
+
+            if query is None:
+                await event.respond(
+                    "Please describe the situation, for example:\n"
+                    "• /winprob CSK need 50 off 24 with 6 wickets in hand\n"
+                    "• /winprob chasing 180, 130/4 after 16 overs\n"
+                    "• /winprob MI 120/3 after 12 overs"
+                )
+                return
+
+            probability = get_win_probability(
+                query['innings'], query['balls_remaining'], query['runs'], query['wickets_in_hand']
+            )
+
+            if probability is None:
+                if not is_ipl_data_ready():
+                    await event.respond(LOADING_MESSAGE)
+                    return
+                await event.respond("Sorry, win probabilities need the full IPL dataset, which is not loaded.")
+                return
+
+            winprob_message = render_cached(
+                'win_probability_card', tuple(query.values()), store.version,
+                lambda: win_probability_values(query, probability),
+            )
+            await event.respond(winprob_message)
+
+        except Exception as e:
+            logger.error(f"Error in winprob command: {e}")
+            await event.respond("Sorry, an error occurred while estimating the win probability.\nPlease try again later.")
 
     @client.on(events.NewMessage(pattern='/telugu'))
     async def telugu_command(event):
-        """Handle /telugu command"""
+        """Handle /telugu command (optionally '/telugu script' or '/telugu roman')"""
         user = await event.get_sender()
 
         # Update user preference in database
@@ -338,6 +466,12 @@ def setup_command_handlers(client, db_client):
             'language_preference': 'telugu',
             'last_active': datetime.now()
         }
+
+        # Optional script preference for Telugu replies
+        args = event.raw_text.split()[1:]
+        if args and args[0].lower() in ('script', 'roman'):
+            user_data['telugu_script'] = 'telugu' if args[0].lower() == 'script' else 'roman'
+
         db_client.save_user(user_data)
 
         # Respond in Telugu
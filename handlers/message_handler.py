@@ -2,8 +2,10 @@ import logging
 import re
 from telethon import events
 from datetime import datetime
-from ml.nlp_processor import process_text, is_telugu_text, process_telugu_text
-from ml.conversation_model import get_response
+from ml.nlp_processor import process_text, detect_language, process_telugu_text
+from ml.conversation_model import get_local_response, get_response
+from ml.custom_responses import custom_responses
+from ml.transliteration import render_telugu
 from ml import gemini_ai
 
 logger = logging.getLogger(__name__)
@@ -52,32 +54,57 @@ def setup_message_handlers(client, db_client):
 
         # Get user preferences from database
         language_preference = 'english'
+        script_preference = None
         try:
             db_user = db_client.get_user(user.id)
             if db_user:
                 language_preference = db_user.get('language_preference', 'english')
+                script_preference = db_user.get('telugu_script')
         except Exception as e:
             logger.error(f"Error getting user preferences: {e}")
 
-        # Check if message is in Telugu
+        # Check if message is in Telugu (script or romanized)
         message_text = event.message.text
-        is_telugu = is_telugu_text(message_text)
+        detected_language = detect_language(message_text)
+        is_telugu = detected_language == 'telugu'
 
         # Determine language preference
-        current_language = 'telugu' if is_telugu or language_preference == 'telugu' else 'english'
+        if detected_language != 'english' or language_preference == 'telugu':
+            current_language = 'telugu'
+        else:
+            current_language = 'english'
+
+        # Admin-authored custom responses take precedence over everything else
+        custom_response = custom_responses.match(message_text)
+
+        # IPL questions the local data can answer never reach Gemini
+        local_response = None
+        if custom_response is None:
+            local_response = get_local_response(message_text, current_language)
 
-        # First try to get response from Gemini AI
+        # Otherwise try to get response from Gemini AI
         gemini_response = None
-        if gemini_ai.is_available():
+        if custom_response is None and local_response is None and gemini_ai.is_available():
             try:
                 gemini_response = await gemini_ai.chat_with_gemini(message_text, current_language)
                 logger.info(f"Got response from Gemini AI: {gemini_response[:50]}...")
             except Exception as e:
                 logger.error(f"Error getting response from Gemini AI: {e}")
 
-        if gemini_response:
-            # Send Gemini AI response
+        # Telugu replies use the user's script: stored preference, else the script they wrote in
+        telugu_script = script_preference or ('telugu' if is_telugu else 'roman')
+
+        if custom_response is not None:
+            response = custom_response
+        elif local_response is not None:
+            response = local_response
+            if current_language == 'telugu':
+                response = render_telugu(response, telugu_script)
+        elif gemini_response:
+            # Send Gemini AI response (Gemini writes Telugu in Telugu script)
             response = gemini_response
+            if current_language == 'telugu':
+                response = render_telugu(response, telugu_script)
         else:
             # Fallback to local model if Gemini AI is not available or fails
             # Process message based on language
@@ -86,9 +113,9 @@ def setup_message_handlers(client, db_client):
                 if is_telugu:
                     processed_text = process_telugu_text(message_text)
                 else:
-                    # User has Telugu preference but sent English message
+                    # Romanized Telugu, or Telugu preference with an English message
                     processed_text = process_text(message_text)
-                response = get_response(processed_text, 'telugu')
+                response = render_telugu(get_response(processed_text, 'telugu'), telugu_script)
             else:
                 # Process English message
                 processed_text = process_text(message_text)
@@ -3,7 +3,12 @@ import random
 import json
 import os
 from pathlib import Path
-from ml.nlp_processor import detect_intent, extract_entities
+from ml.nlp_processor import extract_entities, matching_intents
+from ml.intent_classifier import CONFIDENCE_THRESHOLD, classify_intent
+from ml.pattern_matcher import PatternMatcher
+from ml.ipl_stats import get_ipl_store, get_leaderboard, leaderboard_values, parse_leaderboard_query
+from ml.ipl_stats import get_win_probability, parse_win_probability_query, win_probability_values
+from ml.response_templates import render_cached
 
 logger = logging.getLogger(__name__)
 
@@ -63,38 +68,146 @@ conversation_data = {
     }
 }
 
-# Path to store learned responses
+# Path to store the learned responses snapshot
 LEARNED_RESPONSES_PATH = Path("data/learned_responses.json")
 
+# Append-only journal of responses learned since the last snapshot
+LEARNED_RESPONSES_JOURNAL_PATH = Path("data/learned_responses.jsonl")
+
+# Minimum number of journal entries that triggers a compaction into the snapshot.
+# Larger stores compact once the journal reaches half their size, which keeps
+# the amortized cost of a learn constant.
+JOURNAL_COMPACT_THRESHOLD = 1000
+
+# Intents tried last, answered from the player or team a message names
+ENTITY_INTENTS = ('player_info', 'team_info')
+
 # Initialize learned responses
 learned_responses = {'english': {}, 'telugu': {}}
 
+# Per-language trie index over the learned patterns
+learned_matchers = {'english': PatternMatcher(), 'telugu': PatternMatcher()}
+
+# Open journal file handle and the number of entries written since the last snapshot
+_journal_file = None
+journal_entries = 0
+
+def _rebuild_learned_matchers():
+    """
+    Rebuild the pattern index from the learned responses
+    """
+    global learned_matchers
+
+    learned_matchers = {
+        language: PatternMatcher(responses)
+        for language, responses in learned_responses.items()
+    }
+
+def _close_journal():
+    """
+    Close the open journal file handle, if any
+    """
+    global _journal_file
+
+    if _journal_file is not None:
+        _journal_file.close()
+        _journal_file = None
+
+def _append_to_journal(language, pattern, response):
+    """
+    Append one learned entry to the journal
+    """
+    global _journal_file, journal_entries
+
+    # Reopen if the journal path changed since the handle was opened
+    if _journal_file is not None and _journal_file.name != str(LEARNED_RESPONSES_JOURNAL_PATH):
+        _close_journal()
+
+    if _journal_file is None:
+        LEARNED_RESPONSES_JOURNAL_PATH.parent.mkdir(exist_ok=True)
+        _journal_file = open(LEARNED_RESPONSES_JOURNAL_PATH, 'a', encoding='utf-8')
+
+    entry = {'language': language, 'pattern': pattern, 'response': response}
+    _journal_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    _journal_file.flush()
+    journal_entries += 1
+
+def _replay_journal():
+    """
+    Apply journal entries on top of the loaded snapshot
+
+    A partially written last line (e.g. after a crash) is skipped.
+    """
+    replayed = 0
+
+    with open(LEARNED_RESPONSES_JOURNAL_PATH, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                entry = json.loads(line)
+                language = entry['language']
+                learned_responses.setdefault(language, {})[entry['pattern']] = entry['response']
+                replayed += 1
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping corrupt journal entry on line {line_number}: {e}")
+
+    return replayed
+
 # Load learned responses if file exists
 def load_learned_responses():
     """
-    Load learned responses from file
+    Load learned responses from the snapshot and replay the journal
     """
-    global learned_responses
+    global learned_responses, journal_entries
 
     try:
         if LEARNED_RESPONSES_PATH.exists():
             with open(LEARNED_RESPONSES_PATH, 'r', encoding='utf-8') as f:
                 learned_responses = json.load(f)
-            logger.info(f"Loaded {sum(len(v) for v in learned_responses.values())} learned responses")
+
+        journal_entries = 0
+        if LEARNED_RESPONSES_JOURNAL_PATH.exists():
+            journal_entries = _replay_journal()
+
+        _rebuild_learned_matchers()
+        logger.info(
+            f"Loaded {sum(len(v) for v in learned_responses.values())} learned responses "
+            f"({journal_entries} from journal)"
+        )
     except Exception as e:
         logger.error(f"Error loading learned responses: {e}")
 
 # Save learned responses to file
 def save_learned_responses():
     """
-    Save learned responses to file
+    Compact learned responses into a new snapshot and reset the journal
+
+    The snapshot is written to a temporary file and atomically renamed, so
+    a crash leaves either the old or the new snapshot on disk. Replaying a
+    journal that outlived its compaction is harmless because entries are
+    idempotent.
     """
+    global journal_entries
+
     try:
         # Create directory if it doesn't exist
         LEARNED_RESPONSES_PATH.parent.mkdir(exist_ok=True)
 
-        with open(LEARNED_RESPONSES_PATH, 'w', encoding='utf-8') as f:
-            json.dump(learned_responses, f, ensure_ascii=False, indent=2)
+        temp_path = LEARNED_RESPONSES_PATH.with_name(LEARNED_RESPONSES_PATH.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(learned_responses, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, LEARNED_RESPONSES_PATH)
+
+        # Start a fresh journal
+        _close_journal()
+        if LEARNED_RESPONSES_JOURNAL_PATH.exists():
+            LEARNED_RESPONSES_JOURNAL_PATH.unlink()
+        journal_entries = 0
 
         logger.info(f"Saved {sum(len(v) for v in learned_responses.values())} learned responses")
     except Exception as e:
@@ -103,126 +216,105 @@ def save_learned_responses():
 # Load learned responses at module import
 load_learned_responses()
 
-# Mock function for search_ipl_data (since we removed the actual implementation)
-def search_ipl_data(data_type, query):
-    """
-    Simplified mock function for searching IPL data
-    """
-    if data_type == 'player':
-        return {
-            'name': query,
-            'team': 'Sample Team',
-            'role': 'Batsman',
-            'matches': '50',
-            'runs': '1500',
-            'wickets': '10'
-        }
-    elif data_type == 'team':
-        return {
-            'name': query,
-            'full_name': f'{query} Cricket Team',
-            'home_ground': 'Sample Stadium',
-            'captain': 'Sample Captain',
-            'championships': '2'
-        }
-    elif data_type == 'match':
-        teams = query.split(' vs ')
-        return {
-            'team1': teams[0],
-            'team2': teams[1] if len(teams) > 1 else 'Unknown Team',
-            'date': '2023-04-15',
-            'venue': 'Sample Stadium',
-            'result': 'Team 1 won by 5 wickets'
-        }
+def _intent_response(store, intent, text, language):
+    """
+    Answer a message for one intent from the local IPL data, or None
+    """
+    entities = extract_entities(text, intent, resolver=store.resolver)
+
+    if intent == 'player_info' and 'player_name' in entities:
+        key = store.find_player_key(entities['player_name'])
+        if key is not None:
+            return render_cached('player_info', key, store.version, store.players[key], language)
+
+    elif intent == 'team_info' and 'team_name' in entities:
+        key = store.find_team_key(entities['team_name'])
+        if key is not None:
+            return render_cached('team_info', key, store.version, store.teams[key], language)
+
+    elif intent == 'match_info' and 'team1' in entities and 'team2' in entities:
+        key = store.find_match_key(entities['team1'], entities['team2'])
+        if key is not None:
+            return render_cached('match_info', key, store.version, store.matches[key], language)
+
+    elif intent == 'leaderboard':
+        query = parse_leaderboard_query(store, text)
+        rows = get_leaderboard(**query) if query else None
+        if rows:
+            return render_cached('leaderboard_card', tuple(query.values()), store.version,
+                                 lambda: leaderboard_values(query, rows), language)
+
+    elif intent == 'win_probability':
+        query = parse_win_probability_query(store, text)
+        probability = get_win_probability(
+            query['innings'], query['balls_remaining'], query['runs'], query['wickets_in_hand']
+        ) if query else None
+        if probability is not None:
+            return render_cached('win_probability_card', tuple(query.values()), store.version,
+                                 lambda: win_probability_values(query, probability), language)
+
+    return None
+
+def _answer_intents(intents, text, language):
+    """
+    Answer a message for the first of its intents that the local IPL data
+    can answer
+
+    When the handler of one intent cannot answer, the next one is tried,
+    and a message that still names a player or team gets their card.
+    """
+    store = get_ipl_store()
+    for intent in dict.fromkeys(list(intents) + list(ENTITY_INTENTS)):
+        response = _intent_response(store, intent, text, language)
+        if response is not None:
+            return response
     return None
 
+def get_local_response(text, language='english', threshold=CONFIDENCE_THRESHOLD):
+    """
+    Answer an IPL question from the local data before Gemini is asked, or None
+
+    The message is routed by the keyword rules and the local classifier;
+    'conversation' and messages the classifier is not confident about are
+    left to Gemini. Takes the raw message: the parsers need the
+    punctuation ("130/4", "12.3 overs", "CSK's") that process_text strips.
+    """
+    intent, confidence = classify_intent(text, threshold)
+    if intent == 'conversation' or confidence < threshold:
+        return None
+    return _answer_intents(matching_intents(text) or [intent], text, language)
+
 def get_response(text, language='english'):
     """
     Get a response based on the input text
     """
+    lowered = text.lower()
+
     # Check for greetings
-    if any(greeting in text.lower() for greeting in ['hello', 'hi', 'hey', 'namaste', 'నమస్కారం', 'హలో']):
+    if any(greeting in lowered for greeting in ['hello', 'hi', 'hey', 'namaste', 'నమస్కారం', 'హలో']):
         return random.choice(conversation_data[language]['greetings'])
 
     # Check for farewells
-    if any(farewell in text.lower() for farewell in ['bye', 'goodbye', 'see you', 'వీడ్కోలు', 'బై']):
+    if any(farewell in lowered for farewell in ['bye', 'goodbye', 'see you', 'వీడ్కోలు', 'బై']):
         return random.choice(conversation_data[language]['farewells'])
 
     # Check for thanks
-    if any(thanks in text.lower() for thanks in ['thanks', 'thank you', 'ధన్యవాదాలు', 'థాంక్స్']):
+    if any(thanks in lowered for thanks in ['thanks', 'thank you', 'ధన్యవాదాలు', 'థాంక్స్']):
         return random.choice(conversation_data[language]['thanks'])
 
     # Check learned responses
-    for pattern, response in learned_responses[language].items():
-        if pattern.lower() in text.lower():
+    matcher = learned_matchers.get(language)
+    if matcher is not None:
+        response = matcher.match(lowered)
+        if response is not None:
             return response
 
-    # Detect intent
-    intent = detect_intent(text)
-
-    # Handle intent-based responses
+    # Detect intent (keyword rules, then the local classifier)
+    intent, _ = classify_intent(text)
     if intent != 'conversation':
-        entities = extract_entities(text, intent)
-
-        if intent == 'player_info' and 'player_name' in entities:
-            player_info = search_ipl_data('player', entities['player_name'])
-            if player_info:
-                if language == 'english':
-                    return (
-                        f"Here's information about {player_info['name']}:\n"
-                        f"Team: {player_info['team']}\n"
-                        f"Role: {player_info['role']}\n"
-                        f"Matches: {player_info['matches']}\n"
-                        f"Runs: {player_info['runs']}\n"
-                        f"Wickets: {player_info['wickets']}"
-                    )
-                else:  # Telugu
-                    return (
-                        f"{player_info['name']} గురించి సమాచారం ఇక్కడ ఉంది:\n"
-                        f"జట్టు: {player_info['team']}\n"
-                        f"పాత్ర: {player_info['role']}\n"
-                        f"మ్యాచ్‌లు: {player_info['matches']}\n"
-                        f"పరుగులు: {player_info['runs']}\n"
-                        f"వికెట్లు: {player_info['wickets']}"
-                    )
-
-        elif intent == 'team_info' and 'team_name' in entities:
-            team_info = search_ipl_data('team', entities['team_name'])
-            if team_info:
-                if language == 'english':
-                    return (
-                        f"Here's information about {team_info['name']}:\n"
-                        f"Full Name: {team_info['full_name']}\n"
-                        f"Home Ground: {team_info['home_ground']}\n"
-                        f"Captain: {team_info['captain']}\n"
-                        f"Championships: {team_info['championships']}"
-                    )
-                else:  # Telugu
-                    return (
-                        f"{team_info['name']} గురించి సమాచారం ఇక్కడ ఉంది:\n"
-                        f"పూర్తి పేరు: {team_info['full_name']}\n"
-                        f"హోమ్ గ్రౌండ్: {team_info['home_ground']}\n"
-                        f"కెప్టెన్: {team_info['captain']}\n"
-                        f"ఛాంపియన్‌షిప్‌లు: {team_info['championships']}"
-                    )
-
-        elif intent == 'match_info' and 'team1' in entities and 'team2' in entities:
-            match_info = search_ipl_data('match', f"{entities['team1']} vs {entities['team2']}")
-            if match_info:
-                if language == 'english':
-                    return (
-                        f"Here's information about {match_info['team1']} vs {match_info['team2']}:\n"
-                        f"Date: {match_info['date']}\n"
-                        f"Venue: {match_info['venue']}\n"
-                        f"Result: {match_info['result']}"
-                    )
-                else:  # Telugu
-                    return (
-                        f"{match_info['team1']} vs {match_info['team2']} గురించి సమాచారం ఇక్కడ ఉంది:\n"
-                        f"తేదీ: {match_info['date']}\n"
-                        f"వేదిక: {match_info['venue']}\n"
-                        f"ఫలితం: {match_info['result']}"
-                    )
+        response = _answer_intents(matching_intents(text) or [intent], text, language)
+        if response is not None:
+            return response
 
     # Fallback response
     return random.choice(conversation_data[language]['fallbacks'])
@@ -235,10 +327,18 @@ def learn_response(text, response, language='english'):
     words = text.lower().split()
     key_phrase = ' '.join(words[:min(5, len(words))])
 
-    # Store the response
-    learned_responses[language][key_phrase] = response
+    # Store the response and index it
+    learned_responses.setdefault(language, {})[key_phrase] = response
+    learned_matchers.setdefault(language, PatternMatcher()).add(key_phrase, response)
+
+    # Journal the entry and compact once the journal grows large
+    try:
+        _append_to_journal(language, key_phrase, response)
+    except Exception as e:
+        logger.error(f"Error journaling learned response: {e}")
 
-    # Save learned responses
-    save_learned_responses()
+    total_entries = sum(len(v) for v in learned_responses.values())
+    if journal_entries >= max(JOURNAL_COMPACT_THRESHOLD, total_entries // 2):
+        save_learned_responses()
 
     return True
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import time
+from ml.pattern_matcher import PatternMatcher
+
+logger = logging.getLogger(__name__)
+
+# Settings document that holds the version stamp of the custom responses
+VERSION_KEY = 'custom_responses_version'
+
+# How often other bot instances check the version stamp for changes
+CUSTOM_RESPONSES_POLL_SECONDS = 30
+
+class CustomResponseStore:
+    """
+    In-memory matcher over the admin-authored custom responses
+
+    Triggers are loaded from the custom_responses collection once and kept
+    in a PatternMatcher, so checking a message costs no database I/O.
+    Writers bump a version stamp in the settings collection; readers poll
+    it and reload only when it changes.
+    """
+
+    def __init__(self):
+        self.matcher = PatternMatcher()
+        self.version = None
+
+    def __len__(self):
+        return len(self.matcher)
+
+    def _read_version(self, db_client):
+        """
+        Read the current version stamp from the database
+        """
+        settings = db_client.get_collection('settings')
+        document = settings.find_one({'key': VERSION_KEY}) if settings is not None else None
+        return document.get('value') if document else None
+
+    def _write_version(self, db_client, version):
+        """
+        Store a new version stamp in the database
+        """
+        settings = db_client.get_collection('settings')
+        if settings.find_one({'key': VERSION_KEY}):
+            settings.update_one({'key': VERSION_KEY}, {'$set': {'value': version}})
+        else:
+            settings.insert_one({'key': VERSION_KEY, 'value': version})
+
+    def load(self, db_client):
+        """
+        Load all custom responses into a freshly compiled matcher
+        """
+        try:
+            version = self._read_version(db_client)
+            responses_collection = db_client.get_collection('custom_responses')
+
+            matcher = PatternMatcher()
+            for document in responses_collection.find({}, {'trigger': 1, 'response': 1}):
+                if document.get('trigger') and document.get('response'):
+                    matcher.add(document['trigger'], document['response'])
+
+            self.matcher = matcher
+            self.version = version
+            logger.info(f"Loaded {len(matcher)} custom responses")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading custom responses: {e}")
+            return False
+
+    def update(self, db_client, trigger, response):
+        """
+        Apply a trigger change locally and publish a new version stamp
+
+        Call this after the custom_responses collection has been written.
+        """
+        self.matcher.add(trigger, response)
+
+        try:
+            version = time.time()
+            self._write_version(db_client, version)
+            self.version = version
+        except Exception as e:
+            logger.error(f"Error updating custom responses version: {e}")
+
+    def refresh(self, db_client):
+        """
+        Reload the matcher if another writer changed the version stamp
+        """
+        try:
+            version = self._read_version(db_client)
+        except Exception as e:
+            logger.error(f"Error reading custom responses version: {e}")
+            return False
+
+        if version == self.version:
+            return False
+
+        return self.load(db_client)
+
+    async def poll(self, db_client, interval=CUSTOM_RESPONSES_POLL_SECONDS):
+        """
+        Periodically refresh the matcher from the version stamp
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.refresh(db_client)
+
+    def match(self, text):
+        """
+        Get the custom response for a message, or None
+        """
+        return self.matcher.match(text)
+
+# Shared store used by the message and admin handlers
+custom_responses = CustomResponseStore()
@@ -0,0 +1,242 @@
+import logging
+import re
+from collections import defaultdict
+from ml.nlp_processor import PUNCTUATION_TABLE
+
+logger = logging.getLogger(__name__)
+
+# Hand-curated nicknames, keyed by canonical player name
+PLAYER_ALIASES = {
+    'virat kohli': ('v kohli', 'kohli', 'vk', 'king kohli', 'chiku'),
+    'ms dhoni': ('dhoni', 'msd', 'mahi', 'thala', 'captain cool'),
+    'rohit sharma': ('rg sharma', 'hitman'),
+    'jasprit bumrah': ('jj bumrah', 'bumrah', 'boom boom', 'jassi'),
+    'ab de villiers': ('ab devilliers', 'abd', 'mr 360'),
+    'chris gayle': ('ch gayle', 'gayle', 'universe boss'),
+    'suresh raina': ('sk raina', 'raina', 'mr ipl', 'chinna thala'),
+    'ravindra jadeja': ('ra jadeja', 'jadeja', 'jaddu', 'sir jadeja'),
+    'hardik pandya': ('hh pandya', 'hardik'),
+    'shubman gill': ('shubman',),
+    'kl rahul': ('rahul',),
+    'david warner': ('da warner', 'warner'),
+    'sunil narine': ('sp narine', 'narine'),
+    'andre russell': ('ad russell', 'russell', 'dre russ'),
+    'yuzvendra chahal': ('ys chahal', 'chahal', 'yuzi'),
+    'rashid khan': ('rashid',),
+}
+
+# Team aliases (full names, cities, nicknames), keyed by short code
+TEAM_ALIASES = {
+    'csk': ('chennai super kings', 'chennai', 'super kings', 'yellove'),
+    'mi': ('mumbai indians', 'mumbai'),
+    'rcb': ('royal challengers bangalore', 'royal challengers bengaluru',
+            'bangalore', 'bengaluru', 'royal challengers'),
+    'kkr': ('kolkata knight riders', 'kolkata', 'knight riders'),
+    'dc': ('delhi capitals', 'delhi daredevils', 'delhi'),
+    'pbks': ('punjab kings', 'kings xi punjab', 'punjab', 'kxip'),
+    'rr': ('rajasthan royals', 'rajasthan'),
+    'srh': ('sunrisers hyderabad', 'hyderabad', 'sunrisers', 'orange army'),
+    'gt': ('gujarat titans', 'gujarat'),
+    'lsg': ('lucknow super giants', 'lucknow'),
+}
+
+# Single words that are also player surnames but too common to treat as
+# a mention when they appear in free text
+COMMON_WORDS = frozenset({
+    'head', 'wood', 'green', 'hope', 'short', 'little', 'chase', 'salt',
+    'root', 'king', 'best', 'rich', 'star',
+})
+
+# Score for an exact alias that is shared by several entities
+AMBIGUOUS_ALIAS_SCORE = 0.8
+
+# Minimum trigram similarity for a fuzzy candidate
+DEFAULT_MIN_SCORE = 0.45
+
+# Longest alias, in words, that find_mentions looks for
+MAX_MENTION_WORDS = 4
+
+_whitespace = re.compile(r'\s+')
+
+def normalize_name(text):
+    """
+    Lowercase a name, drop punctuation and collapse whitespace
+    """
+    return _whitespace.sub(' ', text.lower().translate(PUNCTUATION_TABLE)).strip()
+
+def _trigrams(name):
+    """
+    Set of character trigrams of a name, padded at the word edges
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class EntityResolver:
+    """
+    Resolve free-text player and team names to IPL data keys
+
+    Exact aliases are answered from a dictionary. Anything else is scored
+    by trigram similarity against every known name and alias, so typos
+    still resolve to local records.
+    """
+
+    def __init__(self):
+        # normalized alias -> list of (kind, key)
+        self._aliases = defaultdict(list)
+        # indexed names: parallel lists of (kind, key) and trigram counts
+        self._name_targets = []
+        self._name_sizes = []
+        self._name_ids = {}
+        # trigram -> list of indexed name ids
+        self._postings = defaultdict(list)
+
+    def __len__(self):
+        return len({target for targets in self._aliases.values() for target in targets})
+
+    @classmethod
+    def from_ipl_data(cls, ipl_data):
+        """
+        Build a resolver over the players and teams of an IPL data mapping
+        """
+        resolver = cls()
+
+        for key, team in ipl_data.get('teams', {}).items():
+            names = [key, team.get('name', ''), team.get('full_name', '')]
+            names.extend(TEAM_ALIASES.get(normalize_name(key), ()))
+            resolver.add('team', key, names)
+
+        curated = {}
+        for canonical, aliases in PLAYER_ALIASES.items():
+            for alias in (canonical,) + aliases:
+                curated[alias] = canonical
+
+        for key, player in ipl_data.get('players', {}).items():
+            name = normalize_name(player.get('name', key))
+            names = [key, name]
+
+            # Surname and "initials surname" forms, e.g. "kohli" and "v kohli"
+            tokens = name.split()
+            if len(tokens) > 1:
+                names.append(tokens[-1])
+                names.append(' '.join([''.join(t[0] for t in tokens[:-1]), tokens[-1]]))
+
+            canonical = curated.get(name) or curated.get(normalize_name(key))
+            if canonical:
+                names.append(canonical)
+                names.extend(PLAYER_ALIASES[canonical])
+
+            resolver.add('player', key, names)
+
+        logger.info(f"Entity resolver indexed {len(resolver._name_targets)} names")
+        return resolver
+
+    def add(self, kind, key, names):
+        """
+        Register names and aliases for an entity
+        """
+        target = (kind, key)
+
+        for name in names:
+            alias = normalize_name(name) if name else ''
+            if not alias:
+                continue
+
+            targets = self._aliases[alias]
+            if target not in targets:
+                targets.append(target)
+
+            # Very short aliases ("vk", "mi") are exact-match only
+            if len(alias) < 3 or (alias, target) in self._name_ids:
+                continue
+
+            name_id = len(self._name_targets)
+            self._name_ids[(alias, target)] = name_id
+            grams = _trigrams(alias)
+            self._name_targets.append(target)
+            self._name_sizes.append(len(grams))
+            for gram in grams:
+                self._postings[gram].append(name_id)
+
+    def lookup(self, alias, kind=None):
+        """
+        Exact alias lookup; returns a list of (kind, key)
+        """
+        targets = self._aliases.get(normalize_name(alias), ())
+        return [target for target in targets if kind is None or target[0] == kind]
+
+    def resolve(self, query, kind=None, limit=5, min_score=DEFAULT_MIN_SCORE):
+        """
+        Rank candidate entities for a query
+
+        Returns up to limit (kind, key, score) tuples, best first. An exact
+        alias scores 1.0, or AMBIGUOUS_ALIAS_SCORE if several entities share
+        it; other candidates score their trigram Dice similarity.
+        """
+        query = normalize_name(query)
+        if not query:
+            return []
+
+        scores = {}
+
+        exact = [t for t in self._aliases.get(query, ()) if kind is None or t[0] == kind]
+        exact_score = 1.0 if len(exact) == 1 else AMBIGUOUS_ALIAS_SCORE
+        for target in exact:
+            scores[target] = exact_score
+
+        if len(exact) != 1:
+            grams = _trigrams(query)
+            overlap = defaultdict(int)
+            for gram in grams:
+                for name_id in self._postings.get(gram, ()):
+                    overlap[name_id] += 1
+
+            query_size = len(grams)
+            for name_id, shared in overlap.items():
+                target = self._name_targets[name_id]
+                if kind is not None and target[0] != kind:
+                    continue
+
+                score = 2.0 * shared / (query_size + self._name_sizes[name_id])
+                if score >= min_score and score > scores.get(target, 0.0):
+                    scores[target] = score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(target[0], target[1], round(score, 3)) for target, score in ranked[:limit]]
+
+    def best(self, query, kind=None, min_score=DEFAULT_MIN_SCORE):
+        """
+        Return the key of the best candidate of a kind, or None
+        """
+        candidates = self.resolve(query, kind=kind, limit=1, min_score=min_score)
+        return candidates[0][1] if candidates else None
+
+    def find_mentions(self, text, kind=None):
+        """
+        Find exact alias mentions in free text, longest first
+
+        Returns a list of (kind, key, alias) in order of appearance.
+        Ambiguous aliases and common words are skipped.
+        """
+        tokens = normalize_name(text).split()
+        mentions = []
+        position = 0
+
+        while position < len(tokens):
+            found = None
+            for size in range(min(MAX_MENTION_WORDS, len(tokens) - position), 0, -1):
+                alias = ' '.join(tokens[position:position + size])
+                if size == 1 and alias in COMMON_WORDS:
+                    continue
+
+                targets = [t for t in self._aliases.get(alias, ()) if kind is None or t[0] == kind]
+                if len(targets) == 1:
+                    found = (targets[0][0], targets[0][1], alias, size)
+                    break
+
+            if found:
+                mentions.append(found[:3])
+                position += found[3]
+            else:
+                position += 1
+
+        return mentions
@@ -335,17 +335,7 @@ async def chat_with_gemini(message, language='english'):
 
             Respond in a friendly, conversational manner with accurate and up-to-date information about IPL cricket.
             Keep your response concise (under 200 words).
-
-            IMPORTANT INSTRUCTIONS:
-            1. First, compose your response in Telugu language.
-            2. Then TRANSLITERATE your Telugu response into English letters (Roman script).
-            3. DO NOT translate to English - keep the Telugu language but write it using English letters.
-            4. For example, instead of "నమస్కారం" write "Namaskaram".
-            5. Make sure your entire response is in Telugu language but written with English letters.
-            6. Add the English transliteration, not the actual Telugu script.
-
-            Example format:
-            "Namaskaram! IPL gurinchi meeru adagina prashnaku samadhanam..." (NOT "నమస్కారం! IPL గురించి మీరు అడిగిన ప్రశ్నకు సమాధానం...")
+            Respond in Telugu, written in Telugu script.
             """
         else:
             prompt = f"""
@@ -0,0 +1,299 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+import numpy as np
+from ml.nlp_processor import detect_intent, detect_intents, process_texts
+
+logger = logging.getLogger(__name__)
+
+# Path of the trained weights file
+INTENT_MODEL_PATH = Path("data/intent_model.npz")
+
+# Hashed feature space and character n-gram sizes (over UTF-8 bytes)
+NUM_BUCKETS = 2 ** 16
+NGRAM_SIZES = (2, 3, 4)
+
+# Minimum classifier confidence to override the 'conversation' fallback
+CONFIDENCE_THRESHOLD = 0.6
+
+# Multiplier of the rolling n-gram hash
+_HASH_PRIME = np.uint32(16777619)
+
+def hash_ngrams(texts, num_buckets=NUM_BUCKETS, ngram_sizes=NGRAM_SIZES):
+    """
+    Hash the character n-grams of a batch of messages
+
+    Returns (rows, buckets, counts): the message index and feature bucket
+    of every n-gram occurrence, and the number of n-grams per message.
+    """
+    encoded = [f" {text} ".encode('utf-8') for text in process_texts(texts)]
+    count = len(encoded)
+    if not count:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+
+    # One byte buffer for the whole batch, with a zero byte between messages
+    data = np.frombuffer(b'\x00'.join(encoded), dtype=np.uint8)
+    lengths = np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64, count=count)
+    row_of_byte = np.repeat(np.arange(count), lengths)[:len(data)]
+    separators = np.concatenate(([0], np.cumsum(data == 0)))
+
+    all_rows = []
+    all_buckets = []
+    for size in ngram_sizes:
+        windows = len(data) - size + 1
+        if windows <= 0:
+            continue
+
+        # Drop n-grams that span two messages
+        valid = separators[size:size + windows] == separators[:windows]
+
+        hashes = np.full(windows, size, dtype=np.uint32)
+        for offset in range(size):
+            hashes = hashes * _HASH_PRIME ^ data[offset:offset + windows].astype(np.uint32)
+
+        hashes ^= hashes >> np.uint32(15)
+        all_rows.append(row_of_byte[:windows][valid])
+        all_buckets.append((hashes[valid] % np.uint32(num_buckets)).astype(np.int64))
+
+    rows = np.concatenate(all_rows) if all_rows else np.zeros(0, dtype=np.int64)
+    buckets = np.concatenate(all_buckets) if all_buckets else np.zeros(0, dtype=np.int64)
+    counts = np.bincount(rows, minlength=count)
+    return rows, buckets, counts
+
+class IntentClassifier:
+    """
+    Linear intent classifier over hashed character n-grams
+
+    A message is represented by the mean of its n-gram bucket weights, so
+    inference for a whole batch is a handful of vectorized bincounts.
+    """
+
+    def __init__(self, weights, bias, labels, num_buckets=NUM_BUCKETS, ngram_sizes=NGRAM_SIZES):
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.num_buckets = int(num_buckets)
+        self.ngram_sizes = tuple(int(n) for n in ngram_sizes)
+
+    def _scores(self, rows, buckets, counts, weights, bias):
+        """
+        Linear scores for hashed n-gram occurrences
+        """
+        occurrence_weight = 1.0 / np.maximum(counts, 1)[rows]
+        scores = np.empty((len(counts), len(self.labels)), dtype=np.float64)
+        for column in range(len(self.labels)):
+            scores[:, column] = np.bincount(
+                rows, weights=weights[buckets, column] * occurrence_weight, minlength=len(counts)
+            )
+        return scores + bias
+
+    def predict_proba(self, texts):
+        """
+        Class probabilities for a batch of messages, shape (len(texts), len(labels))
+        """
+        rows, buckets, counts = hash_ngrams(texts, self.num_buckets, self.ngram_sizes)
+        return _softmax(self._scores(rows, buckets, counts, self.weights, self.bias))
+
+    def predict(self, texts):
+        """
+        Predict (intent, confidence) for each message in a batch
+        """
+        probabilities = self.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        confidence = probabilities[np.arange(len(best)), best]
+        return [(self.labels[i], float(c)) for i, c in zip(best, confidence)]
+
+    @classmethod
+    def train(cls, texts, intents, epochs=60, learning_rate=0.5, l2=1e-6,
+              num_buckets=NUM_BUCKETS, ngram_sizes=NGRAM_SIZES):
+        """
+        Fit a softmax regression with full-batch Adagrad
+        """
+        texts = list(texts)
+        labels = sorted(set(intents))
+        label_ids = {label: i for i, label in enumerate(labels)}
+        targets = np.zeros((len(texts), len(labels)))
+        targets[np.arange(len(texts)), [label_ids[intent] for intent in intents]] = 1.0
+
+        weights = np.zeros((num_buckets, len(labels)))
+        bias = np.zeros(len(labels))
+        model = cls(weights, bias, labels, num_buckets, ngram_sizes)
+        weight_history = np.full_like(weights, 1e-8)
+        bias_history = np.full_like(bias, 1e-8)
+
+        rows, buckets, counts = hash_ngrams(texts, num_buckets, ngram_sizes)
+        occurrence_weight = 1.0 / np.maximum(counts, 1)[rows]
+
+        for epoch in range(epochs):
+            probabilities = _softmax(model._scores(rows, buckets, counts, weights, bias))
+            delta = (probabilities - targets) / len(texts)
+
+            weight_grad = np.empty_like(weights)
+            for column in range(len(labels)):
+                weight_grad[:, column] = np.bincount(
+                    buckets, weights=delta[rows, column] * occurrence_weight, minlength=num_buckets
+                )
+            weight_grad += l2 * weights
+            bias_grad = delta.sum(axis=0)
+
+            weight_history += weight_grad ** 2
+            bias_history += bias_grad ** 2
+            weights -= learning_rate * weight_grad / np.sqrt(weight_history)
+            bias -= learning_rate * bias_grad / np.sqrt(bias_history)
+
+        model.weights = weights.astype(np.float32)
+        model.bias = bias.astype(np.float32)
+        return model
+
+    def save(self, path=INTENT_MODEL_PATH):
+        """
+        Save the model as a compact weights file (float16 weights)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights.astype(np.float16),
+                bias=self.bias,
+                labels=np.array(self.labels),
+                num_buckets=self.num_buckets,
+                ngram_sizes=np.array(self.ngram_sizes),
+            )
+
+    @classmethod
+    def load(cls, path=INTENT_MODEL_PATH):
+        """
+        Load a model saved with save()
+        """
+        with np.load(path) as model_file:
+            return cls(
+                model_file['weights'],
+                model_file['bias'],
+                [str(label) for label in model_file['labels']],
+                int(model_file['num_buckets']),
+                model_file['ngram_sizes'],
+            )
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    exp = np.exp(scores)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+# Classifier loaded at startup, if a weights file exists
+intent_classifier = None
+
+def load_intent_classifier(path=INTENT_MODEL_PATH):
+    """
+    Load the intent classifier weights file, if present
+    """
+    global intent_classifier
+
+    try:
+        if Path(path).exists():
+            intent_classifier = IntentClassifier.load(path)
+            logger.info(f"Loaded intent classifier with labels {intent_classifier.labels}")
+        else:
+            logger.info("No intent classifier weights found, using keyword rules only")
+    except Exception as e:
+        logger.error(f"Error loading intent classifier: {e}")
+
+    return intent_classifier
+
+def classify_intents(texts, threshold=CONFIDENCE_THRESHOLD):
+    """
+    Route a batch of messages to (intent, confidence) pairs
+
+    Keyword rules win with confidence 1.0. Messages the rules leave as
+    'conversation' go to the classifier, whose answer is used when its
+    confidence reaches the threshold.
+    """
+    texts = list(texts)
+    results = [(intent, 1.0) for intent in detect_intents(texts)]
+
+    if intent_classifier is None:
+        return results
+
+    pending = [i for i, (intent, _) in enumerate(results) if intent == 'conversation']
+    if not pending:
+        return results
+
+    predictions = intent_classifier.predict([texts[i] for i in pending])
+    for i, (intent, confidence) in zip(pending, predictions):
+        results[i] = (intent if confidence >= threshold else 'conversation', confidence)
+
+    return results
+
+def classify_intent(text, threshold=CONFIDENCE_THRESHOLD):
+    """
+    Route a single message to an (intent, confidence) pair
+    """
+    return classify_intents([text], threshold)[0]
+
+def load_training_messages(db_client, limit=None):
+    """
+    Read user messages from the messages collection and label them with
+    the keyword rules (weak supervision)
+
+    Messages the rules leave as 'conversation' are skipped: those are the
+    ones the classifier is meant to relabel, so their examples come from
+    the hand-labelled file instead.
+    """
+    messages_collection = db_client.get_collection('messages')
+    cursor = messages_collection.find({}, {'text': 1, 'is_bot_response': 1})
+
+    texts = []
+    intents = []
+    for document in cursor:
+        if document.get('is_bot_response') or not document.get('text'):
+            continue
+        if document['text'].startswith('/'):
+            continue
+        intent = detect_intent(document['text'])
+        if intent == 'conversation':
+            continue
+        texts.append(document['text'])
+        intents.append(intent)
+        if limit and len(texts) >= limit:
+            break
+
+    return texts, intents
+
+def main():
+    """
+    Train the intent classifier offline and write the weights file
+    """
+    parser = argparse.ArgumentParser(description="Train the local intent classifier")
+    parser.add_argument('--labels', required=True,
+                        help="JSON-lines file of hand-labelled {\"text\", \"intent\"} examples")
+    parser.add_argument('--limit', type=int, help="Maximum number of logged messages to read")
+    parser.add_argument('--epochs', type=int, default=60)
+    parser.add_argument('--output', default=str(INTENT_MODEL_PATH))
+    args = parser.parse_args()
+
+    from utils.config import load_config
+    from database.mongo_client import MongoDBClient
+
+    texts, intents = load_training_messages(MongoDBClient(load_config()), args.limit)
+
+    with open(args.labels, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                example = json.loads(line)
+                texts.append(example['text'])
+                intents.append(example['intent'])
+
+    if 'conversation' not in intents:
+        raise SystemExit("Need hand-labelled 'conversation' examples to train")
+    if len(set(intents)) < 2:
+        raise SystemExit("Need examples of at least two intents to train")
+
+    model = IntentClassifier.train(texts, intents, epochs=args.epochs)
+    model.save(args.output)
+    logger.info(f"Trained on {len(texts)} messages, saved to {args.output}")
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
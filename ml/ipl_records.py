@@ -0,0 +1,147 @@
+import logging
+import json
+import sys
+from collections.abc import Mapping
+
+logger = logging.getLogger(__name__)
+
+# Values that mean "no value" in the sample data and Gemini answers
+_EMPTY = {'', 'N/A', 'None'}
+
+def _convert(value, kind):
+    """
+    Convert a raw field value to the field's type, interning strings
+    """
+    if value is None or (isinstance(value, str) and value.strip() in _EMPTY):
+        return None
+    if kind is str:
+        return sys.intern(str(value))
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        logger.error(f"Invalid {kind.__name__} field value: {value!r}")
+        return None
+
+class Record(Mapping):
+    """
+    Compact read-only IPL record with typed fields in __slots__
+
+    Reads like the dict it replaces (record['runs'], record.get('coach'),
+    dict(record)), but fields without a value are absent rather than stored,
+    numbers are ints and floats instead of strings, and repeated strings
+    (teams, roles, venues) are interned so records share them.
+    """
+
+    __slots__ = ()
+
+    # (field name, type) pairs, in display order
+    FIELDS = ()
+
+    def __init__(self, **values):
+        for name, kind in self.FIELDS:
+            object.__setattr__(self, name, _convert(values.get(name), kind))
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Build a record from a dict, ignoring unknown fields
+        """
+        if isinstance(data, cls):
+            return data
+        return cls(**data)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        raise KeyError(key)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            if getattr(self, name) is not None:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+class PlayerRecord(Record):
+    FIELDS = (
+        ('name', str), ('team', str), ('role', str), ('matches', int), ('runs', int),
+        ('wickets', int), ('average', float), ('strike_rate', float), ('economy', float),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+class TeamRecord(Record):
+    FIELDS = (
+        ('name', str), ('full_name', str), ('home_ground', str), ('captain', str), ('coach', str),
+        ('championships', int), ('matches_played', int), ('wins', int), ('losses', int),
+        ('win_percentage', float),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+class MatchRecord(Record):
+    FIELDS = (
+        ('team1', str), ('team2', str), ('date', str), ('season', int), ('venue', str),
+        ('winner', str), ('result', str),
+    )
+    __slots__ = tuple(name for name, _ in FIELDS)
+
+# Record type of each section of the IPL data
+RECORD_TYPES = {'players': PlayerRecord, 'teams': TeamRecord, 'matches': MatchRecord}
+
+def compact_ipl_data(ipl_data):
+    """
+    Convert the player, team and match dicts of IPL data to slotted records
+    """
+    return {
+        section: {sys.intern(key): record_type.from_dict(record) for key, record in ipl_data.get(section, {}).items()}
+        for section, record_type in RECORD_TYPES.items()
+    }
+
+def deep_sizeof(obj, seen=None):
+    """
+    Bytes held by an object and everything it references, counting shared
+    objects (such as interned strings) once
+    """
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif isinstance(obj, Record):
+        size += sum(deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__)
+    return size
+
+def memory_report(ipl_data):
+    """
+    Footprint of IPL data as slotted records vs plain dicts of strings
+
+    Returns section -> {'records', 'bytes_records', 'bytes_dicts'}. The
+    dict baseline stores every value as a separate string, as data parsed
+    from JSON or CSV does.
+    """
+    report = {}
+    for section in RECORD_TYPES:
+        records = compact_ipl_data({section: ipl_data.get(section, {})})[section]
+        dicts = json.loads(json.dumps({
+            key: {name: str(value) for name, value in record.items()}
+            for key, record in records.items()
+        }))
+        report[section] = {
+            'records': len(records),
+            'bytes_records': deep_sizeof(records),
+            'bytes_dicts': deep_sizeof(dicts),
+        }
+    return report
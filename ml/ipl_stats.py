@@ -1,6 +1,18 @@
 import logging
 import json
+import re
+import time
+import asyncio
 from pathlib import Path
+import numpy as np
+from ml.entity_resolver import TEAM_ALIASES, normalize_name
+from ml.ipl_store import IPLStore
+from ml.ipl_records import MatchRecord, PlayerRecord, TeamRecord
+from ml.stats_engine import compute_stats, compute_leaderboard, find_venue_id, LEADERBOARD_METRICS, PHASES
+from ml.stats_engine import aggregate_leaderboard, all_time_stats
+from utils.ipl_aggregates import PLAYER_METRICS
+from utils.ipl_dataset import RESULT_KINDS
+from utils.data_loader import load_ipl_data, set_data_status
 
 logger = logging.getLogger(__name__)
 
@@ -105,93 +117,633 @@ sample_ipl_data = {
 # Global variable to store IPL data
 ipl_processed_data = sample_ipl_data
 
-def get_ipl_stats():
+# Indexed data access service shared by the chat model and command handlers
+ipl_store = None
+
+# Full team name -> short code, e.g. 'chennai super kings' -> 'csk'
+TEAM_CODES = {name: code for code, names in TEAM_ALIASES.items() for name in names}
+
+def _player_role(balls_faced, balls_bowled):
+    """
+    Rough role from the balance of balls faced and bowled
+    """
+    if balls_bowled > 2 * balls_faced:
+        return 'Bowler'
+    if balls_faced > 2 * balls_bowled:
+        return 'Batsman'
+    return 'All-rounder'
+
+def dataset_ipl_data(dataset, base=sample_ipl_data):
     """
-    Get IPL statistics (simplified version)
+    Player, team and match records for the IPL store, from the dataset's aggregates
+
+    Teams keep the descriptive fields (captain, championships) of the base
+    data where it knows the franchise.
+    """
+    aggregates = dataset.aggregates
+
+    # Home ground: the venue a team most often hosted at (as team1), over
+    # the matches that record both
+    num_venues = max(len(dataset.venues), 1)
+    team1, venue = dataset.matches['team1'], dataset.matches['venue']
+    known = (team1 >= 0) & (venue >= 0)
+    hosted = np.bincount(
+        team1[known].astype(np.int64) * num_venues + venue[known],
+        minlength=len(dataset.teams) * num_venues,
+    ).reshape(len(dataset.teams), num_venues)
+
+    teams = {}
+    team_names = {}
+    for team_id, full_name in enumerate(dataset.teams):
+        line = aggregates.team_record(team_id)
+        if not line['played']:
+            continue
+
+        code = TEAM_CODES.get(normalize_name(full_name))
+        key = code or normalize_name(full_name)
+        record = dict(base['teams'].get(key, {}))
+        record.setdefault('name', code.upper() if code else full_name)
+        record['full_name'] = full_name
+        if 'home_ground' not in record and hosted[team_id].any():
+            record['home_ground'] = dataset.venues[int(hosted[team_id].argmax())]
+        record.update({
+            'matches_played': line['played'],
+            'wins': line['won'],
+            'losses': line['lost'],
+            'win_percentage': line['win_percentage'],
+        })
+        teams[key] = TeamRecord.from_dict(record)
+        team_names[team_id] = record['name']
+
+    # Career totals once for every player, then one record per player
+    totals = {metric: aggregates.player_totals(metric) for metric in PLAYER_METRICS}
+    players = {}
+    for player_id in np.flatnonzero(totals['matches']):
+        runs, outs = int(totals['runs'][player_id]), int(totals['outs'][player_id])
+        balls_faced, balls_bowled = int(totals['balls_faced'][player_id]), int(totals['balls_bowled'][player_id])
+        conceded = int(totals['runs_conceded'][player_id])
+        name = dataset.players[player_id]
+
+        players[normalize_name(name)] = PlayerRecord(
+            name=name,
+            team=team_names.get(int(totals['team'][player_id]), 'N/A'),
+            role=_player_role(balls_faced, balls_bowled),
+            matches=int(totals['matches'][player_id]),
+            runs=runs,
+            wickets=int(totals['wickets'][player_id]),
+            average=round(runs / outs, 2) if outs else None,
+            strike_rate=round(runs * 100 / balls_faced, 2) if balls_faced else None,
+            economy=round(conceded * 6 / balls_bowled, 2) if balls_bowled else None,
+        )
+
+    # One record per match, keyed by the Kaggle match id
+    columns = dataset.matches
+    matches = {}
+    for row in range(dataset.num_matches):
+        team1 = team_names.get(int(columns['team1'][row]), 'N/A')
+        team2 = team_names.get(int(columns['team2'][row]), 'N/A')
+        winner = team_names.get(int(columns['winner'][row]))
+        result = RESULT_KINDS[columns['result'][row]]
+        margin = int(columns['result_margin'][row])
+
+        if winner and result in ('runs', 'wickets') and margin > 0:
+            result_text = f"{winner} won by {margin} {result}"
+        elif winner and result == 'tie':
+            result_text = f"Match tied ({winner} won the super over)"
+        elif winner:
+            result_text = f"{winner} won"
+        else:
+            result_text = 'Match tied' if result == 'tie' else 'No result'
+
+        venue = int(columns['venue'][row])
+        matches[str(int(columns['id'][row]))] = MatchRecord(
+            team1=team1,
+            team2=team2,
+            date=str(columns['date'][row]),
+            season=int(columns['season'][row]),
+            venue=dataset.venues[venue] if venue >= 0 else 'N/A',
+            winner=winner,
+            result=result_text,
+        )
+
+    return {'teams': teams, 'players': players, 'matches': matches}
+
+def build_ipl_store(ipl_data=None, dataset=None):
+    """
+    Build the indexed IPL store, replacing any previous one
+
+    dataset is the columnar ball-by-ball IPLDataset, if one was loaded.
     """
-    global ipl_processed_data
+    global ipl_processed_data, ipl_store
 
-    # Calculate statistics
-    stats = {
-        'total_matches': 60,  # Placeholder value
-        'most_wins_team': 'CSK',
-        'most_wins_count': 30,
-        'highest_score_team': 'RCB',
-        'highest_score': 263,
-        'most_runs_player': 'Virat Kohli',
-        'most_runs': 6624,
-        'most_wickets_player': 'Jasprit Bumrah',
-        'most_wickets': 145
+    if ipl_data is None and dataset is not None and dataset.aggregates is not None:
+        ipl_data = dataset_ipl_data(dataset)
+
+    if ipl_data is None:
+        ipl_data = ipl_processed_data
+
+    version = ipl_store.version + 1 if ipl_store is not None else 1
+    store = IPLStore(ipl_data, version, dataset)
+
+    # Swap the finished store in; requests holding the old one finish on it.
+    # Keep the store's compact records rather than the dicts it was built from.
+    ipl_processed_data, ipl_store = store.data, store
+    return store
+
+# Serializes reloads of the IPL data
+_reload_lock = asyncio.Lock()
+
+async def reload_ipl_store():
+    """
+    Load the IPL data and build a new store off the event loop, then swap it in
+
+    The new store gets the next data version, so memoized stats and cached
+    responses of the old version are no longer served. Cache files are
+    replaced by rename and season partitions are views of the mapped
+    deliveries, so an old store still in use keeps reading its own data.
+    Returns (store, seconds taken), or None if a reload is already running.
+    """
+    if _reload_lock.locked():
+        return None
+
+    async with _reload_lock:
+        started = time.monotonic()
+        dataset = await load_ipl_data()
+        store = await asyncio.to_thread(build_ipl_store, dataset=dataset)
+        seconds = time.monotonic() - started
+
+        set_data_status(
+            'ipl', 'ready',
+            source='dataset' if store.dataset is not None else 'sample',
+            version=store.version,
+            matches=len(store.matches),
+            load_seconds=round(seconds, 2),
+        )
+        logger.info(f"IPL data version {store.version} ready in {seconds:.1f}s")
+        return store, seconds
+
+def get_ipl_store():
+    """
+    Get the indexed IPL store, building it on first use
+    """
+    if ipl_store is None:
+        return build_ipl_store()
+    return ipl_store
+
+# Memoized statistics: (data version, season, team id, venue id) -> stats
+_stats_cache = {}
+
+# Memoized leaderboards: (data version, metric, season, team id, venue id, phase, k) -> rows
+_leaderboard_cache = {}
+
+# Default and maximum leaderboard sizes
+LEADERBOARD_SIZE = 10
+MAX_LEADERBOARD_SIZE = 25
+
+# Display names of the leaderboard metrics
+LEADERBOARD_LABELS = {
+    'runs': 'Runs',
+    'sixes': 'Sixes',
+    'fours': 'Fours',
+    'average': 'Batting Average',
+    'strike_rate': 'Strike Rate',
+    'wickets': 'Wickets',
+    'economy': 'Economy',
+}
+
+# Words naming a leaderboard metric, checked in order
+LEADERBOARD_WORDS = (
+    ('economy', re.compile(r'\beconom')),
+    ('strike_rate', re.compile(r'\bstrike\s*rate|\bsr\b')),
+    ('average', re.compile(r'\baverage|\bavg\b')),
+    ('sixes', re.compile(r'\bsix(?:es)?\b|\b6s\b')),
+    ('fours', re.compile(r'\bfours?\b|\b4s\b|\bboundar')),
+    ('wickets', re.compile(r'\bwicket|\bbowlers?\b|\bwkts?\b')),
+    ('runs', re.compile(r'\bruns?\b|\bscorers?\b|\bbat(?:ters?|sm[ae]n)\b')),
+)
+
+# Words of a leaderboard question that never name a venue
+LEADERBOARD_FILLER = ('top', 'most', 'best', 'highest', 'leading', 'the', 'in', 'for', 'of', 'over', 'overs', 'phase')
+
+# Parts of a win-probability question ("CSK need 50 off 24 with 6 wickets
+# in hand", "chasing 180, 130/4 after 16 overs", "MI 120/3 after 12 overs")
+WIN_PROBABILITY_WORDS = {
+    'needed': re.compile(r'\bneed(?:s|ing)?\s+(\d+)|\b(\d+)\s*(?:runs?\s+)?(?:needed|required|more|to win)\b'),
+    'remaining': re.compile(r'\b(?:off|from|in)\s+(\d+(?:\.\d)?)\s*(balls?|overs?)?'),
+    'target': re.compile(r'\bchasing\s+(\d+)|\btarget\s+(?:of\s+)?(\d+)'),
+    'score': re.compile(r'\b(\d+)\s*(?:/|-|for)\s*(\d+)\b'),
+    'bowled': re.compile(r'\bafter\s+(\d+(?:\.\d)?)\s*overs?'),
+    'in_hand': re.compile(r'\b(\d+)\s*(?:wickets?|wkts?)\s*(?:in hand|left|remaining)'),
+    'down': re.compile(r'\b(\d+)\s*(?:wickets?\s+|wkts?\s+)?down\b'),
+}
+
+def _memoized(cache, key, compute):
+    """
+    Get a value from a cache keyed by (data version, ...), computing it on a miss
+    """
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cached_version = next(iter(cache))[0] if cache else None
+
+        # Entries of an older data version are never read again; a request
+        # still finishing on an older version does not evict the new ones
+        if cached_version is not None and cached_version < key[0]:
+            cache.clear()
+        if cached_version is None or cached_version <= key[0]:
+            cache[key] = value
+
+    return value
+
+def _sample_stats(store):
+    """
+    Statistics from the per-player sample records, when no dataset is loaded
+    """
+    players = list(store.players.values())
+    top_scorer = max(players, key=lambda p: int(p.get('runs', 0)), default={})
+    top_bowler = max(players, key=lambda p: int(p.get('wickets', 0)), default={})
+
+    return {
+        'total_matches': len(store.matches),
+        'most_runs_player': top_scorer.get('name'),
+        'most_runs': top_scorer.get('runs'),
+        'most_wickets_player': top_bowler.get('name'),
+        'most_wickets': top_bowler.get('wickets'),
     }
 
-    return stats
+def resolve_dataset_team(store, query):
+    """
+    Resolve a team name, code or nickname to a team id in the loaded dataset
+    """
+    dataset = store.dataset
+    team_id = dataset.team_id(query)
+    if team_id < 0:
+        key = store.find_team_key(query)
+        if key is not None:
+            team_id = dataset.team_id(store.teams[key].get('full_name', ''))
+    return team_id
 
-def search_ipl_data(data_type, query):
+def _season_source(dataset, season):
+    """
+    The dataset to scan for a query: one season's partition when the query
+    is for a single season and partitions are loaded, else the whole dataset
+    """
+    if season is not None and dataset.partitions is not None and season in dataset.partitions:
+        return dataset.partitions.view(season)
+    return dataset
+
+def _compute_stats(dataset, season, team_id, venue_id):
     """
-    Search IPL data for a specific query (simplified version)
+    Headline statistics from the cheapest source that can answer them
     """
-    global ipl_processed_data
+    if season is None and team_id is None and venue_id is None:
+        stats = all_time_stats(dataset)
+        if stats is not None:
+            return stats
+    return compute_stats(_season_source(dataset, season), season, team_id, venue_id)
 
-    query = query.lower()
+def get_ipl_stats(season=None, team=None, venue=None):
+    """
+    Get headline IPL statistics, optionally for one season, team or venue
 
-    if data_type == 'player':
-        # Search for player
-        if query in ipl_processed_data['players']:
-            return ipl_processed_data['players'][query]
+    Computed from the ball-by-ball dataset and memoized per data version.
+    All-time figures come from the aggregates and partition summaries, and
+    one season's from its partition only. Returns None if a team or venue
+    filter does not resolve.
+    """
+    store = get_ipl_store()
+    dataset = store.dataset
 
-        # Try partial match
-        for player_id, player_data in ipl_processed_data['players'].items():
-            if query in player_id:
-                return player_data
+    if dataset is None:
+        return _sample_stats(store) if season is None and team is None and venue is None else None
 
-        # Return a generic player if not found
-        return {
-            'name': query.title(),
-            'team': 'Unknown Team',
-            'role': 'Player',
-            'matches': '0',
-            'runs': '0',
-            'wickets': '0'
-        }
+    team_id = resolve_dataset_team(store, team) if team else None
+    venue_id = find_venue_id(dataset, venue) if venue else None
+    if (team_id is not None and team_id < 0) or (venue_id is not None and venue_id < 0):
+        return None
 
-    elif data_type == 'team':
-        # Search for team
-        for team_id, team_data in ipl_processed_data['teams'].items():
-            if query == team_id or query == team_data['name'].lower() or query in team_data['full_name'].lower():
-                return team_data
-
-        # Return a generic team if not found
-        return {
-            'name': query.upper(),
-            'full_name': f'{query.title()} Cricket Team',
-            'home_ground': 'Unknown Stadium',
-            'captain': 'Unknown Captain',
-            'championships': '0'
-        }
+    return _memoized(_stats_cache, (store.version, season, team_id, venue_id),
+                     lambda: _compute_stats(dataset, season, team_id, venue_id))
 
-    elif data_type == 'match':
-        # Search for match
-        if query in ipl_processed_data['matches']:
-            return ipl_processed_data['matches'][query]
-
-        # Try different combinations
-        teams = query.split(' vs ')
-        if len(teams) == 2:
-            team1, team2 = teams
-
-            # Try both orders
-            for match_id, match_data in ipl_processed_data['matches'].items():
-                if ((team1.lower() in match_data['team1'].lower() and team2.lower() in match_data['team2'].lower()) or
-                    (team1.lower() in match_data['team2'].lower() and team2.lower() in match_data['team1'].lower())):
-                    return match_data
-
-        # Return a generic match if not found
-        return {
-            'team1': teams[0].upper() if len(teams) > 0 else 'Team A',
-            'team2': teams[1].upper() if len(teams) > 1 else 'Team B',
-            'date': '2023-04-15',
-            'venue': 'IPL Stadium',
-            'result': 'Match scheduled'
-        }
+def _sample_leaderboard(store, metric, k):
+    """
+    Runs and wickets leaderboards from the sample records
+    """
+    players = [p for p in store.players.values() if int(p.get(metric, 0))]
+    players.sort(key=lambda p: int(p.get(metric, 0)), reverse=True)
+    return [{'name': p['name'], 'value': int(p[metric])} for p in players[:k]]
+
+def get_leaderboard(metric, season=None, team=None, venue=None, phase=None, k=LEADERBOARD_SIZE):
+    """
+    Top k players for a metric, optionally for one season, team, venue and phase
+
+    Returns a list of {'name', 'value'} rows, best first, memoized per data
+    version. Returns None for an unknown metric or phase, a filter that does
+    not resolve, or a query the loaded data cannot answer.
+    """
+    if metric not in LEADERBOARD_METRICS or (phase is not None and phase not in PHASES):
+        return None
+
+    store = get_ipl_store()
+    dataset = store.dataset
+    k = max(1, min(int(k), MAX_LEADERBOARD_SIZE))
+
+    if dataset is None:
+        if metric in ('runs', 'wickets') and season is None and team is None and venue is None and phase is None:
+            return _sample_leaderboard(store, metric, k)
+        return None
+
+    team_id = resolve_dataset_team(store, team) if team else None
+    venue_id = find_venue_id(dataset, venue) if venue else None
+    if (team_id is not None and team_id < 0) or (venue_id is not None and venue_id < 0):
+        return None
+
+    def compute():
+        if dataset.aggregates is not None and team_id is None and venue_id is None and phase is None:
+            rows = aggregate_leaderboard(dataset.aggregates, metric, season, k)
+        else:
+            rows = compute_leaderboard(_season_source(dataset, season), metric, season, team_id, venue_id, phase, k)
 
-    return None
+        rate = LEADERBOARD_METRICS[metric][2]
+        return [
+            {'name': dataset.players[player], 'value': round(value, 2) if rate else int(value)}
+            for player, value in rows
+        ]
+
+    return _memoized(_leaderboard_cache, (store.version, metric, season, team_id, venue_id, phase, k), compute)
+
+def _dataset_player_id(store, query):
+    """
+    Resolve a player name, nickname or misspelling to a player id in the dataset
+    """
+    dataset = store.dataset
+    player_id = dataset.player_id(query)
+    if player_id < 0:
+        key = store.find_player_key(query)
+        if key is not None:
+            player_id = dataset.player_id(store.players[key].get('name', ''))
+    return player_id
+
+def _rate(numerator, denominator, scale=1):
+    return round(numerator * scale / denominator, 2) if denominator else None
+
+def get_matchup(batter, bowler):
+    """
+    How a batter has fared against a bowler, or None
+
+    Returns runs, balls, dismissals, fours, sixes, dots, strike rate and
+    average from the precomputed matchup index (a dict lookup). None if
+    either name does not resolve, no matchup index is loaded or the two
+    never faced each other.
+    """
+    store = get_ipl_store()
+    dataset = store.dataset
+    if dataset is None or dataset.matchups is None:
+        return None
+
+    batter_id, bowler_id = _dataset_player_id(store, batter), _dataset_player_id(store, bowler)
+    if batter_id < 0 or bowler_id < 0:
+        return None
+
+    record = dataset.matchups.matchup(batter_id, bowler_id)
+    if record is None:
+        return None
+
+    return {
+        'batter': dataset.players[batter_id],
+        'bowler': dataset.players[bowler_id],
+        **record,
+        'strike_rate': _rate(record['runs'], record['balls'], 100),
+        'average': _rate(record['runs'], record['dismissals']),
+    }
+
+def get_phase_split(player):
+    """
+    A player's batting and bowling in the powerplay, middle and death overs
+
+    Returns {'name', 'phases': {phase: counters with strike_rate, average and
+    economy}}, or None if the name does not resolve or no index is loaded.
+    """
+    store = get_ipl_store()
+    dataset = store.dataset
+    if dataset is None or dataset.matchups is None:
+        return None
+
+    player_id = _dataset_player_id(store, player)
+    if player_id < 0:
+        return None
+
+    phases = dataset.matchups.phase_split(player_id)
+    for line in phases.values():
+        line['strike_rate'] = _rate(line['runs'], line['balls_faced'], 100)
+        line['average'] = _rate(line['runs'], line['outs'])
+        line['economy'] = _rate(line['runs_conceded'], line['balls_bowled'], 6)
+
+    return {'name': dataset.players[player_id], 'phases': phases}
+
+def leaderboard_values(query, rows):
+    """
+    Template values for a leaderboard query and its rows
+    """
+    scope = [str(query[field]) for field in ('season', 'team', 'venue') if query.get(field)]
+    if query.get('phase'):
+        scope.append(f"{query['phase']} overs")
+
+    title = f"Top {len(rows)}: {LEADERBOARD_LABELS[query['metric']]}"
+    return {
+        'title': f"{title} ({', '.join(scope)})" if scope else title,
+        'rows': '\n'.join(f"{rank}. {row['name']} - {row['value']}" for rank, row in enumerate(rows, 1)),
+    }
+
+def phase_split_values(split):
+    """
+    Template values for a player's phase split
+    """
+    batting, bowling = [], []
+    for phase, line in split['phases'].items():
+        if line['balls_faced']:
+            batting.append(
+                f"• {phase.title()}: {line['runs']} runs off {line['balls_faced']} balls, "
+                f"SR {line['strike_rate']}, {line['outs']} outs"
+            )
+        if line['balls_bowled']:
+            bowling.append(
+                f"• {phase.title()}: {line['wickets']} wickets, {line['runs_conceded']} runs "
+                f"in {line['balls_bowled']} balls, econ {line['economy']}"
+            )
+    return {
+        'name': split['name'],
+        'batting': '\n'.join(batting) or None,
+        'bowling': '\n'.join(bowling) or None,
+    }
+
+def _overs_to_balls(overs):
+    """
+    Balls in an overs figure ("3.2" -> 20)
+    """
+    whole, _, balls = overs.partition('.')
+    return int(whole) * 6 + int(balls or 0)
+
+def get_win_probability(innings, balls_remaining, runs, wickets_in_hand=None):
+    """
+    Win probability of the batting side from the precomputed table, or None
+    if no table is loaded
+
+    runs are the runs scored so far in the first innings and the runs still
+    needed in the second.
+    """
+    dataset = get_ipl_store().dataset
+    if dataset is None or dataset.win_probability is None:
+        return None
+    return dataset.win_probability.lookup(innings, balls_remaining, runs, wickets_in_hand)
+
+def parse_win_probability_query(store, text):
+    """
+    Parse a match situation ("CSK need 50 off 24", "chasing 180, 130/4 after
+    16 overs", "MI 120/3 after 12 overs")
+
+    Returns a dict with team, innings, balls_remaining, runs and
+    wickets_in_hand (None when not given), or None if the text does not
+    describe a situation.
+    """
+    lowered = text.lower()
+    found = {name: pattern.search(lowered) for name, pattern in WIN_PROBABILITY_WORDS.items()}
+
+    def number(name):
+        return next(int(group) for group in found[name].groups() if group is not None)
+
+    query = {'team': None, 'innings': 2, 'balls_remaining': None, 'runs': None, 'wickets_in_hand': None}
+
+    if found['remaining']:
+        overs, unit = found['remaining'].groups()
+        if unit and unit.startswith('over'):
+            query['balls_remaining'] = _overs_to_balls(overs)
+        elif '.' not in overs:
+            query['balls_remaining'] = int(overs)
+    if found['bowled'] and query['balls_remaining'] is None:
+        query['balls_remaining'] = max(120 - _overs_to_balls(found['bowled'].group(1)), 0)
+
+    score = found['score']
+    if found['needed']:
+        query['runs'] = number('needed')
+    elif score and found['target']:
+        query['runs'] = number('target') - int(score.group(1))
+    elif score and found['bowled']:
+        query['innings'], query['runs'] = 1, int(score.group(1))
+
+    if query['runs'] is None or query['balls_remaining'] is None:
+        return None
+
+    if found['in_hand']:
+        query['wickets_in_hand'] = min(number('in_hand'), 10)
+    elif found['down']:
+        query['wickets_in_hand'] = max(10 - number('down'), 0)
+    elif score:
+        query['wickets_in_hand'] = max(10 - int(score.group(2)), 0)
+
+    # "CSK's chances" names CSK
+    mentions = store.resolver.find_mentions(re.sub(r"['’]s\b", '', text), 'team')
+    if mentions:
+        query['team'] = store.teams[mentions[0][1]].get('name')
+
+    return query
+
+def win_probability_values(query, probability):
+    """
+    Template values for a match situation and its win probability
+    """
+    balls = query['balls_remaining']
+    remaining = f"{balls} balls" if balls % 6 else f"{balls // 6} overs"
+    if query['innings'] == 2:
+        situation = f"Needing {query['runs']} off {remaining}"
+    else:
+        situation = f"{query['runs']} runs batting first with {remaining} left"
+    if query['wickets_in_hand'] is not None:
+        situation += f", {query['wickets_in_hand']} wickets in hand"
+
+    return {
+        'team': query['team'] or 'Batting side',
+        'probability': round(probability * 100),
+        'situation': situation,
+    }
+
+def parse_leaderboard_query(store, text):
+    """
+    Parse a leaderboard question ("top 10 run scorers 2023", "best economy at
+    Wankhede in the death overs", "most sixes for MI")
+
+    Returns a dict with metric, season, team, venue, phase and k, or None if
+    the text names no metric or names a player (a question about that
+    player, such as "virat kohli the best batsman"). Words left over after
+    the metric, numbers, phase and team are tried as a venue; a venue named
+    after 'at' that the dataset does not know is returned as given, and
+    get_leaderboard finds no rows for it.
+    """
+    lowered = text.lower()
+    metric = next((name for name, pattern in LEADERBOARD_WORDS if pattern.search(lowered)), None)
+    if metric is None or store.resolver.find_mentions(text, 'player'):
+        return None
+
+    query = {'metric': metric, 'season': None, 'team': None, 'venue': None, 'phase': None, 'k': LEADERBOARD_SIZE}
+
+    for number in re.findall(r'\b\d+\b', lowered):
+        if len(number) == 4:
+            query['season'] = int(number)
+        else:
+            query['k'] = int(number)
+
+    query['phase'] = next((phase for phase in PHASES if phase in lowered), None)
+    if query['phase'] is None and 'power play' in lowered:
+        query['phase'] = 'powerplay'
+
+    mentions = store.resolver.find_mentions(text, 'team')
+    if mentions:
+        query['team'] = store.teams[mentions[0][1]].get('name')
+
+    if store.dataset is not None:
+        # A venue is named after 'at', or is what /top arguments leave over
+        used = set(LEADERBOARD_FILLER) | set(PHASES)
+        used.update(word for _, _, alias in mentions for word in alias.split())
+        place = re.search(r'\bat\s+(.+)', lowered)
+        if place:
+            candidate = normalize_name(place.group(1))
+        else:
+            candidate = ' '.join(
+                word for word in normalize_name(text).split()
+                if word not in used and not word.isdigit()
+                and not any(pattern.search(word) for _, pattern in LEADERBOARD_WORDS)
+            )
+
+        words = candidate.split()
+        # Longest prefix that names a venue ("wankhede in 2023" -> "wankhede")
+        for size in range(len(words), 0, -1):
+            phrase = ' '.join(words[:size])
+            if find_venue_id(store.dataset, phrase) >= 0:
+                query['venue'] = phrase
+                break
+
+        if place and query['venue'] is None:
+            # A venue the dataset does not know is kept, so the leaderboard
+            # comes back empty rather than covering every venue ("at the
+            # death" names a phase, not a venue)
+            unknown = [word for word in words if word not in used and not word.isdigit()]
+            if unknown:
+                query['venue'] = ' '.join(unknown)
+
+    return query
+
+def get_entity_resolver():
+    """
+    Get the entity resolver over the loaded IPL data
+    """
+    return get_ipl_store().resolver
+
+def search_ipl_data(data_type, query):
+    """
+    Search IPL data for a specific query
+
+    Player and team names are resolved through the alias table and trigram
+    index, so nicknames and misspellings find local records. Returns None
+    when nothing matches.
+    """
+    return get_ipl_store().search(data_type, query)
@@ -0,0 +1,212 @@
+import logging
+from collections import Counter, defaultdict
+from ml.entity_resolver import EntityResolver, normalize_name
+from ml.ipl_records import compact_ipl_data
+
+logger = logging.getLogger(__name__)
+
+def fixture_key(team1, team2):
+    """
+    Order-independent key for a pair of team codes, e.g. 'csk-mi'
+    """
+    return '-'.join(sorted((normalize_name(team1), normalize_name(team2))))
+
+def match_winner(match):
+    """
+    Winning team of a match record ('CSK won by 7 wickets' -> 'CSK'), or None
+    """
+    if match.get('winner'):
+        return match['winner']
+    result = match.get('result', '')
+    return result.split(' won')[0] if ' won' in result else None
+
+class IPLStore:
+    """
+    Indexed, read-only access to IPL players, teams and matches
+
+    All indexes are built once when the store is created; lookups are
+    dictionary reads plus entity resolution for free-text names. version
+    identifies the data the store was built from, for caches keyed on it.
+    dataset is the columnar ball-by-ball IPLDataset, when one is loaded.
+    Records are held as slotted PlayerRecord, TeamRecord and MatchRecord
+    objects, which read like the dicts they are built from.
+    """
+
+    def __init__(self, ipl_data, version=0, dataset=None):
+        self.data = compact_ipl_data(ipl_data)
+        self.version = version
+        self.dataset = dataset
+        self.players = self.data['players']
+        self.teams = self.data['teams']
+        self.matches = self.data['matches']
+
+        self.resolver = EntityResolver.from_ipl_data(self.data)
+
+        # Normalized team code / full name -> team key
+        self.team_keys = {}
+        for key, team in self.teams.items():
+            for name in (key, team.get('name'), team.get('full_name')):
+                if name:
+                    self.team_keys[normalize_name(name)] = key
+
+        # Normalized player name -> player key
+        self.players_by_name = {}
+        for key, player in self.players.items():
+            self.players_by_name[normalize_name(player.get('name', key))] = key
+
+        # Team key -> player keys
+        self.players_by_team = defaultdict(list)
+        for key, player in self.players.items():
+            team_key = self.team_keys.get(normalize_name(player.get('team', '')))
+            if team_key:
+                self.players_by_team[team_key].append(key)
+
+        # Fixture key, venue and season -> match keys, most recent first;
+        # fixture key -> wins per team
+        self.matches_by_fixture = defaultdict(list)
+        self.fixture_wins = defaultdict(Counter)
+        self.matches_by_venue = defaultdict(list)
+        self.matches_by_season = defaultdict(list)
+        recent_first = sorted(self.matches, key=lambda k: self.matches[k].get('date', ''), reverse=True)
+        for key in recent_first:
+            match = self.matches[key]
+            fixture = fixture_key(match['team1'], match['team2'])
+            self.matches_by_fixture[fixture].append(key)
+            winner = match_winner(match)
+            if winner:
+                self.fixture_wins[fixture][normalize_name(winner)] += 1
+            if match.get('venue'):
+                self.matches_by_venue[normalize_name(match['venue'])].append(key)
+            season = match.get('season') or match.get('date', '')[:4]
+            if season:
+                self.matches_by_season[int(season)].append(key)
+
+        logger.info(
+            f"IPL store ready: {len(self.players)} players, {len(self.teams)} teams, "
+            f"{len(self.matches)} matches"
+        )
+
+    def find_player_key(self, query):
+        """
+        Resolve a player name, nickname or misspelling to a player key
+        """
+        key = self.players_by_name.get(normalize_name(query))
+        if key is None and query in self.players:
+            key = query
+        return key if key is not None else self.resolver.best(query, 'player')
+
+    def find_team_key(self, query):
+        """
+        Resolve a team code, name, city or misspelling to a team key
+        """
+        key = self.team_keys.get(normalize_name(query))
+        return key if key is not None else self.resolver.best(query, 'team')
+
+    def get_player(self, query):
+        """
+        Get a player record, or None if the name does not resolve
+        """
+        key = self.find_player_key(query)
+        return self.players[key] if key is not None else None
+
+    def get_team(self, query):
+        """
+        Get a team record, or None if the name does not resolve
+        """
+        key = self.find_team_key(query)
+        return self.teams[key] if key is not None else None
+
+    def get_team_players(self, query):
+        """
+        Get the player records of a team
+        """
+        key = self.find_team_key(query)
+        if key is None:
+            return []
+        return [self.players[player_key] for player_key in self.players_by_team.get(key, ())]
+
+    def find_fixture(self, team1, team2):
+        """
+        Resolve two team names to their fixture key, or None
+        """
+        keys = [self.find_team_key(team1), self.find_team_key(team2)]
+        if None in keys or keys[0] == keys[1]:
+            return None
+
+        codes = [self.teams[key].get('name', key) for key in keys]
+        return fixture_key(*codes)
+
+    def find_match_key(self, team1, team2):
+        """
+        Resolve two team names to the key of their most recent match
+        """
+        match_keys = self.matches_by_fixture.get(self.find_fixture(team1, team2))
+        return match_keys[0] if match_keys else None
+
+    def get_matches(self, team1, team2, limit=None):
+        """
+        Get the matches between two teams, most recent first
+        """
+        match_keys = self.matches_by_fixture.get(self.find_fixture(team1, team2), ())
+        return [self.matches[k] for k in match_keys[:limit]]
+
+    def get_venue_matches(self, venue, limit=None):
+        """
+        Get the matches played at a venue, most recent first
+        """
+        return [self.matches[k] for k in self.matches_by_venue.get(normalize_name(venue), ())[:limit]]
+
+    def get_season_matches(self, season, limit=None):
+        """
+        Get the matches of a season, most recent first
+        """
+        return [self.matches[k] for k in self.matches_by_season.get(int(season), ())[:limit]]
+
+    def head_to_head(self, team1, team2, recent=5):
+        """
+        Head-to-head record of two teams, or None if they never met
+
+        Returns the team names, matches played, wins of each side, matches
+        without a winner and the most recent meetings.
+        """
+        fixture = self.find_fixture(team1, team2)
+        match_keys = self.matches_by_fixture.get(fixture)
+        if not match_keys:
+            return None
+
+        names = [self.teams[self.find_team_key(team)].get('name') for team in (team1, team2)]
+        wins = [self.fixture_wins[fixture][normalize_name(name)] for name in names]
+
+        return {
+            'team1': names[0],
+            'team2': names[1],
+            'played': len(match_keys),
+            'team1_wins': wins[0],
+            'team2_wins': wins[1],
+            'no_result': len(match_keys) - sum(wins),
+            'recent': [self.matches[k] for k in match_keys[:recent]],
+        }
+
+    def get_match(self, team1, team2):
+        """
+        Get the most recent match between two teams, or None
+        """
+        matches = self.get_matches(team1, team2)
+        return matches[0] if matches else None
+
+    def search(self, data_type, query):
+        """
+        Look up a 'player', 'team' or 'match' ("<team1> vs <team2>") by text
+        """
+        if data_type == 'player':
+            return self.get_player(query)
+
+        elif data_type == 'team':
+            return self.get_team(query)
+
+        elif data_type == 'match':
+            teams = query.split(' vs ')
+            if len(teams) == 2:
+                return self.get_match(teams[0], teams[1])
+
+        return None
@@ -0,0 +1,104 @@
+# Seed text for the character n-gram language profiles used by
+# ml.nlp_processor.detect_language. Both samples are lowercase chat-style
+# messages about cricket and everyday conversation, so the profiles learn
+# how the languages differ rather than how the topics differ.
+
+ENGLISH_SAMPLE = """
+hello how are you doing today
+hi there what is going on
+good morning have a nice day
+what is the score right now
+who won the match yesterday
+tell me about virat kohli
+how many runs did he score this season
+which team has won the most titles
+when is the next match for chennai
+i think mumbai will win tonight
+that was an amazing innings
+the bowling was really poor in the death overs
+can you show me the points table
+who is the captain of the team
+what are the chances of them qualifying
+please tell me the latest news
+thank you so much for the help
+see you later bye
+i do not understand what you mean
+that is not correct please check again
+who has taken the most wickets
+what a brilliant catch that was
+the pitch looks good for batting
+they should have chosen to bowl first
+my favourite player is ms dhoni
+is he playing in the next game
+why did they drop him from the side
+where is the final being played
+how much did the franchise pay for him
+the weather might spoil the game tonight
+i love watching cricket with my friends
+can you tell me something interesting
+what do you think about the new rules
+which bowler has the best economy
+do you know who hit the most sixes
+this is the best season ever
+they need fifty runs from thirty balls
+what time does the game start
+it was a close finish in the last over
+sorry i was busy watching the match
+yes that sounds great
+no i do not agree with that
+okay let me know when it starts
+what happened in the super over
+how are the openers doing
+he is in great form these days
+"""
+
+TELUGU_ROMAN_SAMPLE = """
+namaskaram meeru ela unnaru
+nenu baagunnanu meeru ela unnaru
+em chestunnaru ippudu
+ee roju match evaru gelicharu
+ninna match lo evaru gelicharu
+virat kohli gurinchi cheppandi
+ee season lo atanu enni parugulu chesadu
+e team ekkuva titles gelichindi
+chennai next match eppudu undi
+ee roju mumbai gelustundi ani anukuntunnanu
+aa innings chala adbhutanga undi
+death overs lo bowling asalu baagaledu
+points table chupinchandi
+team captain evaru
+vallu qualify ayye avakasalu enti
+latest vishayalu cheppandi
+chala dhanyavadalu sahayam chesinanduku
+malli kaluddam bye
+meeru emi antunnaro naaku artham kaaledu
+adi tappu malli chudandi
+ekkuva wickets evaru teesukunnaru
+entha manchi catch adi
+pitch batting ki baagundi
+vallu mundu bowling cheyyali sindi
+naaku istamaina player ms dhoni
+atanu next match lo aadutunnada
+atanni team nundi enduku teesesaru
+final ekkada jarugutundi
+franchise atani kosam entha icchindi
+varsham valla ee roju match aagipovachu
+naa snehitulato cricket chudatam naaku chala istam
+emaina aasakthikaramaina vishayam cheppu
+kotta niyamala gurinchi meeru emanukuntunnaru
+e bowler ki best economy undi
+ekkuva sixes evaru kottaro telusa
+idi ippati varaku best season
+vallaki muppai bantullo yabhai parugulu kavali
+match enni gantalaku modalavutundi
+chivari over lo chala daggaraga mugisindi
+sorry nenu match chustunnanu
+avunu adi baagundi
+ledu nenu daanitho oppukonu
+sare modalaina tarvata cheppandi
+super over lo emi jarigindi
+openers ela aadutunnaru
+atanu ee madhya manchi form lo unnadu
+enti vishayam ela undi mee roju
+bagunnava anna emi sangathi
+"""
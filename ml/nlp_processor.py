@@ -1,18 +1,127 @@
 import logging
+import math
 import re
 import string
+from collections import Counter
+from ml.language_profiles import ENGLISH_SAMPLE, TELUGU_ROMAN_SAMPLE
 
 logger = logging.getLogger(__name__)
 
 # Telugu character pattern
 telugu_pattern = re.compile(r'[\u0C00-\u0C7F]')
 
+# Translation table that strips ASCII punctuation, built once at import
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Intent keyword patterns, checked in order; the first matching intent
+# wins. Most keywords match anywhere in the message ('scorecard' is a
+# score question), but the leaderboard and win-probability words are
+# common English, so they match whole words only ('most' does not match
+# 'almost'). A score ('130/4') or a chase ('need 50 off 24') is a
+# win-probability question.
+INTENT_KEYWORDS = (
+    ('win_probability', (
+        r'\bchances?\b', r'\bwin(?:ning)? probability\b', r'\b(?:needed|required) off\b',
+        r'\bneeds? \d+ (?:runs? )?(?:off|from|in) \d', r'\b\d+/\d+\b',
+    )),
+    ('leaderboard', (r'\bleaderboards?\b', r'\btop\b', r'\bmost\b', r'\bbest\b')),
+    ('match_info', ('score', 'result', 'match')),
+    ('player_info', ('player', 'batsman', 'bowler')),
+    ('team_info', ('team', 'squad', 'franchise')),
+    ('schedule_info', ('schedule', 'fixture', 'upcoming')),
+    ('stats_info', ('stats', 'statistics', 'record')),
+)
+
+# One precompiled alternation per intent, in the same order
+INTENT_PATTERNS = tuple(
+    (intent, re.compile('|'.join(keywords)))
+    for intent, keywords in INTENT_KEYWORDS
+)
+
+# Add-k smoothing of the language profiles
+LANGUAGE_SMOOTHING = 0.5
+
+# Fewer character trigrams than this are too little evidence; such
+# messages are treated as English
+LANGUAGE_MIN_NGRAMS = 6
+
 def is_telugu_text(text):
     """
     Check if text contains Telugu characters
     """
     return bool(telugu_pattern.search(text))
 
+def _word_trigrams(text):
+    """
+    Character trigrams of each word, padded with spaces
+    """
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            yield padded[i:i + 3]
+
+def build_language_profile(base_sample, target_sample, smoothing=LANGUAGE_SMOOTHING):
+    """
+    Build a trigram log-likelihood ratio table, target versus base
+
+    Returns (table, unseen): the ratio for every trigram seen in either
+    sample, and the ratio for a trigram seen in neither.
+    """
+    base = Counter(_word_trigrams(base_sample))
+    target = Counter(_word_trigrams(target_sample))
+    vocabulary = len(base.keys() | target.keys())
+
+    base_total = sum(base.values()) + smoothing * vocabulary
+    target_total = sum(target.values()) + smoothing * vocabulary
+
+    table = {
+        gram: math.log((target[gram] + smoothing) / target_total)
+        - math.log((base[gram] + smoothing) / base_total)
+        for gram in base.keys() | target.keys()
+    }
+    unseen = math.log(smoothing / target_total) - math.log(smoothing / base_total)
+    return table, unseen
+
+# Romanized Telugu versus English trigram profile, built once at import
+ROMAN_TELUGU_PROFILE, ROMAN_TELUGU_UNSEEN = build_language_profile(ENGLISH_SAMPLE, TELUGU_ROMAN_SAMPLE)
+
+def detect_language(text):
+    """
+    Identify a message as 'english', 'telugu' (script) or 'telugu_roman'
+
+    Telugu script is detected by character range. Latin text is scored
+    with the romanized Telugu trigram profile and is romanized Telugu when
+    its average log-likelihood ratio is positive.
+    """
+    if not text:
+        return 'english'
+
+    if not text.isascii() and telugu_pattern.search(text):
+        return 'telugu'
+
+    profile = ROMAN_TELUGU_PROFILE
+    unseen = ROMAN_TELUGU_UNSEEN
+    score = 0.0
+    count = 0
+
+    for word in text.lower().translate(PUNCTUATION_TABLE).split():
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            score += profile.get(padded[i:i + 3], unseen)
+            count += 1
+
+    if count < LANGUAGE_MIN_NGRAMS:
+        return 'english'
+
+    return 'telugu_roman' if score > 0 else 'english'
+
+def detect_languages(texts):
+    """
+    Lazily identify the language of each message in an iterable
+    """
+    for text in texts:
+        yield detect_language(text)
+
 def process_text(text):
     """
     Simplified text processing (ML libraries disabled)
@@ -22,7 +131,7 @@ def process_text(text):
         text = text.lower()
 
         # Remove punctuation
-        text = text.translate(str.maketrans('', '', string.punctuation))
+        text = text.translate(PUNCTUATION_TABLE)
 
         # Remove extra whitespace
         text = ' '.join(text.split())
@@ -39,7 +148,7 @@ def process_telugu_text(text):
     """
     try:
         # Remove punctuation
-        text = text.translate(str.maketrans('', '', string.punctuation))
+        text = text.translate(PUNCTUATION_TABLE)
 
         # Remove extra whitespace
         text = ' '.join(text.split())
@@ -57,30 +166,90 @@ def detect_intent(text):
     # Simple keyword-based intent detection
     text = text.lower()
 
-    if any(word in text for word in ['score', 'result', 'match']):
-        return 'match_info'
+    for intent, pattern in INTENT_PATTERNS:
+        if pattern.search(text):
+            return intent
 
-    if any(word in text for word in ['player', 'batsman', 'bowler']):
-        return 'player_info'
+    # Default to conversation
+    return 'conversation'
 
-    if any(word in text for word in ['team', 'squad', 'franchise']):
-        return 'team_info'
+def matching_intents(text):
+    """
+    Every intent whose keywords appear in the text, in rule order
 
-    if any(word in text for word in ['schedule', 'fixture', 'upcoming']):
-        return 'schedule_info'
+    A handler that cannot answer its intent falls through to the next one.
+    """
+    text = text.lower()
+    return [intent for intent, pattern in INTENT_PATTERNS if pattern.search(text)]
 
-    if any(word in text for word in ['stats', 'statistics', 'record']):
-        return 'stats_info'
+def process_texts(texts, language=None):
+    """
+    Lazily normalize an iterable of messages
 
-    # Default to conversation
-    return 'conversation'
+    With language=None each message is processed as Telugu if it contains
+    Telugu script and as English otherwise; 'english' or 'telugu' forces
+    one normalizer for the whole batch. Yields one string per message.
+    """
+    table = PUNCTUATION_TABLE
+    search_telugu = telugu_pattern.search
 
-def extract_entities(text, intent):
+    for text in texts:
+        if not text:
+            yield ''
+            continue
+
+        # ASCII-only messages cannot contain Telugu script
+        if language == 'telugu' or (language is None and not text.isascii() and search_telugu(text)):
+            yield ' '.join(text.translate(table).split())
+        else:
+            yield ' '.join(text.lower().translate(table).split())
+
+def detect_intents(texts):
+    """
+    Lazily detect the intent of each message in an iterable
+    """
+    patterns = INTENT_PATTERNS
+
+    for text in texts:
+        text = text.lower() if text else ''
+        for intent, pattern in patterns:
+            if pattern.search(text):
+                yield intent
+                break
+        else:
+            yield 'conversation'
+
+def extract_entities(text, intent, resolver=None):
     """
     Simplified entity extraction (ML libraries disabled)
+
+    If an EntityResolver is given, known player and team names mentioned
+    anywhere in the text take precedence over the keyword patterns.
     """
     entities = {}
 
+    if resolver is not None:
+        if intent == 'player_info':
+            mentions = resolver.find_mentions(text, 'player')
+            if mentions:
+                entities['player_name'] = mentions[0][1]
+                return entities
+
+        elif intent == 'team_info':
+            mentions = resolver.find_mentions(text, 'team')
+            if mentions:
+                entities['team_name'] = mentions[0][1]
+                return entities
+
+        elif intent == 'match_info':
+            teams = []
+            for _, key, _ in resolver.find_mentions(text, 'team'):
+                if key not in teams:
+                    teams.append(key)
+            if len(teams) >= 2:
+                entities['team1'], entities['team2'] = teams[:2]
+                return entities
+
     if intent == 'player_info':
         # Try to extract player name
         player_patterns = [
@@ -0,0 +1,104 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Terminal marker inside a trie node (single characters are never empty)
+_END = ''
+
+class PatternMatcher:
+    """
+    Trie index over lowercase patterns for substring lookup in messages
+
+    Lookup cost depends on the length of the message and the depth of the
+    trie, not on the number of patterns. When several patterns occur in a
+    message the longest one wins, and ties go to the pattern added first.
+    """
+
+    def __init__(self, patterns=None):
+        """
+        Initialize the matcher, optionally with a {pattern: value} mapping
+        """
+        self._root = {}
+        self._count = 0
+        self._next_rank = 0
+
+        if patterns:
+            for pattern, value in patterns.items():
+                self.add(pattern, value)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, pattern):
+        return self._find_node(pattern.lower()) is not None
+
+    def _find_node(self, key):
+        """
+        Return the terminal entry for an exact pattern, or None
+        """
+        node = self._root
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(_END)
+
+    def add(self, pattern, value):
+        """
+        Add a pattern, or replace the value of an existing one
+
+        A replaced pattern keeps its original priority rank.
+        """
+        key = pattern.lower()
+        if not key:
+            return False
+
+        node = self._root
+        for char in key:
+            child = node.get(char)
+            if child is None:
+                child = node[char] = {}
+            node = child
+
+        entry = node.get(_END)
+        if entry is None:
+            rank = self._next_rank
+            self._next_rank += 1
+            self._count += 1
+        else:
+            rank = entry[0]
+
+        node[_END] = (rank, value)
+        return True
+
+    def match(self, text):
+        """
+        Return the value of the best pattern contained in text, or None
+        """
+        text = text.lower()
+        root = self._root
+        length = len(text)
+
+        best_length = 0
+        best_rank = None
+        best_value = None
+
+        for start in range(length):
+            node = root.get(text[start])
+            end = start + 1
+
+            while node is not None:
+                entry = node.get(_END)
+                if entry is not None:
+                    size = end - start
+                    if size > best_length or (size == best_length and entry[0] < best_rank):
+                        best_length = size
+                        best_rank = entry[0]
+                        best_value = entry[1]
+
+                if end >= length:
+                    break
+                node = node.get(text[end])
+                end += 1
+
+        return best_value
@@ -0,0 +1,327 @@
+import logging
+from collections import OrderedDict
+from string import Formatter
+
+logger = logging.getLogger(__name__)
+
+# Shown for a required field that has no value
+MISSING_VALUE = 'N/A'
+
+# Maximum number of rendered responses kept in the cache
+RENDER_CACHE_SIZE = 4096
+
+class OptionalLine(str):
+    """
+    A template line that is left out when any of its fields has no value
+    """
+
+class _Values(dict):
+    """
+    Field values for str.format_map, with a placeholder for missing fields
+    """
+
+    def __missing__(self, key):
+        return MISSING_VALUE
+
+class Template:
+    """
+    A response template compiled once at import
+
+    Templates are lists of lines joined with newlines. Field names are
+    parsed up front; a template without optional lines renders with a
+    single format_map call.
+    """
+
+    def __init__(self, lines):
+        # Merge runs of required lines into one segment, so rendering is
+        # one format_map call per segment
+        self.segments = []
+        for line in lines:
+            optional = isinstance(line, OptionalLine)
+            if self.segments and not optional and not self.segments[-1][2]:
+                text, fields, _ = self.segments.pop()
+                line = text + '\n' + line
+            fields = tuple(name for _, name, _, _ in Formatter().parse(line) if name)
+            self.segments.append((str(line), fields, optional))
+
+        self.fields = {name for _, fields, _ in self.segments for name in fields}
+        self.text = self.segments[0][0] if len(self.segments) == 1 and not self.segments[0][2] else None
+
+    def render(self, values):
+        """
+        Render the template with a mapping of field values
+        """
+        values = _Values(values)
+
+        if self.text is not None:
+            return self.text.format_map(values)
+
+        parts = []
+        for text, fields, optional in self.segments:
+            if optional and None in map(values.get, fields):
+                continue
+            parts.append(text.format_map(values))
+        return '\n'.join(parts)
+
+# Localization catalog: (message type, language) -> template lines
+CATALOG = {
+    ('player_info', 'english'): [
+        "Here's information about {name}:",
+        "Team: {team}",
+        "Role: {role}",
+        "Matches: {matches}",
+        "Runs: {runs}",
+        "Wickets: {wickets}",
+    ],
+    ('player_info', 'telugu'): [
+        "{name} గురించి సమాచారం ఇక్కడ ఉంది:",
+        "జట్టు: {team}",
+        "పాత్ర: {role}",
+        "మ్యాచ్‌లు: {matches}",
+        "పరుగులు: {runs}",
+        "వికెట్లు: {wickets}",
+    ],
+    ('team_info', 'english'): [
+        "Here's information about {name}:",
+        "Full Name: {full_name}",
+        "Home Ground: {home_ground}",
+        "Captain: {captain}",
+        "Championships: {championships}",
+    ],
+    ('team_info', 'telugu'): [
+        "{name} గురించి సమాచారం ఇక్కడ ఉంది:",
+        "పూర్తి పేరు: {full_name}",
+        "హోమ్ గ్రౌండ్: {home_ground}",
+        "కెప్టెన్: {captain}",
+        "ఛాంపియన్‌షిప్‌లు: {championships}",
+    ],
+    ('match_info', 'english'): [
+        "Here's information about {team1} vs {team2}:",
+        "Date: {date}",
+        "Venue: {venue}",
+        "Result: {result}",
+    ],
+    ('match_info', 'telugu'): [
+        "{team1} vs {team2} గురించి సమాచారం ఇక్కడ ఉంది:",
+        "తేదీ: {date}",
+        "వేదిక: {venue}",
+        "ఫలితం: {result}",
+    ],
+    ('player_card', 'english'): [
+        "🏏 **{name}**",
+        "",
+        "• Team: {team}",
+        "• Role: {role}",
+        "• Matches: {matches}",
+        "• Runs: {runs}",
+        "• Wickets: {wickets}",
+        OptionalLine("• Average: {average}"),
+        OptionalLine("• Strike Rate: {strike_rate}"),
+        OptionalLine("• Economy: {economy}"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('team_card', 'english'): [
+        "🏆 **{name}**",
+        "",
+        "• Full Name: {full_name}",
+        "• Home Ground: {home_ground}",
+        "• Captain: {captain}",
+        OptionalLine("• Coach: {coach}"),
+        "• Championships: {championships}",
+        OptionalLine("• Matches Played: {matches_played}"),
+        OptionalLine("• Wins: {wins}"),
+        OptionalLine("• Losses: {losses}"),
+        OptionalLine("• Win Percentage: {win_percentage}%"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('stats_card', 'english'): [
+        "📊 **IPL Statistics{scope}**",
+        "",
+        "• Total Matches: {total_matches}",
+        OptionalLine("• Most Wins: {most_wins_team} ({most_wins_count} wins)"),
+        OptionalLine("• Highest Score: {highest_score_team} ({highest_score} runs)"),
+        "• Most Runs: {most_runs_player} ({most_runs} runs)",
+        "• Most Wickets: {most_wickets_player} ({most_wickets} wickets)",
+        OptionalLine("• Highest Individual Score: {highest_individual_score_player} ({highest_individual_score})"),
+        OptionalLine("• Best Bowling: {best_bowling_player} ({best_bowling_figures})"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('head_to_head_card', 'english'): [
+        "⚔️ **{team1} vs {team2}**",
+        "",
+        "• Matches: {played}",
+        "• {team1} wins: {team1_wins}",
+        "• {team2} wins: {team2_wins}",
+        OptionalLine("• Tied / no result: {no_result}"),
+        "",
+        "**Last meeting:** {last_date} at {last_venue}",
+        "{last_result}",
+        OptionalLine("\n**Recent meetings:**\n{recent}"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('leaderboard_card', 'english'): [
+        "🏅 **{title}**",
+        "",
+        "{rows}",
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('matchup_card', 'english'): [
+        "🎯 **{batter} vs {bowler}**",
+        "",
+        "• Runs: {runs}",
+        "• Balls: {balls}",
+        "• Dismissals: {dismissals}",
+        "• Fours / Sixes: {fours} / {sixes}",
+        "• Dot Balls: {dots}",
+        OptionalLine("• Strike Rate: {strike_rate}"),
+        OptionalLine("• Average: {average}"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('phase_card', 'english'): [
+        "⏱️ **{name} by phase**",
+        OptionalLine("\n**Batting:**\n{batting}"),
+        OptionalLine("\n**Bowling:**\n{bowling}"),
+        "",
+        "_Data from local database - may not be current_",
+    ],
+    ('win_probability_card', 'english'): [
+        "📈 **{team}: {probability}% to win**",
+        "",
+        "{situation}",
+        "",
+        "_Estimated from past IPL matches in similar situations_",
+    ],
+    ('live_player_card', 'english'): [
+        "🏏 **{name}**",
+        "",
+        "• Team: {team}",
+        "• Role: {role}",
+        "• Country: {country}",
+        "• Matches: {matches}",
+        "• Runs: {runs}",
+        "• Wickets: {wickets}",
+        OptionalLine("• Batting Average: {batting_avg}"),
+        OptionalLine("• Strike Rate: {strike_rate}"),
+        OptionalLine("\n**Current Form:**\n{current_form}"),
+        OptionalLine("\n**Recent Performance:**\n{recent_performance}"),
+        "",
+        "_Latest data from IPL {year} - Updated {updated}_",
+    ],
+    ('live_team_card', 'english'): [
+        "🏆 **{name}**",
+        "",
+        "• Full Name: {full_name}",
+        "• Home Ground: {home_ground}",
+        "• Captain: {captain}",
+        OptionalLine("• Coach: {coach}"),
+        "• Championships: {championships}",
+        OptionalLine("• Owner: {owner}"),
+        OptionalLine("\n**Key Players:**\n{key_players}"),
+        OptionalLine("\n**Recent Performance:**\n{recent_performance}"),
+        "",
+        "_Latest data from IPL {year} - Updated {updated}_",
+    ],
+    ('live_match_card', 'english'): [
+        "⚔️ **{team1} vs {team2}**",
+        "",
+        "• Date: {date}",
+        "• Venue: {venue}",
+        "• Result: {result}",
+        OptionalLine("\n**Highlights:**\n{highlights}"),
+        "",
+        "_Latest data from IPL {year} - Updated {updated}_",
+    ],
+    ('live_stats_card', 'english'): [
+        "📊 **IPL {year} Statistics**",
+        "",
+        "• Total Matches: {total_matches}",
+        "• Most Wins: {most_wins_team} ({most_wins_count} wins)",
+        "• Highest Score: {highest_score_team} ({highest_score} runs)",
+        "• Most Runs: {most_runs_player} ({most_runs} runs)",
+        "• Most Wickets: {most_wickets_player} ({most_wickets} wickets)",
+        OptionalLine("• Highest Individual Score: {highest_individual_score_player} ({highest_individual_score})"),
+        OptionalLine("• Best Bowling: {best_bowling_player} ({best_bowling_figures})"),
+        OptionalLine("\n**Current Points Table:**\n{points_table}"),
+        "",
+        "_Latest data from IPL {year} - Updated {updated}_",
+    ],
+}
+
+# Compiled templates, keyed like the catalog
+TEMPLATES = {key: Template(lines) for key, lines in CATALOG.items()}
+
+def get_template(message_type, language='english'):
+    """
+    Get the compiled template for a message type, falling back to English
+    """
+    template = TEMPLATES.get((message_type, language))
+    if template is None:
+        template = TEMPLATES[(message_type, 'english')]
+    return template
+
+def render(message_type, values, language='english'):
+    """
+    Render a message type from a mapping of field values
+    """
+    return get_template(message_type, language).render(values)
+
+class RenderCache:
+    """
+    LRU cache of rendered responses keyed by
+    (message type, entity id, data version, language)
+
+    The data version is part of the key, so a data refresh makes old
+    entries unreachable and they age out of the LRU.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, message_type, entity_id, version, values, language='english'):
+        """
+        Get a rendered response, rendering it on a miss
+
+        values is the field mapping, or a callable returning it, which is
+        only called on a miss.
+        """
+        key = (message_type, entity_id, version, language)
+        text = self.entries.get(key)
+
+        if text is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+        self.misses += 1
+        text = render(message_type, values() if callable(values) else values, language)
+        self.entries[key] = text
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return text
+
+    def clear(self):
+        """
+        Drop all rendered responses
+        """
+        self.entries.clear()
+
+# Shared cache used by the chat model and command handlers
+render_cache = RenderCache()
+
+def render_cached(message_type, entity_id, version, values, language='english'):
+    """
+    Render an entity's response through the shared cache
+    """
+    return render_cache.get(message_type, entity_id, version, values, language)
@@ -0,0 +1,306 @@
+import logging
+import numpy as np
+from ml.entity_resolver import normalize_name
+from utils.ipl_aggregates import ILLEGAL_EXTRAS, NON_BOWLER_DISMISSALS, NON_BOWLER_EXTRAS, NOT_OUT_DISMISSALS, ids_of
+from utils.ipl_matchups import PHASES
+
+logger = logging.getLogger(__name__)
+
+# Leaderboard metrics: (side, lower is better, is a rate)
+LEADERBOARD_METRICS = {
+    'runs': ('batting', False, False),
+    'sixes': ('batting', False, False),
+    'fours': ('batting', False, False),
+    'average': ('batting', False, True),
+    'strike_rate': ('batting', False, True),
+    'wickets': ('bowling', False, False),
+    'economy': ('bowling', True, True),
+}
+
+# Balls faced or bowled needed to qualify for a rate leaderboard
+LEADERBOARD_MIN_BALLS = 60
+
+def find_venue_id(dataset, query):
+    """
+    Resolve a venue name (or a unique part of it) to a venue id, or -1
+    """
+    venue_id = dataset.venue_id(query)
+    if venue_id >= 0:
+        return venue_id
+
+    wanted = normalize_name(query)
+    matches = [i for i, venue in enumerate(dataset.venues) if wanted in normalize_name(venue)]
+    return matches[0] if len(matches) == 1 else -1
+
+def match_mask(dataset, season=None, team_id=None, venue_id=None):
+    """
+    Boolean mask over matches for the given season, team and venue filters
+    """
+    matches = dataset.matches
+    mask = np.ones(dataset.num_matches, dtype=bool)
+    if season is not None:
+        mask &= matches['season'] == season
+    if team_id is not None:
+        mask &= (matches['team1'] == team_id) | (matches['team2'] == team_id)
+    if venue_id is not None:
+        mask &= matches['venue'] == venue_id
+    return mask
+
+def delivery_mask(dataset, matches):
+    """
+    Mask over deliveries in the selected matches, excluding super overs
+    """
+    deliveries = dataset.deliveries
+    return matches[deliveries['match']] & (deliveries['inning'] <= 2)
+
+def bowler_wicket_mask(dataset):
+    """
+    Mask over deliveries whose dismissal is credited to the bowler
+    """
+    deliveries = dataset.deliveries
+    excluded = ids_of(dataset.dismissal_kinds, NON_BOWLER_DISMISSALS)
+    return (deliveries['is_wicket'] > 0) & ~np.isin(deliveries['dismissal_kind'], excluded)
+
+def bowler_runs(dataset):
+    """
+    Runs conceded by the bowler on every delivery (byes and leg byes excluded)
+    """
+    deliveries = dataset.deliveries
+    excluded = ids_of(dataset.extras_types, NON_BOWLER_EXTRAS)
+    charged_extras = np.where(np.isin(deliveries['extras_type'], excluded), 0, deliveries['extra_runs'])
+    return deliveries['batter_runs'].astype(np.int64) + charged_extras
+
+def _top(totals):
+    """
+    (index, value) of the largest total, or (None, 0) if there is none
+    """
+    if not len(totals) or totals.max() <= 0:
+        return None, 0
+    best = int(totals.argmax())
+    return best, totals[best]
+
+def compute_stats(dataset, season=None, team_id=None, venue_id=None):
+    """
+    Headline IPL statistics for the selected matches
+
+    Every figure is a group-by over the delivery columns (bincount over a
+    composite key), so a full-history query is a few vectorized passes.
+    With a team filter, batting and bowling figures are the team's own.
+    """
+    deliveries = dataset.deliveries
+    matches = dataset.matches
+    selected = match_mask(dataset, season, team_id, venue_id)
+    mask = delivery_mask(dataset, selected)
+
+    batting_mask = mask if team_id is None else mask & (deliveries['batting_team'] == team_id)
+    bowling_mask = mask if team_id is None else mask & (deliveries['bowling_team'] == team_id)
+    num_players = len(dataset.players)
+
+    stats = {'total_matches': int(selected.sum())}
+
+    # Most wins
+    winners = matches['winner'][selected]
+    wins = np.bincount(winners[winners >= 0], minlength=len(dataset.teams))
+    best, count = _top(wins)
+    stats['most_wins_team'] = dataset.teams[best] if best is not None else None
+    stats['most_wins_count'] = int(count)
+
+    # Highest team total: innings key = match * 2 + (inning - 1)
+    innings = deliveries['match'][batting_mask].astype(np.int64) * 2 + deliveries['inning'][batting_mask] - 1
+    totals = np.bincount(innings, weights=deliveries['total_runs'][batting_mask])
+    best, total = _top(totals)
+    if best is not None:
+        first_ball = np.flatnonzero(innings == best)[0]
+        stats['highest_score_team'] = dataset.teams[deliveries['batting_team'][batting_mask][first_ball]]
+    else:
+        stats['highest_score_team'] = None
+    stats['highest_score'] = int(total)
+
+    # Top run scorer and highest individual score
+    batters = deliveries['batter'][batting_mask].astype(np.int64)
+    batter_runs = deliveries['batter_runs'][batting_mask]
+    best, runs = _top(np.bincount(batters, weights=batter_runs, minlength=num_players))
+    stats['most_runs_player'] = dataset.players[best] if best is not None else None
+    stats['most_runs'] = int(runs)
+
+    scores = np.bincount(deliveries['match'][batting_mask].astype(np.int64) * num_players + batters, weights=batter_runs)
+    best, score = _top(scores)
+    stats['highest_individual_score_player'] = dataset.players[best % num_players] if best is not None else None
+    stats['highest_individual_score'] = int(score)
+
+    # Top wicket taker and best bowling figures in a match
+    bowlers = deliveries['bowler'][bowling_mask].astype(np.int64)
+    wickets = bowler_wicket_mask(dataset)[bowling_mask]
+    best, count = _top(np.bincount(bowlers, weights=wickets, minlength=num_players))
+    stats['most_wickets_player'] = dataset.players[best] if best is not None else None
+    stats['most_wickets'] = int(count)
+
+    spells = deliveries['match'][bowling_mask].astype(np.int64) * num_players + bowlers
+    spell_wickets = np.bincount(spells, weights=wickets)
+    spell_runs = np.bincount(spells, weights=bowler_runs(dataset)[bowling_mask])
+    if len(spells) and spell_wickets.max() > 0:
+        # Most wickets, then fewest runs
+        bowled = np.bincount(spells) > 0
+        ranking = np.where(bowled, spell_wickets * 10000 - spell_runs, -np.inf)
+        best = int(ranking.argmax())
+        stats['best_bowling_player'] = dataset.players[best % num_players]
+        stats['best_bowling_figures'] = f"{int(spell_wickets[best])}/{int(spell_runs[best])}"
+    else:
+        stats['best_bowling_player'] = None
+        stats['best_bowling_figures'] = None
+
+    return stats
+
+def all_time_stats(dataset):
+    """
+    Headline statistics over every season without scanning the deliveries
+
+    Player and team totals come from the materialized aggregates, and
+    per-match records (highest totals, best figures) from the summaries
+    stored with the season partitions. Returns None when either is missing.
+    Gives the same figures as compute_stats(dataset).
+    """
+    aggregates, partitions = dataset.aggregates, dataset.partitions
+    if aggregates is None or partitions is None or partitions.seasons != dataset.seasons:
+        return None
+    summaries = partitions.summaries()
+    if None in summaries:
+        return None
+
+    stats = {'total_matches': dataset.num_matches}
+
+    def leader(names, totals):
+        best, value = _top(totals)
+        return (names[best] if best is not None else None), int(value)
+
+    stats['most_wins_team'], stats['most_wins_count'] = leader(aggregates.team_names, aggregates.team_totals('won'))
+    stats['most_runs_player'], stats['most_runs'] = leader(aggregates.player_names, aggregates.player_totals('runs'))
+    stats['most_wickets_player'], stats['most_wickets'] = leader(
+        aggregates.player_names, aggregates.player_totals('wickets')
+    )
+
+    # Per-match records: the best season record, earliest season on ties
+    for player_field, value_field in (('highest_score_team', 'highest_score'),
+                                      ('highest_individual_score_player', 'highest_individual_score')):
+        best = max(summaries, key=lambda summary: summary[value_field])
+        stats[player_field] = best[player_field] if best[value_field] > 0 else None
+        stats[value_field] = best[value_field]
+
+    def figures(summary):
+        wickets, runs = summary['best_bowling_figures'].split('/')
+        return int(wickets), -int(runs)
+
+    bowled = [summary for summary in summaries if summary['best_bowling_figures']]
+    best = max(bowled, key=figures) if bowled else None
+    stats['best_bowling_player'] = best['best_bowling_player'] if best else None
+    stats['best_bowling_figures'] = best['best_bowling_figures'] if best else None
+
+    return stats
+
+def top_k(values, k, lowest=False):
+    """
+    Indices of the k best finite values, best first
+
+    Uses a partial selection (argpartition), so only the k winners are sorted.
+    Ties keep id order.
+    """
+    scores = values if lowest else -values
+    candidates = np.flatnonzero(np.isfinite(scores))
+    if len(candidates) > k:
+        candidates = np.sort(candidates[np.argpartition(scores[candidates], k - 1)[:k]])
+    return candidates[np.argsort(scores[candidates], kind='stable')]
+
+def compute_leaderboard(dataset, metric, season=None, team_id=None, venue_id=None, phase=None,
+                        k=10, min_balls=LEADERBOARD_MIN_BALLS):
+    """
+    Top k players for a metric as a list of (player id, value)
+
+    Batting metrics count the team's batters and bowling metrics its
+    bowlers when there is a team filter. Rates need min_balls faced or
+    bowled in the selection.
+    """
+    side, lowest, is_rate = LEADERBOARD_METRICS[metric]
+    deliveries = dataset.deliveries
+    num_players = len(dataset.players)
+
+    mask = delivery_mask(dataset, match_mask(dataset, season, None, venue_id))
+    if team_id is not None:
+        mask &= deliveries[f'{side}_team'] == team_id
+    if phase is not None:
+        first, last = PHASES[phase]
+        mask &= (deliveries['over'] >= first) & (deliveries['over'] < last)
+
+    def per_player(column, weights=None, selection=None):
+        selection = mask if selection is None else mask & selection
+        players = deliveries[column][selection].astype(np.int64)
+        valid = players >= 0
+        if weights is not None:
+            weights = weights[selection][valid]
+        return np.bincount(players[valid], weights=weights, minlength=num_players)
+
+    extras_type = deliveries['extras_type']
+    if side == 'batting':
+        batter_runs = deliveries['batter_runs']
+        if metric == 'sixes':
+            values = per_player('batter', selection=batter_runs == 6)
+        elif metric == 'fours':
+            values = per_player('batter', selection=batter_runs == 4)
+        else:
+            runs = per_player('batter', batter_runs)
+            balls = per_player('batter', selection=~np.isin(extras_type, ids_of(dataset.extras_types, {'wides'})))
+            if metric == 'runs':
+                values = runs
+            elif metric == 'strike_rate':
+                values = np.where(balls > 0, runs * 100 / np.maximum(balls, 1), np.nan)
+            else:
+                not_out = ids_of(dataset.dismissal_kinds, NOT_OUT_DISMISSALS)
+                out = (deliveries['is_wicket'] > 0) & ~np.isin(deliveries['dismissal_kind'], not_out)
+                outs = per_player('player_dismissed', selection=out)
+                values = np.where(outs > 0, runs / np.maximum(outs, 1), np.nan)
+    else:
+        if metric == 'wickets':
+            values = per_player('bowler', selection=bowler_wicket_mask(dataset))
+        else:
+            balls = per_player('bowler', selection=~np.isin(extras_type, ids_of(dataset.extras_types, ILLEGAL_EXTRAS)))
+            runs = per_player('bowler', bowler_runs(dataset))
+            values = np.where(balls > 0, runs * 6 / np.maximum(balls, 1), np.nan)
+
+    values = values.astype(np.float64)
+    if is_rate:
+        values[balls < max(min_balls, 1)] = np.nan
+    else:
+        values[values <= 0] = np.nan
+
+    return [(int(player), values[player].item()) for player in top_k(values, k, lowest)]
+
+def aggregate_leaderboard(aggregates, metric, season=None, k=10, min_balls=LEADERBOARD_MIN_BALLS):
+    """
+    Top k players for a metric from the materialized aggregates
+
+    Answers leaderboards without team, venue or phase filters in one pass
+    over the players instead of the deliveries. Gives the same rows as
+    compute_leaderboard.
+    """
+    side, lowest, is_rate = LEADERBOARD_METRICS[metric]
+
+    def totals(name):
+        return aggregates.player_totals(name, season).astype(np.float64)
+
+    if metric == 'average':
+        runs, outs, balls = totals('runs'), totals('outs'), totals('balls_faced')
+        values = np.where(outs > 0, runs / np.maximum(outs, 1), np.nan)
+    elif metric == 'strike_rate':
+        runs, balls = totals('runs'), totals('balls_faced')
+        values = np.where(balls > 0, runs * 100 / np.maximum(balls, 1), np.nan)
+    elif metric == 'economy':
+        runs, balls = totals('runs_conceded'), totals('balls_bowled')
+        values = np.where(balls > 0, runs * 6 / np.maximum(balls, 1), np.nan)
+    else:
+        values = totals(metric)
+
+    if is_rate:
+        values[balls < max(min_balls, 1)] = np.nan
+    else:
+        values[values <= 0] = np.nan
+
+    return [(int(player), values[player].item()) for player in top_k(values, k, lowest)]
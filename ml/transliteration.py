@@ -0,0 +1,236 @@
+import logging
+import re
+from ml.entity_resolver import TEAM_ALIASES
+
+logger = logging.getLogger(__name__)
+
+VIRAMA = '్'
+ANUSVARA = 'ం'
+VISARGA = 'ః'
+CHANDRABINDU = 'ఁ'
+
+# Zero-width joiners carry no sound and are dropped
+_IGNORED = {'‌', '‍'}
+
+# Independent vowels: (readable, strict). Readable romanization is what
+# users type; strict romanization is case-sensitive and round-trips.
+VOWELS = {
+    'అ': ('a', 'a'), 'ఆ': ('aa', 'aa'), 'ఇ': ('i', 'i'), 'ఈ': ('ee', 'ii'),
+    'ఉ': ('u', 'u'), 'ఊ': ('oo', 'uu'), 'ఋ': ('ru', 'R'), 'ౠ': ('roo', 'RR'),
+    'ఎ': ('e', 'e'), 'ఏ': ('e', 'E'), 'ఐ': ('ai', 'ai'), 'ఒ': ('o', 'o'),
+    'ఓ': ('o', 'O'), 'ఔ': ('au', 'au'),
+}
+
+# Dependent vowel signs, keyed by sign, with the matching independent vowel
+VOWEL_SIGNS = {
+    'ా': 'ఆ', 'ి': 'ఇ', 'ీ': 'ఈ', 'ు': 'ఉ', 'ూ': 'ఊ', 'ృ': 'ఋ', 'ౄ': 'ౠ',
+    'ె': 'ఎ', 'ే': 'ఏ', 'ై': 'ఐ', 'ొ': 'ఒ', 'ో': 'ఓ', 'ౌ': 'ఔ',
+}
+
+CONSONANTS = {
+    'క': ('k', 'k'), 'ఖ': ('kh', 'kh'), 'గ': ('g', 'g'), 'ఘ': ('gh', 'gh'), 'ఙ': ('ng', '~N'),
+    'చ': ('ch', 'ch'), 'ఛ': ('chh', 'Ch'), 'జ': ('j', 'j'), 'ఝ': ('jh', 'jh'), 'ఞ': ('ny', '~n'),
+    'ట': ('t', 'T'), 'ఠ': ('th', 'Th'), 'డ': ('d', 'D'), 'ఢ': ('dh', 'Dh'), 'ణ': ('n', 'N'),
+    'త': ('t', 't'), 'థ': ('th', 'th'), 'ద': ('d', 'd'), 'ధ': ('dh', 'dh'), 'న': ('n', 'n'),
+    'ప': ('p', 'p'), 'ఫ': ('ph', 'ph'), 'బ': ('b', 'b'), 'భ': ('bh', 'bh'), 'మ': ('m', 'm'),
+    'య': ('y', 'y'), 'ర': ('r', 'r'), 'ఱ': ('r', '~r'), 'ల': ('l', 'l'), 'ళ': ('l', 'L'),
+    'వ': ('v', 'v'), 'శ': ('sh', 'S'), 'ష': ('sh', 'Sh'), 'స': ('s', 's'), 'హ': ('h', 'h'),
+    'ౘ': ('ts', '~ts'), 'ౙ': ('dz', '~dz'),
+}
+
+OTHER_SIGNS = {
+    ANUSVARA: ('m', 'M'), VISARGA: ('h', 'H'), CHANDRABINDU: ('n', 'M~'),
+}
+
+DIGITS = {chr(0x0C66 + i): str(i) for i in range(10)}
+
+# Spellings accepted when reading readable romanization. Where several
+# letters share a spelling, the most common letter is used.
+READABLE_SPELLINGS = {
+    'a': ('V', 'అ'), 'aa': ('V', 'ఆ'), 'i': ('V', 'ఇ'), 'ee': ('V', 'ఈ'), 'ii': ('V', 'ఈ'),
+    'u': ('V', 'ఉ'), 'oo': ('V', 'ఊ'), 'uu': ('V', 'ఊ'),
+    'e': ('V', 'ఎ'), 'ai': ('V', 'ఐ'), 'o': ('V', 'ఒ'), 'au': ('V', 'ఔ'), 'ou': ('V', 'ఔ'),
+    'k': ('C', 'క'), 'kh': ('C', 'ఖ'), 'g': ('C', 'గ'), 'gh': ('C', 'ఘ'),
+    'c': ('C', 'చ'), 'ch': ('C', 'చ'), 'chh': ('C', 'ఛ'), 'j': ('C', 'జ'), 'z': ('C', 'జ'),
+    'jh': ('C', 'ఝ'), 't': ('C', 'త'), 'th': ('C', 'థ'), 'd': ('C', 'ద'), 'dh': ('C', 'ధ'),
+    'n': ('C', 'న'), 'p': ('C', 'ప'), 'ph': ('C', 'ఫ'), 'f': ('C', 'ఫ'), 'b': ('C', 'బ'),
+    'bh': ('C', 'భ'), 'm': ('C', 'మ'), 'y': ('C', 'య'), 'r': ('C', 'ర'), 'l': ('C', 'ల'),
+    'v': ('C', 'వ'), 'w': ('C', 'వ'), 'sh': ('C', 'శ'), 's': ('C', 'స'), 'h': ('C', 'హ'),
+}
+
+# Consonants before which a readable anusvara is written 'm' rather than 'n'
+_LABIALS = set('pbmvf')
+
+# Consonants after which a readable 'm' or 'n' stays a full consonant
+# (ramya, dhanyavaadaalu) instead of becoming an anusvara
+_NO_ANUSVARA_BEFORE = {'య', 'ర', 'ల', 'వ'}
+
+def _strict_table():
+    """
+    Map strict romanized tokens to ('V', vowel), ('C', consonant) or ('S', sign)
+    """
+    table = {names[1]: ('C', letter) for letter, names in CONSONANTS.items()}
+    table.update({names[1]: ('V', letter) for letter, names in VOWELS.items()})
+    table.update({names[1]: ('S', sign) for sign, names in OTHER_SIGNS.items()})
+    return table
+
+_READABLE_TABLE = READABLE_SPELLINGS
+_STRICT_TABLE = _strict_table()
+_VOWEL_TO_SIGN = {vowel: sign for sign, vowel in VOWEL_SIGNS.items()}
+
+def _tokenizer(table):
+    """
+    Compile a greedy longest-match tokenizer for a reverse table
+    """
+    keys = sorted(table, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(key) for key in keys) + '|.', re.DOTALL)
+
+_READABLE_TOKENS = _tokenizer(_READABLE_TABLE)
+_STRICT_TOKENS = _tokenizer(_STRICT_TABLE)
+
+# Runs of Latin letters, the words readable input is split into
+_LATIN_WORDS = re.compile(r'([A-Za-z]+)')
+
+def _english_words(text, resolver=None):
+    """
+    Lowercased words of romanized Telugu text that are not Telugu: all-caps
+    words (IPL, CSK), team codes and the names the entity resolver knows
+    """
+    words = set(TEAM_ALIASES)
+    words.update(word.lower() for word in _LATIN_WORDS.findall(text) if len(word) > 1 and word.isupper())
+    if resolver is not None:
+        for _, _, alias in resolver.find_mentions(text):
+            words.update(alias.split())
+    return words
+
+def to_roman(text, strict=False):
+    """
+    Transliterate Telugu script to Latin letters
+
+    The default readable scheme ("namaskaaram") is what users type and is
+    lossy: e.g. dental and retroflex consonants share a spelling. With
+    strict=True the case-sensitive scheme round-trips Telugu words through
+    to_telugu (apart from rare consonant + హ clusters, which read back as
+    aspirates). Non-Telugu characters pass through unchanged.
+    """
+    column = 1 if strict else 0
+    output = []
+    length = len(text)
+    i = 0
+
+    while i < length:
+        char = text[i]
+
+        if char in CONSONANTS:
+            output.append(CONSONANTS[char][column])
+            following = text[i + 1] if i + 1 < length else ''
+
+            if following == VIRAMA:
+                i += 1
+            elif following in VOWEL_SIGNS:
+                output.append(VOWELS[VOWEL_SIGNS[following]][column])
+                i += 1
+            else:
+                output.append('a')
+
+        elif char in VOWELS:
+            output.append(VOWELS[char][column])
+
+        elif char == ANUSVARA and not strict:
+            # Readable anusvara is 'm' before labials and at word end, else 'n'
+            following = text[i + 1] if i + 1 < length else ''
+            next_sound = CONSONANTS.get(following, ('',))[0][:1]
+            output.append('m' if not next_sound or next_sound in _LABIALS else 'n')
+
+        elif char in OTHER_SIGNS:
+            output.append(OTHER_SIGNS[char][column])
+
+        elif char in DIGITS:
+            output.append(DIGITS[char])
+
+        elif char in VOWEL_SIGNS:
+            # A stray vowel sign (no consonant before it)
+            output.append(VOWELS[VOWEL_SIGNS[char]][column])
+
+        elif char != VIRAMA and char not in _IGNORED:
+            output.append(char)
+
+        i += 1
+
+    return ''.join(output)
+
+def to_telugu(text, strict=False, resolver=None):
+    """
+    Transliterate romanized Telugu to Telugu script
+
+    Readable input is matched case-insensitively with the common spelling
+    of each sound (t = త, n = న, sh = శ, ee = ఈ), and a readable 'm' or 'n'
+    before a different stop or sibilant becomes an anusvara. English words
+    in readable input (see _english_words; pass the entity resolver to keep
+    player and team names) are left in Latin letters. Strict input uses the
+    case-sensitive scheme produced by to_roman(strict=True).
+    """
+    if strict:
+        return _transliterate(text, strict)
+
+    english = _english_words(text, resolver)
+    return ''.join(
+        piece if piece.lower() in english else _transliterate(piece, strict)
+        for piece in _LATIN_WORDS.split(text)
+    )
+
+def _transliterate(text, strict):
+    """
+    Transliterate romanized text letter by letter
+    """
+    table = _STRICT_TABLE if strict else _READABLE_TABLE
+    tokens = (_STRICT_TOKENS if strict else _READABLE_TOKENS).findall(text if strict else text.lower())
+
+    output = []
+    pending = None
+
+    for token in tokens:
+        kind, value = table.get(token, (None, token))
+
+        if kind == 'C':
+            if pending is not None:
+                if (not strict and pending in ('మ', 'న') and value != pending
+                        and value not in _NO_ANUSVARA_BEFORE):
+                    output.append(ANUSVARA)
+                else:
+                    output.append(pending + VIRAMA)
+            pending = value
+
+        elif kind == 'V':
+            if pending is not None:
+                output.append(pending + _VOWEL_TO_SIGN.get(value, ''))
+                pending = None
+            else:
+                output.append(value)
+
+        else:
+            if pending is not None:
+                word_end = not token.isalpha()
+                if not strict and pending == 'మ' and word_end:
+                    output.append(ANUSVARA)
+                else:
+                    output.append(pending + VIRAMA)
+                pending = None
+            output.append(value)
+
+    if pending is not None:
+        output.append(ANUSVARA if not strict and pending == 'మ' else pending + VIRAMA)
+
+    return ''.join(output)
+
+def render_telugu(text, script='roman'):
+    """
+    Render a Telugu response in the given script ('roman' or 'telugu')
+    """
+    if not text:
+        return text
+
+    if script == 'telugu':
+        return text
+
+    return to_roman(text)
@@ -10,6 +10,7 @@ setup(
         "python-dotenv==1.0.0",
         "gunicorn==21.2.0",
         "kagglehub==0.2.5",
+        "numpy==1.26.4",
         "flask==2.0.1",
         "werkzeug==2.0.3",
         "google-generativeai==0.3.1",
@@ -2,20 +2,157 @@ import unittest
 import sys
 import os
 import logging
-from unittest.mock import MagicMock, patch
+import tempfile
+import asyncio
+import time
+import numpy as np
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from utils.config import load_config
 from database.mongo_client import MongoDBClient
-from ml.nlp_processor import process_text, is_telugu_text
-from ml.conversation_model import get_response
-from ml.ipl_stats import search_ipl_data
+from database import mongo_client
+from ml.nlp_processor import process_text, is_telugu_text, process_texts, detect_intents
+from ml.nlp_processor import detect_language, detect_languages
+from ml import conversation_model
+from ml.conversation_model import get_local_response, get_response
+from ml import ipl_stats
+from ml.ipl_stats import search_ipl_data, get_entity_resolver, get_ipl_store, get_ipl_stats, sample_ipl_data
+from ml.ipl_stats import dataset_ipl_data, get_leaderboard, parse_leaderboard_query, leaderboard_values
+from ml.ipl_stats import get_matchup, get_phase_split, phase_split_values
+from ml.ipl_stats import get_win_probability, parse_win_probability_query
+from ml.stats_engine import compute_leaderboard, top_k, compute_stats, all_time_stats, aggregate_leaderboard
+from ml.ipl_store import IPLStore
+from ml.ipl_records import PlayerRecord, compact_ipl_data, memory_report
+from ml.nlp_processor import extract_entities
+from ml.pattern_matcher import PatternMatcher
+from ml.custom_responses import CustomResponseStore
+from ml import intent_classifier
+from ml.intent_classifier import IntentClassifier, classify_intents, load_training_messages
+from ml.transliteration import to_roman, to_telugu, render_telugu
+from ml.response_templates import RenderCache, render
+from utils.ipl_dataset import IPLDataset, load_dataset, find_source_files, source_stamp
+from utils import data_loader
+from utils import ipl_partitions
+from utils.ipl_partitions import SeasonPartitions, load_partitions
+from utils.ipl_matchups import MatchupIndex, phase_of_over
+from utils import ipl_winprob
+from utils.ipl_winprob import WinProbabilityTable, innings_states, load_win_probability
+from utils.broadcast import BroadcastEngine, RateLimiter, BROADCASTS_COLLECTION
+from telethon.errors import FloodWaitError
+from telethon import events
+from utils import blacklist as blacklist_module
+from utils.blacklist import Blacklist, BloomFilter
+from handlers.blacklist_handler import setup_blacklist_handlers
+import app
+
+# The chat handler needs the Gemini client library
+try:
+    from handlers.message_handler import setup_message_handlers
+    from ml import gemini_ai
+except ImportError:
+    setup_message_handlers = None
+from utils import ipl_aggregates
+from utils.ipl_aggregates import IPLAggregates, load_aggregates, PLAYER_METRICS, TEAM_METRICS
 
 # Disable logging for tests
 logging.disable(logging.CRITICAL)
 
+# Three short matches in the Kaggle format: (id, season, city, date, venue,
+# team1, team2, toss winner, decision, winner, result, margin, player of the match)
+IPL_MATCHES = [
+    (101, '2023', 'Chennai', '2023-04-03', 'MA Chidambaram Stadium, Chennai', 'Chennai Super Kings',
+     'Mumbai Indians', 'Mumbai Indians', 'field', 'Chennai Super Kings', 'runs', 9, 'MS Dhoni'),
+    (102, '2024', 'Mumbai', '2024-04-10', 'Wankhede Stadium, Mumbai', 'Mumbai Indians',
+     'Royal Challengers Bengaluru', 'Mumbai Indians', 'field', 'Mumbai Indians', 'wickets', 10, 'JJ Bumrah'),
+    (103, '2024', 'Bengaluru', '2024-04-20', 'M Chinnaswamy Stadium', 'Royal Challengers Bengaluru',
+     'Chennai Super Kings', 'Chennai Super Kings', 'field', 'Royal Challengers Bengaluru', 'runs', 7, 'V Kohli'),
+]
+
+# Deliveries: (match id, inning, batting team, bowling team, over, ball,
+# batter, bowler, batter runs, extra runs, extras type, player dismissed, dismissal kind)
+IPL_DELIVERIES = [
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 0, 1, 'RD Gaikwad', 'JJ Bumrah', 4, 0, '', '', ''),
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 0, 2, 'RD Gaikwad', 'JJ Bumrah', 0, 1, 'wides', '', ''),
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 0, 3, 'RD Gaikwad', 'JJ Bumrah', 6, 0, '', '', ''),
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 0, 4, 'RD Gaikwad', 'JJ Bumrah', 0, 0, '', 'RD Gaikwad', 'bowled'),
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 1, 1, 'MS Dhoni', 'PP Chawla', 6, 0, '', '', ''),
+    (101, 1, 'Chennai Super Kings', 'Mumbai Indians', 1, 2, 'MS Dhoni', 'PP Chawla', 1, 0, '', '', ''),
+    (101, 2, 'Mumbai Indians', 'Chennai Super Kings', 0, 1, 'RG Sharma', 'DL Chahar', 1, 0, '', '', ''),
+    (101, 2, 'Mumbai Indians', 'Chennai Super Kings', 0, 2, 'Ishan Kishan', 'DL Chahar', 0, 0, '', 'Ishan Kishan', 'caught'),
+    (101, 2, 'Mumbai Indians', 'Chennai Super Kings', 1, 1, 'RG Sharma', 'RA Jadeja', 4, 0, '', '', ''),
+    (101, 2, 'Mumbai Indians', 'Chennai Super Kings', 1, 2, 'RG Sharma', 'RA Jadeja', 0, 4, 'legbyes', '', ''),
+    (102, 1, 'Royal Challengers Bengaluru', 'Mumbai Indians', 0, 1, 'V Kohli', 'JJ Bumrah', 4, 0, '', '', ''),
+    (102, 1, 'Royal Challengers Bengaluru', 'Mumbai Indians', 0, 2, 'V Kohli', 'JJ Bumrah', 0, 0, '', 'V Kohli', 'caught'),
+    (102, 1, 'Royal Challengers Bengaluru', 'Mumbai Indians', 0, 3, 'F du Plessis', 'JJ Bumrah', 2, 0, '', '', ''),
+    (102, 2, 'Mumbai Indians', 'Royal Challengers Bengaluru', 0, 1, 'RG Sharma', 'Mohammed Siraj', 6, 0, '', '', ''),
+    (102, 2, 'Mumbai Indians', 'Royal Challengers Bengaluru', 0, 2, 'RG Sharma', 'Mohammed Siraj', 1, 0, '', '', ''),
+    (103, 1, 'Royal Challengers Bengaluru', 'Chennai Super Kings', 0, 1, 'V Kohli', 'DL Chahar', 6, 0, '', '', ''),
+    (103, 1, 'Royal Challengers Bengaluru', 'Chennai Super Kings', 0, 2, 'V Kohli', 'DL Chahar', 4, 0, '', '', ''),
+    (103, 1, 'Royal Challengers Bengaluru', 'Chennai Super Kings', 0, 3, 'V Kohli', 'DL Chahar', 1, 0, '', '', ''),
+    (103, 2, 'Chennai Super Kings', 'Royal Challengers Bengaluru', 0, 1, 'MS Dhoni', 'Mohammed Siraj', 4, 0, '', '', ''),
+    (103, 2, 'Chennai Super Kings', 'Royal Challengers Bengaluru', 0, 2, 'MS Dhoni', 'Mohammed Siraj', 0, 0, '', 'MS Dhoni', 'lbw'),
+]
+
+def write_ipl_csvs(directory, legacy=False, match_ids=None):
+    """
+    Write IPL_MATCHES and IPL_DELIVERIES (or only the given matches) as Kaggle CSVs
+
+    legacy=True writes the older release layout: batsman column, 1-based
+    overs, win_by_runs/win_by_wickets and per-kind extras columns.
+    """
+    import csv
+
+    matches = [m for m in IPL_MATCHES if match_ids is None or m[0] in match_ids]
+    deliveries = [d for d in IPL_DELIVERIES if match_ids is None or d[0] in match_ids]
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    with open(directory / 'matches.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if legacy:
+            writer.writerow(['id', 'season', 'city', 'date', 'team1', 'team2', 'toss_winner', 'toss_decision',
+                             'result', 'dl_applied', 'winner', 'win_by_runs', 'win_by_wickets',
+                             'player_of_match', 'venue'])
+            for (match_id, season, city, day, venue, team1, team2, toss, decision,
+                 winner, result, margin, potm) in matches:
+                runs, wickets = (margin, 0) if result == 'runs' else (0, margin)
+                writer.writerow([match_id, season, city, day, team1, team2, toss, decision,
+                                 'normal', 0, winner, runs, wickets, potm, venue])
+        else:
+            writer.writerow(['id', 'season', 'city', 'date', 'match_type', 'player_of_match', 'venue',
+                             'team1', 'team2', 'toss_winner', 'toss_decision', 'winner', 'result',
+                             'result_margin'])
+            for (match_id, season, city, day, venue, team1, team2, toss, decision,
+                 winner, result, margin, potm) in matches:
+                writer.writerow([match_id, season, city, day, 'League', potm, venue,
+                                 team1, team2, toss, decision, winner, result, margin])
+
+    with open(directory / 'deliveries.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if legacy:
+            writer.writerow(['match_id', 'inning', 'batting_team', 'bowling_team', 'over', 'ball',
+                             'batsman', 'non_striker', 'bowler', 'wide_runs', 'legbye_runs',
+                             'batsman_runs', 'extra_runs', 'total_runs', 'player_dismissed', 'dismissal_kind'])
+            for (match_id, inning, batting, bowling, over, ball, batter, bowler,
+                 runs, extras, extras_type, dismissed, kind) in deliveries:
+                writer.writerow([match_id, inning, batting, bowling, over + 1, ball, batter, '', bowler,
+                                 extras if extras_type == 'wides' else 0,
+                                 extras if extras_type == 'legbyes' else 0,
+                                 runs, extras, runs + extras, dismissed, kind])
+        else:
+            writer.writerow(['match_id', 'inning', 'batting_team', 'bowling_team', 'over', 'ball',
+                             'batter', 'bowler', 'non_striker', 'batsman_runs', 'extra_runs',
+                             'total_runs', 'extras_type', 'is_wicket', 'player_dismissed', 'dismissal_kind'])
+            for (match_id, inning, batting, bowling, over, ball, batter, bowler,
+                 runs, extras, extras_type, dismissed, kind) in deliveries:
+                writer.writerow([match_id, inning, batting, bowling, over, ball, batter, bowler, '',
+                                 runs, extras, runs + extras, extras_type or 'NA',
+                                 1 if dismissed else 0, dismissed or 'NA', kind or 'NA'])
+
 class TestBotFunctionality(unittest.TestCase):
     """Test basic bot functionality"""
     
@@ -78,6 +215,31 @@ class TestBotFunctionality(unittest.TestCase):
         self.assertFalse(is_telugu_text("Hello, how are you?"))
         self.assertTrue(is_telugu_text("నమస్కారం, మీరు ఎలా ఉన్నారు?"))
     
+    def test_batch_nlp_processing(self):
+        """Test lazy batch normalization and intent detection"""
+        messages = ["Who won the MATCH?!", "నమస్కారం, మీరు!", "", "Player   Kohli"]
+
+        processed = process_texts(iter(messages))
+        self.assertEqual(next(processed), "who won the match")
+        self.assertEqual(list(processed), ["నమస్కారం మీరు", "", "player kohli"])
+
+        self.assertEqual(
+            list(detect_intents(messages)),
+            ['match_info', 'conversation', 'conversation', 'player_info']
+        )
+
+    def test_language_detection(self):
+        """Test English, Telugu script and romanized Telugu identification"""
+        self.assertEqual(detect_language("meeru ela unnaru"), 'telugu_roman')
+        self.assertEqual(detect_language("ee roju match evaru gelicharu?"), 'telugu_roman')
+        self.assertEqual(detect_language("Who won the match yesterday?"), 'english')
+        self.assertEqual(detect_language("నమస్కారం, మీరు ఎలా ఉన్నారు?"), 'telugu')
+        self.assertEqual(detect_language("ok"), 'english')
+        self.assertEqual(
+            list(detect_languages(["naaku cricket ante chala istam", "I really like this team", ""])),
+            ['telugu_roman', 'english', 'english']
+        )
+
     def test_conversation_model(self):
         """Test conversation model"""
         # Test English responses
@@ -104,5 +266,919 @@ class TestBotFunctionality(unittest.TestCase):
         if team:
             self.assertEqual(team['name'], 'CSK')
 
+    def test_pattern_matcher(self):
+        """Test learned pattern lookup and match priority"""
+        matcher = PatternMatcher({'who won': 'first', 'csk': 'second'})
+        matcher.add('who won the final', 'longest')
+        matcher.add('CSK', 'replaced')
+
+        self.assertEqual(len(matcher), 3)
+        self.assertIn('Who Won', matcher)
+        self.assertEqual(matcher.match('Tell me who won the final'), 'longest')
+        self.assertEqual(matcher.match('who won yesterday'), 'first')
+        self.assertEqual(matcher.match('csk fans'), 'replaced')
+        self.assertIsNone(matcher.match('nothing here'))
+
+        # Equal-length matches go to the pattern added first
+        tie = PatternMatcher({'abc': 'one', 'xyz': 'two'})
+        self.assertEqual(tie.match('xyz abc'), 'one')
+
+    def test_learned_response_journal(self):
+        """Test journaled persistence of learned responses"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_path = Path(temp_dir) / 'learned_responses.json'
+            journal_path = Path(temp_dir) / 'learned_responses.jsonl'
+
+            with patch.object(conversation_model, 'LEARNED_RESPONSES_PATH', snapshot_path), \
+                 patch.object(conversation_model, 'LEARNED_RESPONSES_JOURNAL_PATH', journal_path), \
+                 patch.object(conversation_model, 'JOURNAL_COMPACT_THRESHOLD', 3), \
+                 patch.object(conversation_model, 'learned_responses', {'english': {}, 'telugu': {}}), \
+                 patch.object(conversation_model, 'learned_matchers', {}):
+                try:
+                    conversation_model.learn_response("who is the best captain", "MS Dhoni")
+                    conversation_model.learn_response("favourite team", "CSK")
+                    self.assertTrue(journal_path.exists())
+                    self.assertFalse(snapshot_path.exists())
+
+                    # Third entry reaches the threshold and compacts the journal
+                    conversation_model.learn_response("best opener", "Rohit Sharma")
+                    self.assertTrue(snapshot_path.exists())
+                    self.assertFalse(journal_path.exists())
+
+                    conversation_model.learn_response("best finisher", "Dhoni")
+                    conversation_model._close_journal()
+
+                    # A truncated trailing line is ignored on replay
+                    with open(journal_path, 'a', encoding='utf-8') as f:
+                        f.write('{"language": "english", "patt')
+
+                    conversation_model.learned_responses = {'english': {}, 'telugu': {}}
+                    conversation_model.load_learned_responses()
+
+                    self.assertEqual(len(conversation_model.learned_responses['english']), 4)
+                    self.assertEqual(get_response("who is the best finisher", "english"), "Dhoni")
+                finally:
+                    conversation_model._close_journal()
+
+    def test_entity_resolver(self):
+        """Test alias and fuzzy resolution of player and team names"""
+        resolver = get_entity_resolver()
+
+        self.assertEqual(resolver.best('vk', 'player'), 'virat kohli')
+        self.assertEqual(resolver.best('King Kohli', 'player'), 'virat kohli')
+        self.assertEqual(resolver.best('viraat kohly', 'player'), 'virat kohli')
+        self.assertEqual(resolver.best('chennai', 'team'), 'csk')
+        self.assertIsNone(resolver.best('zzzz', 'player'))
+
+        candidates = resolver.resolve('bumra')
+        self.assertEqual(candidates[0][:2], ('player', 'jasprit bumrah'))
+        self.assertTrue(0 < candidates[0][2] < 1)
+
+        # Misspelled names hit local data; unknown names no longer invent records
+        self.assertEqual(search_ipl_data('player', 'rohith sharma')['name'], 'Rohit Sharma')
+        self.assertIsNone(search_ipl_data('player', 'nobody at all'))
+        self.assertEqual(search_ipl_data('match', 'mumbai vs chennai')['date'], '2023-05-06')
+
+        entities = extract_entities("how is csk vs kolkata looking", 'match_info', resolver=resolver)
+        self.assertEqual(entities, {'team1': 'csk', 'team2': 'kkr'})
+
+    def test_ipl_store(self):
+        """Test the indexed IPL store shared by chat and commands"""
+        store = get_ipl_store()
+
+        self.assertEqual(store.get_player('thala')['name'], 'MS Dhoni')
+        self.assertEqual(store.get_team('Royal Challengers')['name'], 'RCB')
+        self.assertEqual(
+            sorted(p['name'] for p in store.get_team_players('mumbai')),
+            ['Jasprit Bumrah', 'Rohit Sharma']
+        )
+        self.assertEqual(store.get_match('kolkata', 'rcb')['result'], 'KKR won by 21 runs')
+        self.assertIsNone(store.get_match('csk', 'rcb'))
+
+        # Free-text answers come from the store, not from placeholder data
+        response = get_response("tell me about the player kohli", "english")
+        self.assertIn("Virat Kohli", response)
+        self.assertIn("Runs: 6624", response)
+
+    def test_custom_responses(self):
+        """Test the in-memory custom response matcher and its version stamp"""
+        db_client = MongoDBClient({})
+        db_client.get_collection('custom_responses').insert_one(
+            {'trigger': 'who is thala', 'response': 'MS Dhoni, of course!'}
+        )
+
+        serving = CustomResponseStore()
+        self.assertTrue(serving.load(db_client))
+        self.assertEqual(serving.match("Hey, who is Thala?"), 'MS Dhoni, of course!')
+        self.assertIsNone(serving.match("hello"))
+
+        # A write through another instance reaches this one on the next refresh
+        admin = CustomResponseStore()
+        admin.load(db_client)
+        db_client.get_collection('custom_responses').insert_one(
+            {'trigger': 'best team', 'response': 'CSK!'}
+        )
+        admin.update(db_client, 'best team', 'CSK!')
+        self.assertEqual(admin.match("the best team ever"), 'CSK!')
+
+        self.assertIsNone(serving.match("the best team ever"))
+        self.assertTrue(serving.refresh(db_client))
+        self.assertEqual(serving.match("the best team ever"), 'CSK!')
+        self.assertFalse(serving.refresh(db_client))
+
+    def test_intent_classifier(self):
+        """Test training, persisting and routing with the local intent classifier"""
+        # Logged messages are labelled by the keyword rules, leaving out the
+        # ones the rules cannot place
+        db_client = MongoDBClient({})
+        messages = db_client.get_collection('messages')
+        for text in ["match result please", "csk vs mi score", "tell me about player bumrah",
+                     "how good is dhoni", "good night", "/start"]:
+            messages.insert_one({'text': text, 'is_bot_response': False})
+        messages.insert_one({'text': "Here's the score", 'is_bot_response': True})
+        logged, labels = load_training_messages(db_client)
+        self.assertEqual(labels, ['match_info', 'match_info', 'player_info'])
+
+        # Hand-labelled examples cover what the rules miss
+        texts = logged * 20 + (
+            ["who won csk vs mi", "result of rcb against kkr", "score in mi vs dc"] * 20 +
+            ["how good is kohli", "is dhoni a good batsman", "tell me about bumrah"] * 20 +
+            ["how are you", "good night", "you are funny"] * 20
+        )
+        intents = labels * 20 + ['match_info'] * 60 + ['player_info'] * 60 + ['conversation'] * 60
+        model = IntentClassifier.train(texts, intents, epochs=40, num_buckets=2 ** 12)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'intent_model.npz'
+            model.save(path)
+            loaded = IntentClassifier.load(path)
+
+        probabilities = loaded.predict_proba(["who wun csk vs rcb", "how good is dhoni"])
+        self.assertEqual(probabilities.shape, (2, 3))
+        self.assertEqual([intent for intent, _ in loaded.predict(["who wun csk vs rcb"])], ['match_info'])
+
+        with patch.object(intent_classifier, 'intent_classifier', loaded):
+            routed = classify_intents(["match result please", "how good is dhoni", "good night"])
+
+        # Keyword rules win outright; the classifier recovers what they miss
+        self.assertEqual(list(detect_intents(["how good is dhoni"])), ['conversation'])
+        self.assertEqual(routed[0], ('match_info', 1.0))
+        self.assertEqual(routed[1][0], 'player_info')
+        self.assertGreater(routed[1][1], 0.6)
+        self.assertEqual(routed[2][0], 'conversation')
+
+        # Confident non-conversation intents are answered locally; the rest go to Gemini
+        with patch.object(intent_classifier, 'intent_classifier', loaded):
+            self.assertIn("Here's information about MS Dhoni", get_local_response("how good is dhoni"))
+            self.assertIsNone(get_local_response("how good is dhoni", threshold=1.0))
+            self.assertIsNone(get_local_response("good night"))
+
+    def test_transliteration(self):
+        """Test Telugu script transliteration in both directions"""
+        # Strict romanization round-trips Telugu words
+        for word in conversation_model.conversation_data['telugu']['greetings']:
+            for token in word.split():
+                if any('\u0c00' <= char <= '\u0c7f' for char in token):
+                    self.assertEqual(to_telugu(to_roman(token, strict=True), strict=True), token)
+
+        # Readable romanization is what users type
+        self.assertEqual(to_roman('నమస్కారం'), 'namaskaaram')
+        self.assertEqual(to_telugu('amma'), 'అమ్మ')
+        self.assertEqual(to_telugu('dhanyavaadaalu'), 'ధన్యవాదాలు')
+
+        # English words in romanized Telugu stay in Latin letters
+        self.assertEqual(to_telugu('IPL lo csk gelichindi'), 'IPL లొ csk గెలిచింది')
+        self.assertEqual(to_telugu('kohli aadaadu', resolver=get_entity_resolver()), 'kohli ఆదాదు')
+
+        # Rendering keeps Telugu script or romanizes, leaving Latin text alone
+        self.assertEqual(render_telugu('IPL నమస్కారం!', 'telugu'), 'IPL నమస్కారం!')
+        self.assertEqual(render_telugu('IPL నమస్కారం!'), 'IPL namaskaaram!')
+
+    def test_response_templates(self):
+        """Test the template catalog and the rendered-output cache"""
+        player = dict(get_ipl_store().get_player('Virat Kohli'), strike_rate='130.0')
+
+        card = render('player_card', player)
+        self.assertTrue(card.startswith("🏏 **Virat Kohli**\n\n• Team: RCB\n"))
+        self.assertIn("• Strike Rate: 130.0\n", card)
+        self.assertNotIn("Average", card)
+        self.assertTrue(card.endswith("\n\n_Data from local database - may not be current_"))
+
+        # Missing required fields show a placeholder; unknown languages fall back to English
+        self.assertIn("Role: N/A", render('player_info', {'name': 'X'}, 'hindi'))
+        self.assertIn("జట్టు: RCB", render('player_info', player, 'telugu'))
+
+        cache = RenderCache(maxsize=2)
+        first = cache.get('player_info', 'virat kohli', 1, lambda: player)
+        self.assertIs(cache.get('player_info', 'virat kohli', 1, lambda: {}), first)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # A new data version renders again, and the LRU stays bounded
+        cache.get('player_info', 'virat kohli', 2, player)
+        cache.get('player_info', 'virat kohli', 2, player, 'telugu')
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(len(cache), 2)
+
+    def test_ipl_dataset(self):
+        """Test parsing the Kaggle CSVs into columns and the memory-mapped cache"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_dir, cache_dir = Path(temp_dir) / 'ipl', Path(temp_dir) / 'cache'
+            write_ipl_csvs(source_dir)
+            write_ipl_csvs(Path(temp_dir) / 'legacy', legacy=True)
+
+            dataset = load_dataset(source_dir, cache_dir)
+            self.assertEqual((dataset.num_matches, dataset.num_deliveries), (3, len(IPL_DELIVERIES)))
+            self.assertIsInstance(dataset.deliveries['batter'], np.memmap)
+            self.assertEqual(dataset.seasons, [2023, 2024])
+
+            # Renamed franchises and venue suffixes are normalized
+            self.assertIn('Royal Challengers Bangalore', dataset.teams)
+            self.assertIn('Wankhede Stadium', dataset.venues)
+            self.assertEqual(dataset.team_id('Royal Challengers Bengaluru'), dataset.team_id('Royal Challengers Bangalore'))
+
+            first = slice(dataset.match_offsets[0], dataset.match_offsets[1])
+            self.assertEqual(int(dataset.deliveries['total_runs'][first].sum()), 18 + 9)
+            self.assertEqual(dataset.teams[dataset.matches['winner'][2]], 'Royal Challengers Bangalore')
+
+            # The legacy layout (1-based overs, split margins) parses to the same columns
+            legacy = IPLDataset.from_csv(Path(temp_dir) / 'legacy' / 'matches.csv',
+                                         Path(temp_dir) / 'legacy' / 'deliveries.csv')
+            for name in ('over', 'batter_runs', 'total_runs', 'is_wicket'):
+                np.testing.assert_array_equal(legacy.deliveries[name], dataset.deliveries[name])
+            np.testing.assert_array_equal(legacy.matches['result_margin'], dataset.matches['result_margin'])
+            self.assertEqual(legacy.extras_types, dataset.extras_types)
+
+            # An unchanged source reuses the cache without parsing
+            with patch.object(IPLDataset, 'from_csv', side_effect=AssertionError):
+                self.assertEqual(load_dataset(source_dir, cache_dir).num_deliveries, len(IPL_DELIVERIES))
+
+            # Without CSVs the cache is still served
+            self.assertEqual(load_dataset(Path(temp_dir) / 'missing', cache_dir).num_matches, 3)
+            self.assertIsNone(load_dataset(Path(temp_dir) / 'missing', Path(temp_dir) / 'nocache'))
+
+    def test_ipl_stats_engine(self):
+        """Test vectorized, memoized statistics over the ball-by-ball dataset"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, Path(temp_dir) / 'cache')
+            store = IPLStore(sample_ipl_data, version=99, dataset=dataset)
+
+            with patch.object(ipl_stats, 'ipl_store', store):
+                stats = get_ipl_stats()
+                self.assertEqual(stats['total_matches'], 3)
+                self.assertEqual((stats['highest_score_team'], stats['highest_score']), ('Chennai Super Kings', 18))
+                self.assertEqual((stats['most_runs_player'], stats['most_runs']), ('V Kohli', 15))
+                self.assertEqual((stats['highest_individual_score_player'], stats['highest_individual_score']), ('V Kohli', 11))
+                self.assertEqual((stats['most_wickets_player'], stats['most_wickets']), ('JJ Bumrah', 2))
+
+                # Leg byes are not charged to the bowler; wides are
+                self.assertEqual((stats['best_bowling_player'], stats['best_bowling_figures']), ('DL Chahar', '1/1'))
+
+                # Memoized per data version
+                self.assertIs(get_ipl_stats(), stats)
+
+                season = get_ipl_stats(season=2024)
+                self.assertEqual((season['total_matches'], season['most_runs_player']), (2, 'V Kohli'))
+
+                team = get_ipl_stats(team='MI')
+                self.assertEqual((team['total_matches'], team['most_runs_player'], team['most_runs']), (2, 'RG Sharma', 12))
+                self.assertEqual((team['highest_score_team'], team['highest_score']), ('Mumbai Indians', 9))
+
+                self.assertEqual(get_ipl_stats(venue='wankhede')['total_matches'], 1)
+                self.assertIsNone(get_ipl_stats(venue='Lords'))
+
+    def test_ipl_aggregates(self):
+        """Test materialized aggregates, their snapshot and incremental rebuilds"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_ipl_csvs(Path(temp_dir) / 'ipl')
+            cache_dir = Path(temp_dir) / 'cache'
+            dataset = load_dataset(Path(temp_dir) / 'ipl', cache_dir)
+            aggregates = load_aggregates(dataset, cache_dir)
+
+            kohli = aggregates.player_record(dataset.player_id('V Kohli'))
+            self.assertEqual((kohli['matches'], kohli['runs'], kohli['balls_faced'], kohli['outs']), (2, 15, 5, 1))
+            self.assertEqual((kohli['fours'], kohli['sixes'], kohli['highest']), (2, 1, 11))
+            self.assertEqual((kohli['average'], kohli['strike_rate'], kohli['team']), (15.0, 300.0, 'Royal Challengers Bangalore'))
+
+            # Wides are not legal balls but are charged; leg byes are neither charged nor wides
+            bumrah = aggregates.player_record(dataset.player_id('JJ Bumrah'))
+            self.assertEqual((bumrah['wickets'], bumrah['balls_bowled'], bumrah['runs_conceded']), (2, 6, 17))
+            self.assertEqual(aggregates.player_record(dataset.player_id('RG Sharma'))['average'], None)
+
+            mi = dataset.team_id('Mumbai Indians')
+            self.assertEqual(aggregates.team_record(mi)['played'], 2)
+            self.assertEqual(aggregates.team_record(mi, season=2023)['lost'], 1)
+            self.assertEqual(aggregates.team_record(mi, season=2024)['win_percentage'], 100.0)
+
+            # An unchanged dataset is served from the snapshot
+            with patch.object(IPLAggregates, 'build', side_effect=AssertionError):
+                self.assertEqual(load_aggregates(dataset, cache_dir).seasons, [2023, 2024])
+
+            # Appending a season reuses the old seasons and matches a full rebuild
+            write_ipl_csvs(Path(temp_dir) / 'old', match_ids={101})
+            old = IPLAggregates.build(load_dataset(Path(temp_dir) / 'old', Path(temp_dir) / 'old_cache'))
+            with patch.object(ipl_aggregates, 'compute_season_aggregates',
+                              wraps=ipl_aggregates.compute_season_aggregates) as compute:
+                incremental = IPLAggregates.build(dataset, previous=old)
+                self.assertEqual(compute.call_args[0][1], [2024])
+            for metric in PLAYER_METRICS:
+                np.testing.assert_array_equal(incremental.players[metric], aggregates.players[metric])
+            for metric in TEAM_METRICS:
+                np.testing.assert_array_equal(incremental.teams[metric], aggregates.teams[metric])
+
+            # A corrected name changes only its season's fingerprint, and that season is rebuilt
+            write_ipl_csvs(Path(temp_dir) / 'renamed')
+            deliveries_csv = Path(temp_dir) / 'renamed' / 'deliveries.csv'
+            deliveries_csv.write_text(deliveries_csv.read_text().replace('F du Plessis', 'Faf du Plessis'))
+            corrected = load_dataset(Path(temp_dir) / 'renamed', Path(temp_dir) / 'renamed_cache')
+            fingerprints = ipl_aggregates.season_fingerprints(corrected, corrected.seasons)
+            self.assertTrue(np.array_equal(fingerprints[0], aggregates.fingerprints[0]))
+            self.assertFalse(np.array_equal(fingerprints[1], aggregates.fingerprints[1]))
+            rebuilt = IPLAggregates.build(corrected, previous=aggregates)
+            fresh = IPLAggregates.build(corrected)
+            self.assertEqual(rebuilt.player_record(corrected.player_id('Faf du Plessis'))['balls_faced'], 1)
+            for metric in PLAYER_METRICS:
+                np.testing.assert_array_equal(rebuilt.players[metric], fresh.players[metric])
+
+            # The IPL store serves the materialized records
+            dataset.aggregates = aggregates
+            store = IPLStore(dataset_ipl_data(dataset), dataset=dataset)
+            player = store.get_player('virat kohli')
+            self.assertEqual((player['name'], player['team'], player['runs']), ('V Kohli', 'RCB', 15))
+            team = store.get_team('mumbai')
+            self.assertEqual((team['captain'], team['matches_played'], team['wins']), ('Rohit Sharma', 2, 1))
+
+            # Matches without a team1 or venue are left out of the home grounds
+            write_ipl_csvs(Path(temp_dir) / 'blank')
+            matches_csv = Path(temp_dir) / 'blank' / 'matches.csv'
+            matches_csv.write_text(matches_csv.read_text()
+                                   .replace('M Chinnaswamy Stadium,Royal Challengers Bengaluru,', 'M Chinnaswamy Stadium,,')
+                                   .replace('Wankhede Stadium, Mumbai', ''))
+            blank = load_dataset(Path(temp_dir) / 'blank', Path(temp_dir) / 'blank_cache')
+            self.assertEqual((blank.matches['team1'][2], blank.matches['venue'][1]), (-1, -1))
+            blank.aggregates = IPLAggregates.build(blank)
+            teams = dataset_ipl_data(blank, base={'teams': {}})['teams']
+            self.assertEqual(teams['csk'].home_ground, 'MA Chidambaram Stadium')
+            self.assertIsNone(teams['mi'].home_ground)
+
+    def test_head_to_head_index(self):
+        """Test the fixture, venue and season match indexes"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, Path(temp_dir) / 'cache')
+            dataset.aggregates = load_aggregates(dataset, Path(temp_dir) / 'cache')
+            store = IPLStore(dataset_ipl_data(dataset), dataset=dataset)
+
+        record = store.head_to_head('mumbai', 'rcb')
+        self.assertEqual((record['team1'], record['team2'], record['played']), ('MI', 'RCB', 1))
+        self.assertEqual((record['team1_wins'], record['team2_wins'], record['no_result']), (1, 0, 0))
+        self.assertEqual(record['recent'][0]['result'], 'MI won by 10 wickets')
+        self.assertIsNone(store.head_to_head('csk', 'kkr'))
+        self.assertIsNone(store.head_to_head('csk', 'chennai'))
+
+        self.assertEqual([m['date'] for m in store.get_season_matches(2024)], ['2024-04-20', '2024-04-10'])
+        self.assertEqual(store.get_venue_matches('Wankhede Stadium')[0]['team2'], 'RCB')
+        self.assertEqual(len(store.get_matches('rcb', 'csk', limit=5)), 1)
+
+        # Sample records without a winner field use the result text
+        sample = get_ipl_store().head_to_head('kkr', 'csk')
+        self.assertEqual((sample['team1_wins'], sample['team2_wins']), (0, 1))
+
+    def test_compact_records(self):
+        """Test slotted IPL records with typed fields and interned names"""
+        store = IPLStore(sample_ipl_data)
+        player = store.get_player('virat kohli')
+        self.assertIsInstance(player, PlayerRecord)
+        self.assertEqual((player['runs'], player.get('average')), (6624, None))
+        self.assertEqual(dict(player)['team'], 'RCB')
+        self.assertNotIn('coach', store.get_team('csk'))
+        self.assertFalse(hasattr(player, '__dict__'))
+        with self.assertRaises(AttributeError):
+            player.runs = 0
+
+        # Repeated strings are shared between records
+        bumrah = store.get_player('jasprit bumrah')
+        self.assertIs(store.get_player('rohit sharma')['team'], bumrah['team'])
+        self.assertIs(compact_ipl_data(store.data)['players']['virat kohli'], player)
+
+        report = memory_report(sample_ipl_data)
+        self.assertEqual(report['players']['records'], 4)
+        for section in report.values():
+            self.assertLess(section['bytes_records'], section['bytes_dicts'])
+
+    def test_leaderboards(self):
+        """Test top-k leaderboards over the ball-by-ball dataset"""
+        values = np.array([3.0, np.nan, 9.0, 1.0, 9.0, 5.0])
+        self.assertEqual(top_k(values, 3).tolist(), [2, 4, 5])
+        self.assertEqual(top_k(values, 2, lowest=True).tolist(), [3, 0])
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, Path(temp_dir) / 'cache')
+            store = IPLStore(sample_ipl_data, version=99, dataset=dataset)
+
+            def names(rows):
+                return [(dataset.players[player], value) for player, value in rows]
+
+            # Wides are charged to the bowler, leg byes are not
+            economy = compute_leaderboard(dataset, 'economy', k=2, min_balls=1)
+            self.assertEqual(names(economy), [('RA Jadeja', 12.0), ('DL Chahar', 14.4)])
+            self.assertEqual(compute_leaderboard(dataset, 'economy', phase='death', min_balls=1), [])
+
+            with patch.object(ipl_stats, 'ipl_store', store):
+                runs = get_leaderboard('runs', k=2)
+                self.assertEqual(runs, [{'name': 'V Kohli', 'value': 15}, {'name': 'RG Sharma', 'value': 12}])
+                self.assertIs(get_leaderboard('runs', k=2), runs)
+
+                self.assertEqual(get_leaderboard('runs', team='MI'), [{'name': 'RG Sharma', 'value': 12}])
+                self.assertEqual(get_leaderboard('wickets', season=2024, k=1), [{'name': 'JJ Bumrah', 'value': 1}])
+                self.assertIsNone(get_leaderboard('economy', venue='Lords'))
+                self.assertIsNone(get_leaderboard('catches'))
+
+                query = parse_leaderboard_query(store, "best economy at Wankhede in the death overs")
+                self.assertEqual((query['metric'], query['venue'], query['phase']), ('economy', 'wankhede', 'death'))
+                query = parse_leaderboard_query(store, "top 5 run scorers for mi 2024")
+                self.assertEqual((query['metric'], query['team'], query['season'], query['k']), ('runs', 'MI', 2024, 5))
+                self.assertEqual(parse_leaderboard_query(store, "sixes chinnaswamy")['venue'], 'chinnaswamy')
+                self.assertIsNone(parse_leaderboard_query(store, "who is the best"))
+
+                # An unknown venue is not dropped from the query
+                unknown = parse_leaderboard_query(store, "best economy at Eden Gardens")
+                self.assertEqual(unknown['venue'], 'eden gardens')
+                self.assertIsNone(get_leaderboard(**unknown))
+                self.assertNotIn("Top", get_response("best economy at Eden Gardens"))
+                death = parse_leaderboard_query(store, "best economy at the death")
+                self.assertEqual((death['venue'], death['phase']), (None, 'death'))
+
+                self.assertEqual(
+                    leaderboard_values(query, get_leaderboard(**query))['title'], 'Top 1: Runs (2024, MI)'
+                )
+                self.assertIn('1. V Kohli - 15', get_response("top 10 run scorers"))
+
+        # Leaderboard words only count as whole words, and a message naming
+        # a player falls through to the player card
+        self.assertEqual(
+            list(detect_intents(["almost won the match csk vs mi", "stop the match score"])), ['match_info', 'match_info']
+        )
+        self.assertEqual(list(detect_intents(["csk scorecard", "kohli's ipl statsguru"])), ['match_info', 'stats_info'])
+        self.assertIn("CSK vs MI", get_response("almost won the match csk vs mi"))
+        self.assertIn(
+            "Here's information about Virat Kohli", get_response("tell me about player virat kohli the best batsman")
+        )
+
+    def test_season_partitions(self):
+        """Test lazily loaded season partitions and all-time figures from aggregates"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / 'cache'
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, cache_dir)
+            dataset.aggregates = load_aggregates(dataset, cache_dir)
+            dataset.partitions = load_partitions(dataset, cache_dir, compute_stats)
+
+            # Unchanged seasons are not summarized again, and only the index is written
+            summarize = MagicMock(side_effect=AssertionError)
+            self.assertEqual(load_partitions(dataset, cache_dir, summarize).seasons, [2023, 2024])
+            self.assertEqual(os.listdir(cache_dir / ipl_partitions.PARTITIONS_DIR), [ipl_partitions.PARTITION_INDEX])
+
+            # All-time figures and leaderboards without scanning deliveries
+            self.assertEqual(all_time_stats(dataset), compute_stats(dataset))
+            for metric in ('runs', 'sixes', 'average', 'strike_rate', 'wickets', 'economy'):
+                for season in (None, 2024):
+                    self.assertEqual(
+                        aggregate_leaderboard(dataset.aggregates, metric, season, min_balls=1),
+                        compute_leaderboard(dataset, metric, season, min_balls=1),
+                    )
+
+            # A season's partition gives the same figures as the full dataset
+            partitions = SeasonPartitions(dataset.partitions.directory, dataset, dataset.partitions.index, maxsize=1)
+            view = partitions.view(2024)
+            self.assertEqual(view.num_deliveries, 10)
+            self.assertTrue(np.shares_memory(view.deliveries['batter'], dataset.deliveries['batter']))
+            self.assertEqual(compute_stats(view, 2024, dataset.team_id('Mumbai Indians')),
+                             compute_stats(dataset, 2024, dataset.team_id('Mumbai Indians')))
+
+            # Least recently used seasons are dropped
+            partitions.view(2023)
+            partitions.view(2023)
+            self.assertEqual((partitions.loads, partitions.hits, partitions.evictions), (2, 1, 1))
+            self.assertEqual(list(partitions.loaded), [2023])
+
+            store = IPLStore(sample_ipl_data, version=99, dataset=dataset)
+            with patch.object(ipl_stats, 'ipl_store', store), \
+                    patch.object(ipl_stats, 'compute_stats', side_effect=AssertionError):
+                self.assertEqual(get_ipl_stats()['most_runs_player'], 'V Kohli')
+                self.assertEqual(get_leaderboard('wickets', k=1), [{'name': 'JJ Bumrah', 'value': 2}])
+
+    def test_matchup_index(self):
+        """Test batter-vs-bowler matchups and phase splits from the matchup index"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / 'cache'
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, cache_dir)
+            dataset.aggregates = load_aggregates(dataset, cache_dir)
+            dataset.matchups = MatchupIndex.build(dataset)
+
+            self.assertEqual(phase_of_over(np.array([0, 5, 6, 14, 15, 19, 20])).tolist(), [0, 0, 1, 1, 2, 2, 2])
+
+            # Wides are not balls faced; only the bowler's wickets are dismissals
+            store = IPLStore(dataset_ipl_data(dataset), version=7, dataset=dataset)
+            with patch.object(ipl_stats, 'ipl_store', store):
+                record = get_matchup('RD Gaikwad', 'JJ Bumrah')
+                self.assertEqual(
+                    {key: record[key] for key in ('runs', 'balls', 'dismissals', 'fours', 'sixes', 'dots')},
+                    {'runs': 10, 'balls': 3, 'dismissals': 1, 'fours': 1, 'sixes': 1, 'dots': 1},
+                )
+                self.assertEqual((record['strike_rate'], record['average']), (333.33, 10.0))
+
+                record = get_matchup('kohli', 'Bumrah')
+                self.assertEqual((record['batter'], record['runs'], record['balls'], record['dismissals']),
+                                 ('V Kohli', 4, 2, 1))
+                self.assertIsNone(get_matchup('JJ Bumrah', 'V Kohli'))
+
+                split = get_phase_split('JJ Bumrah')
+                self.assertEqual(
+                    {key: split['phases']['powerplay'][key] for key in ('runs_conceded', 'balls_bowled', 'wickets')},
+                    {'runs_conceded': 17, 'balls_bowled': 6, 'wickets': 2},
+                )
+                self.assertEqual(split['phases']['death']['balls_bowled'], 0)
+                values = phase_split_values(split)
+                self.assertIsNone(values['batting'])
+                self.assertIn('Powerplay: 2 wickets', values['bowling'])
+                self.assertIn('**JJ Bumrah by phase**', render('phase_card', values))
+
+            # Batting phase splits agree with the phase leaderboards
+            self.assertEqual(
+                compute_leaderboard(dataset, 'runs', phase='powerplay', k=1),
+                [(dataset.player_id('V Kohli'), float(dataset.matchups.phases['runs'][0, dataset.player_id('V Kohli')]))],
+            )
+
+    def test_win_probability(self):
+        """Test the smoothed win-probability table and situation parsing"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / 'cache'
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, cache_dir)
+            dataset.aggregates = load_aggregates(dataset, cache_dir)
+
+            # State before each delivery (wides are not balls): CSK set 18 in match 101, so MI needed 19
+            inning, balls, runs, wickets, outcome = innings_states(dataset)
+            self.assertEqual((inning[0], balls[0], runs[0], wickets[0], outcome[0]), (1, 120, 0, 10, 1.0))
+            self.assertEqual((inning[6], balls[6], runs[6], wickets[6], outcome[6]), (2, 120, 19, 10, 0.0))
+            self.assertEqual((balls[3], runs[3], wickets[3]), (118, 11, 10))
+
+            dataset.win_probability = load_win_probability(dataset, cache_dir)
+            table = dataset.win_probability
+            self.assertEqual(table.lookup(2, 30, 0, 5), 1.0)
+            self.assertEqual(table.lookup(2, 0, 10, 5), 0.0)
+            self.assertEqual(table.lookup(2, 30, 10, 0), 0.0)
+            self.assertTrue(0 < table.lookup(2, 24, 50) < 1)
+            self.assertGreaterEqual(table.lookup(2, 24, 30, 6), table.lookup(2, 24, 50, 6))
+            self.assertGreaterEqual(table.lookup(2, 36, 50, 6), table.lookup(2, 24, 50, 6))
+            self.assertGreaterEqual(table.lookup(2, 24, 50, 8), table.lookup(2, 24, 50, 6))
+            self.assertGreaterEqual(table.lookup(1, 48, 140, 7), table.lookup(1, 48, 120, 7))
+
+            # An unchanged dataset reuses the saved table
+            with patch.object(WinProbabilityTable, 'build', side_effect=AssertionError):
+                self.assertTrue(np.array_equal(load_win_probability(dataset, cache_dir).table, table.table))
+
+            store = IPLStore(dataset_ipl_data(dataset), version=5, dataset=dataset)
+            self.assertEqual(
+                parse_win_probability_query(store, "what are CSK's chances chasing 180 with 50 needed off 24"),
+                {'team': 'CSK', 'innings': 2, 'balls_remaining': 24, 'runs': 50, 'wickets_in_hand': None},
+            )
+            self.assertEqual(
+                parse_win_probability_query(store, "chasing 180, 130/4 after 16 overs"),
+                {'team': None, 'innings': 2, 'balls_remaining': 24, 'runs': 50, 'wickets_in_hand': 6},
+            )
+            self.assertEqual(
+                parse_win_probability_query(store, "MI 120/3 after 12.3 overs"),
+                {'team': 'MI', 'innings': 1, 'balls_remaining': 45, 'runs': 120, 'wickets_in_hand': 7},
+            )
+            self.assertIsNone(parse_win_probability_query(store, "what are CSK's chances this season"))
+
+            with patch.object(ipl_stats, 'ipl_store', store):
+                self.assertEqual(get_win_probability(2, 24, 50, 6), table.lookup(2, 24, 50, 6))
+                response = get_response("CSK chances? need 50 off 4 overs, 6 wickets left")
+                self.assertIn(f"**CSK: {round(table.lookup(2, 24, 50, 6) * 100)}% to win**", response)
+                self.assertIn("Needing 50 off 4 overs, 6 wickets in hand", response)
+
+                # Chat messages are parsed with their punctuation, before Gemini is asked
+                for message in ("CSK need 50 off 24 with 6 wickets in hand", "MI 120/3 after 12 overs"):
+                    self.assertIn("% to win**", get_local_response(message))
+                self.assertIsNone(get_local_response("how are you"))
+
+                # 'chance' without a match situation is not a win-probability question
+                self.assertIsNone(parse_win_probability_query(store, "what are my chances of meeting dhoni"))
+                response = get_response("what are my chances of meeting dhoni")
+                self.assertNotIn("to win", response)
+                self.assertIn("Here's information about MS Dhoni", response)
+
+    @unittest.skipIf(setup_message_handlers is None, "google-generativeai is not installed")
+    def test_local_answers_before_gemini(self):
+        """Test that the chat handler answers IPL questions locally before asking Gemini"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache_dir = Path(temp_dir) / 'cache'
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, cache_dir)
+            dataset.aggregates = load_aggregates(dataset, cache_dir)
+            dataset.win_probability = load_win_probability(dataset, cache_dir)
+            store = IPLStore(dataset_ipl_data(dataset), version=5, dataset=dataset)
+
+        handlers = []
+        client = MagicMock()
+        client.on.return_value = lambda handler: handlers.append(handler) or handler
+        setup_message_handlers(client, MongoDBClient({}))
+        handle_message = handlers[0]
+
+        def message(text):
+            event = MagicMock(is_channel=False, is_group=False, chat_id=1)
+            event.message.text = text
+            event.sender.bot = False
+            event.get_sender = AsyncMock(return_value=MagicMock(id=1))
+            event.respond = AsyncMock()
+            return event
+
+        with patch.object(ipl_stats, 'ipl_store', store), \
+                patch.object(gemini_ai, 'is_available', return_value=True), \
+                patch.object(gemini_ai, 'chat_with_gemini', AsyncMock(return_value="From Gemini")) as gemini:
+            for text in ("CSK need 50 off 24 with 6 wickets in hand", "MI 120/3 after 12 overs"):
+                event = message(text)
+                asyncio.run(handle_message(event))
+                self.assertIn("% to win**", event.respond.call_args[0][0])
+            gemini.assert_not_awaited()
+
+            event = message("how are you")
+            asyncio.run(handle_message(event))
+            event.respond.assert_awaited_once_with("From Gemini")
+
+    def test_dataset_sync(self):
+        """Test checksum-verified sync of the IPL source files"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            remote_dir, source_dir = Path(temp_dir) / 'remote', Path(temp_dir) / 'ipl'
+            write_ipl_csvs(remote_dir / 'nested', match_ids={101, 102})
+
+            self.assertEqual(data_loader.sync_ipl_source(remote_dir, source_dir), ['deliveries.csv', 'matches.csv'])
+            self.assertEqual((source_dir / 'matches.csv').read_bytes(), (remote_dir / 'nested' / 'matches.csv').read_bytes())
+
+            # Unchanged files are not rehashed
+            with patch.object(data_loader, 'file_checksum', side_effect=AssertionError):
+                self.assertEqual(data_loader.sync_ipl_source(remote_dir, source_dir), [])
+
+            # A re-download with the same content is hashed but not copied
+            stamp = source_stamp(find_source_files(source_dir))
+            os.utime(remote_dir / 'nested' / 'matches.csv', (0, 0))
+            self.assertEqual(data_loader.sync_ipl_source(remote_dir, source_dir), [])
+            self.assertEqual(source_stamp(find_source_files(source_dir)), stamp)
+
+            # A new season changes both files; only that season is re-aggregated
+            cache_dir = Path(temp_dir) / 'cache'
+            load_aggregates(load_dataset(source_dir, cache_dir), cache_dir)
+            write_ipl_csvs(remote_dir / 'nested')
+            self.assertEqual(data_loader.sync_ipl_source(remote_dir, source_dir), ['deliveries.csv', 'matches.csv'])
+
+            dataset = load_dataset(source_dir, cache_dir)
+            with patch.object(ipl_aggregates, 'compute_season_aggregates',
+                              wraps=ipl_aggregates.compute_season_aggregates) as compute:
+                load_aggregates(dataset, cache_dir)
+            self.assertEqual(dataset.num_matches, 3)
+            compute.assert_called_once_with(dataset, [2024])
+
+    def test_hot_reload(self):
+        """Test that a reload swaps in a new store version atomically"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            write_ipl_csvs(temp_dir)
+            dataset = load_dataset(temp_dir, Path(temp_dir) / 'cache')
+            dataset.aggregates = load_aggregates(dataset, Path(temp_dir) / 'cache')
+            dataset.partitions = load_partitions(dataset, Path(temp_dir) / 'cache', compute_stats)
+            view = dataset.partitions.view(2024)
+            columns = {name: np.array(column) for name, column in view.deliveries.items()}
+            stats = compute_stats(view, 2024)
+
+            # Rebuilding the cache from changed CSVs leaves the old mapped columns intact
+            deliveries_csv = Path(temp_dir) / 'deliveries.csv'
+            deliveries_csv.write_text(deliveries_csv.read_text().replace(',6,', ',16,'))
+            reloaded = load_dataset(temp_dir, Path(temp_dir) / 'cache')
+            reloaded.partitions = load_partitions(reloaded, Path(temp_dir) / 'cache', compute_stats)
+            self.assertNotEqual(compute_stats(reloaded.partitions.view(2024), 2024), stats)
+            for name, column in columns.items():
+                np.testing.assert_array_equal(view.deliveries[name], column)
+            self.assertEqual(compute_stats(view, 2024), stats)
+            self.assertEqual(compute_stats(dataset.partitions.view(2024), 2024), stats)
+
+        old_store = IPLStore(sample_ipl_data, version=5)
+
+        async def load():
+            # A request that took the store before the swap keeps it
+            self.assertIs(ipl_stats.get_ipl_store(), old_store)
+            self.assertIsNone(await ipl_stats.reload_ipl_store())
+            return dataset
+
+        with patch.object(ipl_stats, 'ipl_store', old_store), \
+                patch.object(ipl_stats, 'ipl_processed_data', sample_ipl_data), \
+                patch.object(ipl_stats, 'load_ipl_data', side_effect=load), \
+                patch.object(ipl_stats, 'set_data_status') as set_status:
+            old_stats = get_ipl_stats()
+            store, seconds = asyncio.run(ipl_stats.reload_ipl_store())
+
+            self.assertIs(get_ipl_store(), store)
+            self.assertEqual((store.version, store.dataset), (6, dataset))
+            self.assertGreaterEqual(seconds, 0)
+            self.assertEqual(set_status.call_args.kwargs['version'], 6)
+
+            # The old store is untouched and version-keyed caches move on
+            self.assertEqual(len(old_store.players), len(sample_ipl_data['players']))
+            self.assertEqual(get_ipl_stats()['total_matches'], 3)
+            self.assertNotEqual(get_ipl_stats(), old_stats)
+
+    def test_cursor_streaming(self):
+        """Test streaming users in pages from memory and MongoDB collections"""
+        db_client = MongoDBClient({})
+        users = db_client.get_collection('users')
+        for user_id in range(1200, 0, -1):
+            users.insert_one({'user_id': user_id, 'username': f"user{user_id}"})
+
+        # Only the page being read is copied
+        deepcopy = mongo_client.copy.deepcopy
+        with patch.object(mongo_client.copy, 'deepcopy', side_effect=deepcopy) as copied:
+            pages = db_client.iter_user_pages(batch_size=500)
+            first = next(pages)
+            self.assertEqual(copied.call_count, 500)
+        self.assertEqual(first[:2], [{'user_id': 1}, {'user_id': 2}])
+        self.assertEqual([len(page) for page in pages], [500, 200])
+
+        pages = list(db_client.iter_user_pages({'user_id': {'$gt': 1150}}, {'user_id': 1, 'username': 1}, 20))
+        self.assertEqual([len(page) for page in pages], [20, 20, 10])
+        self.assertEqual(pages[-1][-1], {'user_id': 1200, 'username': 'user1200'})
+        self.assertEqual(db_client.count_users(), 1200)
+
+        # MongoDB collections are read through a batched cursor
+        cursor = MagicMock()
+        cursor.__iter__.return_value = iter([{'user_id': 1}, {'user_id': 2}, {'user_id': 3}])
+        collection = MagicMock()
+        collection.find.return_value = cursor
+        with patch.object(db_client, 'get_collection', return_value=collection):
+            self.assertEqual(list(db_client.iter_user_pages(batch_size=2)), [[{'user_id': 1}, {'user_id': 2}], [{'user_id': 3}]])
+        collection.find.assert_called_once_with({}, {'user_id': 1}, sort=[('user_id', 1)], batch_size=2)
+        cursor.close.assert_called_once()
+
+    def test_broadcast_engine(self):
+        """Test concurrent broadcasts with flood waits, checkpoints, resume and cancel"""
+        db_client = MongoDBClient({})
+        users = db_client.get_collection('users')
+        for user_id in [7, 3, 12, 1] + list(range(20, 4, -1)) + [2, 4]:
+            if not users.find_one({'user_id': user_id}):
+                users.insert_one({'user_id': user_id})
+        broadcasts = db_client.get_collection(BROADCASTS_COLLECTION)
+
+        class FakeClient:
+            def __init__(self, on_send=None):
+                self.sent = []
+                self.flooded = False
+                self.on_send = on_send
+
+            async def send_message(self, user_id, message):
+                await asyncio.sleep(0)
+                if user_id == 5 and not self.flooded:
+                    self.flooded = True
+                    raise FloodWaitError(request=None, capture=0)
+                if user_id == 7:
+                    raise ValueError("user blocked the bot")
+                self.sent.append(user_id)
+                if self.on_send:
+                    self.on_send(user_id)
+
+        async def run(engine, start):
+            job = start()
+            return job, await engine.wait()
+
+        # Every user once; the flood-waited user is retried, the blocked one fails
+        engine, client = BroadcastEngine(concurrency=4, rate=10000), FakeClient()
+        job, finished = asyncio.run(run(engine, lambda: engine.start(client, db_client, 'hello', 99)))
+        self.assertIs(job, finished)
+        self.assertEqual(sorted(client.sent), [u for u in range(1, 21) if u != 7])
+        self.assertEqual((job.status, job.total, job.sent, job.failed), ('completed', 20, 19, 1))
+        document = broadcasts.find_one({'job_id': job.job_id})
+        self.assertEqual((document['status'], document['watermark'], document['completed']), ('completed', 20, []))
+
+        # A job interrupted after a checkpoint resumes with the users not yet handled
+        broadcasts.insert_one({
+            'job_id': 'interrupted', 'message': 'again', 'status': 'running',
+            'total': 20, 'sent': 12, 'failed': 0, 'watermark': 10, 'completed': [12, 15],
+        })
+        engine, client = BroadcastEngine(concurrency=3, rate=10000), FakeClient()
+        job, _ = asyncio.run(run(engine, lambda: engine.resume(client, db_client)))
+        self.assertEqual(sorted(client.sent), [11, 13, 14] + list(range(16, 21)))
+        self.assertEqual((job.status, job.sent, job.failed), ('completed', 20, 0))
+        self.assertIsNone(BroadcastEngine().resume(client, db_client))
+
+        # Cancelling stops the senders and saves where the job stopped
+        engine = BroadcastEngine(concurrency=2, rate=10000)
+        client = FakeClient(on_send=lambda user_id: user_id == 3 and engine.cancel())
+        job, _ = asyncio.run(run(engine, lambda: engine.start(client, db_client, 'stop', 99)))
+        self.assertEqual(job.status, 'cancelled')
+        self.assertLess(len(client.sent), 10)
+        self.assertEqual(broadcasts.find_one({'job_id': job.job_id})['sent'], job.sent)
+        self.assertFalse(engine.cancel())
+
+        # A flood wait holds every sender
+        async def paused_acquire():
+            limiter = RateLimiter(1000)
+            limiter.pause(0.05)
+            started = time.monotonic()
+            await limiter.acquire()
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(paused_acquire()), 0.045)
+
+    def test_blacklist(self):
+        """Test in-memory blacklist checks, Bloom filter mode and the drop handler"""
+        db_client = MongoDBClient({})
+        collection = db_client.get_collection('blacklist')
+        for user_id in range(1000, 1100):
+            collection.insert_one({'user_id': user_id})
+
+        exact = Blacklist()
+        self.assertTrue(exact.load(db_client))
+        self.assertEqual((exact.mode, len(exact)), ('set', 100))
+        self.assertTrue(asyncio.run(exact.drop(1000)))
+        self.assertFalse(asyncio.run(exact.drop(5)))
+        exact.add(5)
+        self.assertIn(5, exact)
+        self.assertTrue(collection.delete_one({'user_id': 1000}))
+        exact.remove(1000)
+        self.assertNotIn(1000, exact)
+        self.assertEqual(exact.dropped, 1)
+
+        # Bloom filter mode: no false negatives, and false positives are checked once
+        bloom = Blacklist(bloom_threshold=10)
+        bloom.load(db_client)
+        self.assertEqual((bloom.mode, len(bloom)), ('bloom', 99))
+        self.assertTrue(all(bloom.is_blacklisted(user_id) for user_id in range(1001, 1100)))
+
+        # On the event loop the database check runs in a worker thread
+        with patch.object(BloomFilter, '__contains__', return_value=True), \
+                patch.object(db_client, 'get_collection', wraps=db_client.get_collection) as reads, \
+                patch.object(blacklist_module.asyncio, 'to_thread', wraps=asyncio.to_thread) as threaded:
+            self.assertFalse(asyncio.run(bloom.check(42)))
+            self.assertFalse(asyncio.run(bloom.check(42)))
+            self.assertFalse(bloom.is_blacklisted(42))
+            self.assertEqual((reads.call_count, threaded.call_count), (1, 1))
+
+        bloom.remove(1001)
+        self.assertFalse(bloom.is_blacklisted(1001))
+        bloom.add(7)
+        self.assertTrue(bloom.is_blacklisted(7))
+
+        # A full cache evicts the least recently used check, never the overrides
+        bloom.confirmed.clear()
+        with patch.object(blacklist_module, 'BLACKLIST_CONFIRM_CACHE_SIZE', 3):
+            for user_id in (1002, 1003, 1004, 1002, 1005):
+                bloom.is_blacklisted(user_id)
+            self.assertEqual(list(bloom.confirmed), [1004, 1002, 1005])
+        self.assertEqual(bloom.overrides, {1001: False, 7: True})
+        self.assertFalse(bloom.is_blacklisted(1001))
+
+        filter_ = BloomFilter(1000)
+        for user_id in range(1000):
+            filter_.add(user_id)
+        false_positives = sum(user_id in filter_ for user_id in range(10 ** 6, 10 ** 6 + 10000))
+        self.assertLess(false_positives, 50)
+
+        # The handler stops propagation for blacklisted senders only
+        handlers = []
+        client = MagicMock()
+        client.on.return_value = lambda handler: handlers.append(handler) or handler
+        with patch.object(blacklist_module, 'blacklist', Blacklist()) as shared, \
+                patch('handlers.blacklist_handler.blacklist', shared):
+            setup_blacklist_handlers(client, db_client)
+            drop_blacklisted = handlers[0]
+
+            with self.assertRaises(events.StopPropagation):
+                asyncio.run(drop_blacklisted(MagicMock(sender_id=1050)))
+            self.assertIsNone(asyncio.run(drop_blacklisted(MagicMock(sender_id=5))))
+            self.assertEqual(shared.dropped, 1)
+
+    def test_data_readiness(self):
+        """Test the background load states and the status endpoint"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            status_file = Path(temp_dir) / 'status.json'
+
+            with patch.dict(data_loader.data_status, clear=True):
+                data_loader.set_data_status('ipl', 'loading', status_file)
+                self.assertFalse(data_loader.is_ipl_data_ready())
+
+                data_loader.set_data_status('ipl', 'ready', status_file, source='sample', matches=4)
+                self.assertTrue(data_loader.is_ipl_data_ready())
+
+                status = data_loader.read_data_status(status_file)
+                self.assertEqual((status['ipl']['state'], status['ipl']['matches']), ('ready', 4))
+
+                with patch.object(app, 'read_data_status', lambda: status):
+                    response = app.app.test_client().get('/status').get_json()
+                self.assertTrue(response['ready'])
+                self.assertEqual(response['data']['ipl']['source'], 'sample')
+
+            self.assertEqual(data_loader.read_data_status(Path(temp_dir) / 'missing.json'), {})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,200 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from collections import OrderedDict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Above this many blacklisted users the list is held as a Bloom filter
+# (0 keeps an exact set however large the list grows)
+BLACKLIST_BLOOM_THRESHOLD = int(os.getenv('BLACKLIST_BLOOM_THRESHOLD', '0'))
+
+# False positive rate of the Bloom filter
+BLACKLIST_BLOOM_ERROR = 0.001
+
+# Bloom filter hits whose database check is remembered (least recently
+# used first out)
+BLACKLIST_CONFIRM_CACHE_SIZE = 10000
+
+class BloomFilter:
+    """
+    Bit array membership test for integer ids, sized for a capacity and
+    false positive rate
+
+    Never reports a member as absent; reports an absent id as a member
+    with probability about error_rate.
+    """
+
+    def __init__(self, capacity, error_rate=BLACKLIST_BLOOM_ERROR):
+        capacity = max(int(capacity), 1)
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+
+    def _positions(self, item):
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+class Blacklist:
+    """
+    In-memory blacklist checked before any work is done for an event
+
+    Loaded once from the blacklist collection and updated in place by
+    /blacklist and /whitelist, so checking a user costs no I/O. Large lists
+    (see BLACKLIST_BLOOM_THRESHOLD) are held as a Bloom filter; its hits
+    are checked against the database once, off the event loop, and
+    remembered, so users the filter matches by mistake are not dropped.
+    Users added or removed since loading are kept in overrides, which the
+    filter cannot represent. dropped counts the events ignored.
+    """
+
+    def __init__(self, bloom_threshold=BLACKLIST_BLOOM_THRESHOLD):
+        self.bloom_threshold = bloom_threshold
+        self.users = set()
+        self.bloom = None
+        self.bloom_count = 0
+        self.confirmed = OrderedDict()
+        self.overrides = {}
+        self.db_client = None
+        self.dropped = 0
+
+    def __len__(self):
+        return len(self.users) if self.bloom is None else self.bloom_count
+
+    def __contains__(self, user_id):
+        return self.is_blacklisted(user_id)
+
+    @property
+    def mode(self):
+        return 'set' if self.bloom is None else 'bloom'
+
+    def load(self, db_client):
+        """
+        Load the blacklisted user ids, streaming the collection in pages
+        """
+        try:
+            users = set()
+            for page in db_client.iter_pages('blacklist', projection={'user_id': 1}):
+                users.update(document['user_id'] for document in page if 'user_id' in document)
+
+            self.db_client = db_client
+            self.confirmed = OrderedDict()
+            self.overrides = {}
+            if self.bloom_threshold and len(users) > self.bloom_threshold:
+                # Room to grow before the false positive rate degrades
+                bloom = BloomFilter(len(users) * 2)
+                for user_id in users:
+                    bloom.add(user_id)
+                self.bloom, self.bloom_count, self.users = bloom, len(users), set()
+            else:
+                self.bloom, self.users = None, users
+
+            logger.info(f"Loaded {len(users)} blacklisted users ({self.mode})")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error loading blacklist: {e}")
+            return False
+
+    def add(self, user_id):
+        """
+        Blacklist a user (call after writing the blacklist collection)
+        """
+        if self.bloom is None:
+            self.users.add(user_id)
+        else:
+            self.bloom.add(user_id)
+            self.bloom_count += 1
+            self.overrides[user_id] = True
+
+    def remove(self, user_id):
+        """
+        Remove a user from the blacklist (call after writing the collection)
+        """
+        if self.bloom is None:
+            self.users.discard(user_id)
+        else:
+            # Bits cannot be cleared, so the hit is overridden instead
+            self.bloom_count = max(self.bloom_count - 1, 0)
+            self.overrides[user_id] = False
+
+    def _known(self, user_id):
+        """
+        Answer from memory, or None when a Bloom filter hit needs a database check
+        """
+        if self.bloom is None:
+            return user_id in self.users
+        if user_id in self.overrides:
+            return self.overrides[user_id]
+        if user_id not in self.bloom:
+            return False
+
+        blacklisted = self.confirmed.get(user_id)
+        if blacklisted is not None:
+            self.confirmed.move_to_end(user_id)
+        return blacklisted
+
+    def _remember(self, user_id, blacklisted):
+        self.confirmed[user_id] = blacklisted
+        self.confirmed.move_to_end(user_id)
+        if len(self.confirmed) > BLACKLIST_CONFIRM_CACHE_SIZE:
+            self.confirmed.popitem(last=False)
+        return blacklisted
+
+    def is_blacklisted(self, user_id):
+        """
+        Check whether a user is blacklisted (may read the database; use
+        check() on the event loop)
+        """
+        blacklisted = self._known(user_id)
+        if blacklisted is None:
+            blacklisted = self._remember(user_id, self._confirm(user_id))
+        return blacklisted
+
+    async def check(self, user_id):
+        """
+        Check whether a user is blacklisted, reading the database in a
+        worker thread when a Bloom filter hit needs confirming
+        """
+        blacklisted = self._known(user_id)
+        if blacklisted is None:
+            blacklisted = self._remember(user_id, await asyncio.to_thread(self._confirm, user_id))
+        return blacklisted
+
+    def _confirm(self, user_id):
+        """
+        Check a Bloom filter hit against the blacklist collection
+        """
+        try:
+            return self.db_client.get_collection('blacklist').find_one({'user_id': user_id}) is not None
+        except Exception as e:
+            logger.error(f"Error checking blacklist for user {user_id}: {e}")
+            return False
+
+    async def drop(self, user_id):
+        """
+        Check a user and count the event as dropped if they are blacklisted
+        """
+        if user_id is not None and await self.check(user_id):
+            self.dropped += 1
+            return True
+        return False
+
+# Shared blacklist used by every handler
+blacklist = Blacklist()
@@ -0,0 +1,315 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime
+from telethon import errors
+
+logger = logging.getLogger(__name__)
+
+# Collection holding broadcast jobs and their progress
+BROADCASTS_COLLECTION = 'broadcasts'
+
+# Messages being sent at once
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '8'))
+
+# Messages per second across all senders (Telegram allows bots about 30)
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '25'))
+
+# Attempts per user when Telegram asks the bot to wait
+BROADCAST_MAX_ATTEMPTS = 3
+
+# Progress is saved every this many users (a few seconds of sending), and
+# when the job stops; a crash re-sends at most this many messages
+CHECKPOINT_EVERY = 100
+
+class RateLimiter:
+    """
+    Token bucket shared by every sender
+
+    pause() stops all senders until a flood wait is over, and the bucket
+    starts empty again afterwards.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        """
+        Wait for a send slot
+        """
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds):
+        """
+        Hold every sender for the given number of seconds
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.updated = self.paused_until
+        self.tokens = 0.0
+
+class BroadcastJob:
+    """
+    A broadcast and its progress
+
+    Users are sent to in user_id order. watermark is the highest user_id
+    below which every user has been handled, and completed holds the users
+    above it that finished out of order, so a resumed job skips exactly the
+    users already handled.
+    """
+
+    def __init__(self, job_id, message, created_by=None, total=0, sent=0, failed=0,
+                 watermark=None, completed=(), status='running', created_at=None):
+        self.job_id = job_id
+        self.message = message
+        self.created_by = created_by
+        self.total = total
+        self.sent = sent
+        self.failed = failed
+        self.watermark = watermark
+        self.completed = set(completed)
+        self.status = status
+        self.created_at = created_at or datetime.now()
+
+        # Users handed to senders, in order, and the progress of this run
+        self.dispatched = deque()
+        self.started = time.monotonic()
+        self.processed_at_start = self.processed
+
+    @property
+    def processed(self):
+        return self.sent + self.failed
+
+    @property
+    def rate(self):
+        """
+        Users handled per second since the job (re)started
+        """
+        elapsed = time.monotonic() - self.started
+        return (self.processed - self.processed_at_start) / elapsed if elapsed > 0 else 0.0
+
+    def dispatch(self, user_id):
+        self.dispatched.append(user_id)
+
+    def finish(self, user_id, delivered):
+        """
+        Record the outcome for a user and advance the watermark
+        """
+        if delivered:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+        self.completed.add(user_id)
+        while self.dispatched and self.dispatched[0] in self.completed:
+            self.watermark = self.dispatched.popleft()
+            self.completed.discard(self.watermark)
+
+    def to_document(self):
+        return {
+            'job_id': self.job_id,
+            'message': self.message,
+            'created_by': self.created_by,
+            'created_at': self.created_at,
+            **self.progress(),
+        }
+
+    def progress(self):
+        """
+        Fields saved at every checkpoint
+        """
+        completed = [user_id for user_id in self.completed if self.watermark is None or user_id > self.watermark]
+        return {
+            'status': self.status,
+            'total': self.total,
+            'sent': self.sent,
+            'failed': self.failed,
+            'watermark': self.watermark,
+            'completed': sorted(completed),
+            'updated_at': datetime.now(),
+        }
+
+    @classmethod
+    def from_document(cls, document):
+        return cls(
+            document['job_id'], document['message'], document.get('created_by'),
+            document.get('total', 0), document.get('sent', 0), document.get('failed', 0),
+            document.get('watermark'), document.get('completed', ()), document.get('status', 'running'),
+            document.get('created_at'),
+        )
+
+class BroadcastEngine:
+    """
+    Runs one broadcast at a time with bounded concurrent senders
+
+    Sends share a global rate limit, Telegram flood waits pause every
+    sender, and progress is checkpointed to the broadcasts collection so a
+    job interrupted by a restart is resumed where it stopped.
+    """
+
+    def __init__(self, concurrency=BROADCAST_CONCURRENCY, rate=BROADCAST_RATE):
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.job = None
+        self.task = None
+        self.stopping = asyncio.Event()
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    def start(self, client, db_client, message, created_by=None):
+        """
+        Start broadcasting a message to every user
+
+        Returns the new job, or None if a broadcast is already running.
+        """
+        if self.running:
+            return None
+
+        job = BroadcastJob(f"{int(time.time() * 1000)}", message, created_by)
+        job.total = db_client.count_users()
+        db_client.get_collection(BROADCASTS_COLLECTION).insert_one(job.to_document())
+
+        self._launch(client, db_client, job)
+        return job
+
+    def resume(self, client, db_client):
+        """
+        Resume a broadcast left running by a previous process
+
+        Returns the resumed job, or None if there is nothing to resume.
+        """
+        if self.running:
+            return None
+
+        try:
+            document = db_client.get_collection(BROADCASTS_COLLECTION).find_one({'status': 'running'})
+        except Exception as e:
+            logger.error(f"Error looking for an unfinished broadcast: {e}")
+            return None
+        if document is None:
+            return None
+
+        job = BroadcastJob.from_document(document)
+        logger.info(f"Resuming broadcast {job.job_id} after {job.processed} of {job.total} users")
+        self._launch(client, db_client, job)
+        return job
+
+    def cancel(self):
+        """
+        Stop the running broadcast after the messages being sent now
+
+        Returns False if no broadcast is running.
+        """
+        if not self.running:
+            return False
+        self.stopping.set()
+        return True
+
+    async def wait(self):
+        """
+        Wait for the running broadcast to stop and return its job
+        """
+        if self.task is not None:
+            await asyncio.shield(self.task)
+        return self.job
+
+    def _launch(self, client, db_client, job):
+        self.job = job
+        self.stopping = asyncio.Event()
+        self.task = asyncio.create_task(self._run(client, db_client, job))
+
+    def _save(self, db_client, job):
+        try:
+            db_client.get_collection(BROADCASTS_COLLECTION).update_one({'job_id': job.job_id}, {'$set': job.progress()})
+        except Exception as e:
+            logger.error(f"Error saving broadcast progress: {e}")
+
+    async def _send(self, client, user_id, message):
+        """
+        Send to one user, waiting out flood waits; returns whether it was delivered
+        """
+        for _ in range(BROADCAST_MAX_ATTEMPTS):
+            await self.limiter.acquire()
+            try:
+                await client.send_message(user_id, message)
+                return True
+            except errors.FloodWaitError as e:
+                logger.warning(f"Broadcast hit a flood wait of {e.seconds}s")
+                self.limiter.pause(e.seconds)
+            except Exception as e:
+                logger.error(f"Failed to send broadcast to user {user_id}: {e}")
+                return False
+        return False
+
+    async def _run(self, client, db_client, job):
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        checkpoint = job.processed
+
+        async def produce():
+            query = {} if job.watermark is None else {'user_id': {'$gt': job.watermark}}
+            pages = db_client.iter_user_pages(query)
+            try:
+                # Pages are fetched off the event loop, one at a time
+                while not self.stopping.is_set():
+                    page = await asyncio.to_thread(next, pages, None)
+                    if page is None:
+                        break
+                    for user in page:
+                        if self.stopping.is_set():
+                            break
+                        user_id = user.get('user_id')
+                        if user_id is None or user_id in job.completed:
+                            continue
+                        job.dispatch(user_id)
+                        await queue.put(user_id)
+            finally:
+                pages.close()
+                for _ in range(self.concurrency):
+                    await queue.put(None)
+
+        async def work():
+            nonlocal checkpoint
+            while True:
+                user_id = await queue.get()
+                if user_id is None:
+                    return
+                if self.stopping.is_set():
+                    continue
+
+                job.finish(user_id, await self._send(client, user_id, job.message))
+                if job.processed - checkpoint >= CHECKPOINT_EVERY:
+                    checkpoint = job.processed
+                    self._save(db_client, job)
+
+        try:
+            await asyncio.gather(produce(), *(work() for _ in range(self.concurrency)))
+            job.status = 'cancelled' if self.stopping.is_set() else 'completed'
+        except Exception as e:
+            logger.error(f"Error in broadcast {job.job_id}: {e}")
+            job.status = 'failed'
+        finally:
+            self._save(db_client, job)
+            logger.info(f"Broadcast {job.job_id} {job.status}: sent {job.sent}, failed {job.failed}")
+
+# Shared engine used by the admin handlers
+broadcasts = BroadcastEngine()
@@ -1,17 +1,177 @@
 import os
+import json
+import shutil
+import hashlib
 import logging
 import asyncio
+from datetime import datetime
 from pathlib import Path
+from utils.ipl_dataset import load_dataset
+from utils.ipl_aggregates import load_aggregates
+from utils.ipl_partitions import load_partitions
+from utils.ipl_matchups import MatchupIndex
+from utils.ipl_winprob import load_win_probability
+from ml.stats_engine import compute_stats
 
 logger = logging.getLogger(__name__)
 
+# Directory holding the Kaggle IPL matches and deliveries CSVs
+IPL_SOURCE_DIR = Path(os.getenv('IPL_DATA_DIR', 'data/ipl'))
+
+# Memory-mapped columnar cache built from the CSVs
+IPL_CACHE_DIR = Path(os.getenv('IPL_CACHE_DIR', 'data/ipl_cache'))
+
+# Where fresh IPL CSVs come from: a Kaggle dataset handle downloaded with
+# kagglehub, or a local directory standing in for it
+IPL_KAGGLE_DATASET = os.getenv('IPL_KAGGLE_DATASET')
+IPL_REMOTE_DIR = os.getenv('IPL_REMOTE_DIR')
+
+# Checksums of the synced files, kept in the source directory
+SYNC_MANIFEST = 'sync_manifest.json'
+
+# Bytes read at a time when checksumming
+CHECKSUM_CHUNK_SIZE = 1 << 20
+
+# Readiness of the background dataset loads, mirrored to this file so the
+# web process (app.py) can report it
+DATA_STATUS_FILE = Path(os.getenv('DATA_STATUS_FILE', 'data/status.json'))
+
 # Global variables to store loaded data
 ipl_data = None
 telugu_nlp_data = None
 
-async def load_ipl_data():
+# Dataset name -> {'state': 'loading' | 'ready' | 'failed', 'updated': ..., ...}
+data_status = {}
+
+def set_data_status(name, state, status_file=DATA_STATUS_FILE, **details):
+    """
+    Record the load state of a dataset and write it to the status file
+    """
+    data_status[name] = {'state': state, 'updated': datetime.now().isoformat(), **details}
+
+    try:
+        status_file = Path(status_file)
+        status_file.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename, so readers never see a partial file
+        temp_file = status_file.with_suffix('.tmp')
+        temp_file.write_text(json.dumps(data_status, indent=2))
+        os.replace(temp_file, status_file)
+    except Exception as e:
+        logger.error(f"Error writing data status: {e}")
+
+def read_data_status(status_file=DATA_STATUS_FILE):
+    """
+    Read the dataset load states written by the bot process
+    """
+    try:
+        return json.loads(Path(status_file).read_text())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        logger.error(f"Error reading data status: {e}")
+        return {}
+
+def is_ipl_data_ready():
+    """
+    Whether the background IPL load has finished and its store is serving
+    """
+    return data_status.get('ipl', {}).get('state') == 'ready'
+
+def file_checksum(path):
+    """
+    SHA-256 of a file, read in chunks
     """
-    Placeholder for loading IPL dataset
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHECKSUM_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def sync_ipl_source(remote_dir, source_dir=IPL_SOURCE_DIR):
+    """
+    Copy new or changed CSVs from a downloaded dataset into the source directory
+
+    Files are compared by SHA-256 against a manifest of the last sync; a
+    file whose size and modification time match the manifest is not even
+    rehashed. Copies are verified against the checksum before they replace
+    the old file, so an unchanged re-download leaves the source untouched
+    and the parsed cache stays valid. Returns the names of changed files.
+    """
+    source_dir = Path(source_dir)
+    source_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = source_dir / SYNC_MANIFEST
+
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except FileNotFoundError:
+        manifest = {}
+    except Exception as e:
+        logger.error(f"Error reading sync manifest, checksumming every file: {e}")
+        manifest = {}
+
+    changed = []
+    for remote_path in sorted(Path(remote_dir).rglob('*.csv')):
+        name = remote_path.name
+        local_path = source_dir / name
+        stat = remote_path.stat()
+        entry = manifest.get(name, {})
+        stamp = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+
+        if local_path.exists() and all(entry.get(key) == value for key, value in stamp.items()):
+            continue
+
+        checksum = file_checksum(remote_path)
+        if local_path.exists() and entry.get('sha256') == checksum:
+            # Same content, new timestamp (e.g. a fresh download)
+            manifest[name] = {**stamp, 'sha256': checksum}
+            continue
+
+        temp_path = source_dir / f"{name}.tmp"
+        shutil.copyfile(remote_path, temp_path)
+        if file_checksum(temp_path) != checksum:
+            temp_path.unlink()
+            raise IOError(f"Checksum mismatch copying {remote_path}")
+        os.replace(temp_path, local_path)
+
+        manifest[name] = {**stamp, 'sha256': checksum}
+        changed.append(name)
+
+    temp_manifest = manifest_path.with_suffix('.tmp')
+    temp_manifest.write_text(json.dumps(manifest, indent=2))
+    os.replace(temp_manifest, manifest_path)
+
+    if changed:
+        logger.info(f"Synced IPL source files: {', '.join(changed)}")
+    return changed
+
+def download_ipl_dataset():
+    """
+    Directory of the latest IPL dataset download, or None if no remote is configured
+    """
+    if IPL_REMOTE_DIR:
+        return Path(IPL_REMOTE_DIR)
+
+    if not IPL_KAGGLE_DATASET:
+        return None
+
+    try:
+        import kagglehub
+    except ImportError:
+        logger.warning("kagglehub is not installed - IPL dataset sync is disabled")
+        return None
+
+    # kagglehub reads KAGGLE_USERNAME and KAGGLE_KEY from the environment
+    return Path(kagglehub.dataset_download(IPL_KAGGLE_DATASET))
+
+async def load_ipl_data(source_dir=IPL_SOURCE_DIR, cache_dir=IPL_CACHE_DIR, remote_dir=None):
+    """
+    Load the IPL ball-by-ball dataset (an IPLDataset), or None if there is none
+
+    New or changed CSVs are first synced from remote_dir (by default the
+    configured Kaggle dataset). The CSVs are parsed only when they changed
+    since the cache was written; otherwise the columns are memory-mapped
+    from the cache, and only seasons whose data changed are re-aggregated.
     """
     global ipl_data
 
@@ -20,15 +180,40 @@ async def load_ipl_data():
         data_dir = Path("data")
         data_dir.mkdir(exist_ok=True)
 
-        logger.info("IPL data loading is disabled in this deployment")
+        # A failed sync still leaves the last synced files to load
+        try:
+            if remote_dir is None:
+                remote_dir = await asyncio.to_thread(download_ipl_dataset)
+            if remote_dir is not None:
+                await asyncio.to_thread(sync_ipl_source, remote_dir, source_dir)
+        except Exception as e:
+            logger.error(f"Error syncing IPL dataset: {e}")
 
-        # Set a placeholder value
-        ipl_data = {"status": "Data loading disabled in this deployment"}
+        # Parsing is CPU-bound, so keep it off the event loop
+        ipl_data = await asyncio.to_thread(load_dataset, source_dir, cache_dir)
+
+        # Materialize player and team aggregates (from the snapshot when current)
+        if ipl_data is not None:
+            ipl_data.aggregates = await asyncio.to_thread(load_aggregates, ipl_data, cache_dir)
+
+            # Per-season delivery partitions, each with its headline stats
+            ipl_data.partitions = await asyncio.to_thread(load_partitions, ipl_data, cache_dir, compute_stats)
+
+            # Batter-vs-bowler matchups and phase splits, in one pass
+            ipl_data.matchups = await asyncio.to_thread(MatchupIndex.build, ipl_data)
+
+            # Win-probability table (from the snapshot when current)
+            ipl_data.win_probability = await asyncio.to_thread(load_win_probability, ipl_data, cache_dir)
+
+        if ipl_data is None:
+            logger.info(f"No IPL dataset found in {source_dir}, using the built-in sample data")
+        else:
+            logger.info(f"Loaded IPL dataset: {ipl_data.num_matches} matches, {ipl_data.num_deliveries} deliveries")
 
         return ipl_data
 
     except Exception as e:
-        logger.error(f"Error in IPL data placeholder: {e}")
+        logger.error(f"Error loading IPL data: {e}")
         return None
 
 async def load_telugu_nlp_data():
@@ -0,0 +1,411 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from utils.ipl_dataset import ENCODED_COLUMNS, RESULT_KINDS
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file written next to the dataset cache
+AGGREGATES_FILE = 'aggregates.npz'
+
+# Per (season, player) counters
+PLAYER_METRICS = (
+    'matches', 'innings', 'runs', 'balls_faced', 'outs', 'fours', 'sixes', 'highest',
+    'wickets', 'balls_bowled', 'runs_conceded', 'team',
+)
+
+# Per (season, team) counters
+TEAM_METRICS = ('played', 'won', 'lost', 'tied', 'no_result')
+
+# Dismissals that do not count as the batter being out, or as the bowler's wicket
+NOT_OUT_DISMISSALS = {'retired hurt'}
+NON_BOWLER_DISMISSALS = {'run out', 'retired hurt', 'retired out', 'obstructing the field'}
+
+# Extras that are not legal deliveries, and extras not charged to the bowler
+ILLEGAL_EXTRAS = {'wides', 'noballs'}
+NON_BOWLER_EXTRAS = {'byes', 'legbyes', 'penalty'}
+
+TIE = RESULT_KINDS.index('tie')
+
+def ids_of(names, wanted):
+    """
+    Ids of the wanted names in a dataset vocabulary
+    """
+    return np.array([i for i, name in enumerate(names) if name in wanted], dtype=np.int64)
+
+def _name_hashes(names):
+    """
+    Stable 32-bit hash of every name in a dictionary, then 0 for id -1 (none)
+    """
+    hashes = [int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=4).digest(), 'little')
+              for name in names]
+    return np.array(hashes + [0], dtype=np.uint32)
+
+def _stable_columns(dataset, table):
+    """
+    Columns of a table with dictionary ids replaced by name hashes and
+    delivery match rows by match ids, so they do not depend on id order
+    """
+    columns = getattr(dataset, table)
+    hashes = {dictionary: _name_hashes(getattr(dataset, dictionary)) for dictionary in set(ENCODED_COLUMNS.values())}
+    stable = {}
+    for name in sorted(columns):
+        values = columns[name]
+        if name in ENCODED_COLUMNS:
+            values = hashes[ENCODED_COLUMNS[name]][values]
+        elif table == 'deliveries' and name == 'match':
+            values = dataset.matches['id'][values].astype(np.uint32)
+        stable[name] = values
+    return stable
+
+def season_fingerprints(dataset, seasons):
+    """
+    Hash of each season's match rows and deliveries, to tell which seasons
+    changed
+
+    Any edit to a season's data (a corrected score, a renamed player)
+    changes its fingerprint. Returns an int64 array of shape (seasons, 2).
+    """
+    season_of_match = dataset.matches['season'].astype(np.int64)
+    lookup = np.full(max(seasons) + 1 if seasons else 1, -1, dtype=np.int64)
+    for i, season in enumerate(seasons):
+        lookup[season] = i
+
+    match_season = lookup[season_of_match]
+    delivery_season = match_season[dataset.deliveries['match']]
+
+    digests = [hashlib.blake2b(digest_size=16) for _ in seasons]
+    for table, row_season in (('matches', match_season), ('deliveries', delivery_season)):
+        # Rows grouped by season, in their original order within a season
+        # (rows are in date order, so usually grouped already)
+        grouped = bool(np.all(row_season[1:] >= row_season[:-1]))
+        order = None if grouped else np.argsort(row_season, kind='stable')
+        bounds = np.searchsorted(row_season if grouped else row_season[order], np.arange(len(seasons) + 1))
+        for name, values in _stable_columns(dataset, table).items():
+            values = np.ascontiguousarray(values if grouped else values[order])
+            for i, digest in enumerate(digests):
+                digest.update(name.encode('utf-8'))
+                digest.update(values[bounds[i]:bounds[i + 1]].tobytes())
+
+    return np.array(
+        [np.frombuffer(digest.digest(), dtype=np.int64) for digest in digests], dtype=np.int64
+    ).reshape(len(seasons), 2)
+
+def compute_season_aggregates(dataset, seasons):
+    """
+    Player and team counters for the given seasons, one row per season
+
+    Every counter is a bincount over a (season row, entity id) key, so all
+    requested seasons are computed in one pass over the deliveries.
+    """
+    num_seasons = len(seasons)
+    num_players, num_teams = len(dataset.players), len(dataset.teams)
+    matches, deliveries = dataset.matches, dataset.deliveries
+
+    row_of_season = {season: i for i, season in enumerate(seasons)}
+    match_row = np.array([row_of_season.get(int(s), -1) for s in matches['season']], dtype=np.int64)
+
+    # Deliveries of the requested seasons, super overs excluded
+    row = match_row[deliveries['match']]
+    selected = (row >= 0) & (deliveries['inning'] <= 2)
+    row = row[selected]
+    match = deliveries['match'][selected].astype(np.int64)
+    batter = deliveries['batter'][selected].astype(np.int64)
+    bowler = deliveries['bowler'][selected].astype(np.int64)
+    non_striker = deliveries['non_striker'][selected].astype(np.int64)
+    inning = deliveries['inning'][selected].astype(np.int64)
+    batter_runs = deliveries['batter_runs'][selected].astype(np.int64)
+    extra_runs = deliveries['extra_runs'][selected].astype(np.int64)
+    extras_type = deliveries['extras_type'][selected]
+    dismissal_kind = deliveries['dismissal_kind'][selected]
+    dismissed = deliveries['player_dismissed'][selected].astype(np.int64)
+    is_wicket = deliveries['is_wicket'][selected] > 0
+
+    size = num_seasons * num_players
+
+    def count(player, weights=None, mask=None):
+        if mask is not None:
+            player, weights = player[mask], (weights[mask] if weights is not None else None)
+            key = row[mask] * num_players + player
+        else:
+            key = row * num_players + player
+        return np.bincount(key, weights=weights, minlength=size).reshape(num_seasons, num_players)
+
+    players = {}
+
+    def distinct(keys_of, columns):
+        """
+        Distinct (key, player) pairs over player columns, as (key, player) arrays
+        """
+        pairs = np.unique(np.concatenate([keys_of[p >= 0] * num_players + p[p >= 0] for p in columns]))
+        return pairs // num_players, pairs % num_players
+
+    # Appearances: distinct (match, player) pairs among batters, non-strikers and bowlers
+    appearance_match, appearance_player = distinct(match, (batter, non_striker, bowler))
+    players['matches'] = np.bincount(
+        match_row[appearance_match] * num_players + appearance_player, minlength=size
+    ).reshape(num_seasons, num_players)
+
+    # Batting innings: distinct (innings, player) pairs among batters and non-strikers
+    innings, innings_player = distinct(match * 2 + inning - 1, (batter, non_striker))
+    players['innings'] = np.bincount(
+        match_row[innings // 2] * num_players + innings_player, minlength=size
+    ).reshape(num_seasons, num_players)
+
+    wides = ids_of(dataset.extras_types, {'wides'})
+    players['runs'] = count(batter, batter_runs)
+    players['balls_faced'] = count(batter, mask=~np.isin(extras_type, wides))
+    players['fours'] = count(batter, mask=batter_runs == 4)
+    players['sixes'] = count(batter, mask=batter_runs == 6)
+
+    not_out_kinds = ids_of(dataset.dismissal_kinds, NOT_OUT_DISMISSALS)
+    out = is_wicket & (dismissed >= 0) & ~np.isin(dismissal_kind, not_out_kinds)
+    players['outs'] = count(dismissed, mask=out)
+
+    # Highest score: best per-innings total of each (season, batter)
+    innings_key = match * num_players + batter
+    unique_innings, inverse = np.unique(innings_key, return_inverse=True)
+    innings_runs = np.bincount(inverse, weights=batter_runs)
+    highest = np.zeros(size, dtype=np.int64)
+    np.maximum.at(
+        highest,
+        match_row[unique_innings // num_players] * num_players + unique_innings % num_players,
+        innings_runs.astype(np.int64),
+    )
+    players['highest'] = highest.reshape(num_seasons, num_players)
+
+    # Bowling
+    bowler_kinds = ids_of(dataset.dismissal_kinds, NON_BOWLER_DISMISSALS)
+    players['wickets'] = count(bowler, mask=is_wicket & ~np.isin(dismissal_kind, bowler_kinds))
+    players['balls_bowled'] = count(bowler, mask=~np.isin(extras_type, ids_of(dataset.extras_types, ILLEGAL_EXTRAS)))
+    charged = np.where(np.isin(extras_type, ids_of(dataset.extras_types, NON_BOWLER_EXTRAS)), 0, extra_runs)
+    players['runs_conceded'] = count(bowler, batter_runs + charged)
+
+    # Team: the side of each player's last delivery in the season
+    team = np.full(size, -1, dtype=np.int64)
+    if len(row):
+        position = np.arange(len(row), dtype=np.int64)
+        last_batting = np.full(size, -1, dtype=np.int64)
+        last_bowling = np.full(size, -1, dtype=np.int64)
+        np.maximum.at(last_batting, row * num_players + batter, position)
+        np.maximum.at(last_bowling, row * num_players + bowler, position)
+
+        batting_team = deliveries['batting_team'][selected]
+        bowling_team = deliveries['bowling_team'][selected]
+        batted_last = (last_batting >= 0) & (last_batting >= last_bowling)
+        bowled_last = (last_bowling >= 0) & ~batted_last
+        team[batted_last] = batting_team[last_batting[batted_last]]
+        team[bowled_last] = bowling_team[last_bowling[bowled_last]]
+    players['team'] = team.reshape(num_seasons, num_players)
+
+    for name in PLAYER_METRICS:
+        players[name] = players[name].astype(np.int32 if name != 'team' else np.int16)
+
+    # Team season records
+    team_size = num_seasons * num_teams
+    in_seasons = match_row >= 0
+    season_rows = match_row[in_seasons]
+    winner, result = matches['winner'][in_seasons], matches['result'][in_seasons]
+    teams = {metric: np.zeros(team_size, dtype=np.int64) for metric in TEAM_METRICS}
+    for side in ('team1', 'team2'):
+        team_ids = matches[side][in_seasons].astype(np.int64)
+        key = season_rows * num_teams + team_ids
+        decided = winner >= 0
+        teams['played'] += np.bincount(key, minlength=team_size)
+        teams['won'] += np.bincount(key[decided & (winner == team_ids)], minlength=team_size)
+        teams['lost'] += np.bincount(key[decided & (winner != team_ids)], minlength=team_size)
+        teams['tied'] += np.bincount(key[~decided & (result == TIE)], minlength=team_size)
+        teams['no_result'] += np.bincount(key[~decided & (result != TIE)], minlength=team_size)
+    teams = {metric: values.reshape(num_seasons, num_teams).astype(np.int32) for metric, values in teams.items()}
+
+    return players, teams
+
+def _remap(values, mapping, size, fill=0):
+    """
+    Re-key the last axis of season rows by an old id -> new id mapping
+    """
+    remapped = np.full(values.shape[:-1] + (size,), fill, dtype=values.dtype)
+    known = mapping >= 0
+    remapped[..., mapping[known]] = values[..., known]
+    return remapped
+
+class IPLAggregates:
+    """
+    Materialized per-season player and team counters
+
+    players[metric] and teams[metric] are arrays of shape (seasons, ids),
+    indexed by the dataset's dictionary ids. Career figures are reductions
+    over the season axis, so a new season only adds a row.
+    """
+
+    def __init__(self, seasons, fingerprints, player_names, team_names, players, teams):
+        self.seasons = [int(season) for season in seasons]
+        self.fingerprints = np.asarray(fingerprints, dtype=np.int64).reshape(len(self.seasons), -1)
+        self.player_names = [str(name) for name in player_names]
+        self.team_names = [str(name) for name in team_names]
+        self.players = players
+        self.teams = teams
+        self.season_rows = {season: i for i, season in enumerate(self.seasons)}
+
+    def _rows(self, season):
+        if season is None:
+            return slice(None)
+        row = self.season_rows.get(season)
+        return slice(row, row + 1) if row is not None else slice(0, 0)
+
+    def player_totals(self, metric, season=None):
+        """
+        A player metric for every player, over all seasons or one season
+        """
+        values = self.players[metric][self._rows(season)]
+        if metric == 'highest':
+            return values.max(axis=0, initial=0)
+        if metric == 'team':
+            # The most recent season in which the player appeared
+            played = values >= 0
+            latest = np.where(played.any(axis=0), len(values) - 1 - played[::-1].argmax(axis=0), 0)
+            return np.where(played.any(axis=0), values[latest, np.arange(values.shape[1])], -1)
+        return values.sum(axis=0)
+
+    def team_totals(self, metric, season=None):
+        """
+        A team metric for every team, over all seasons or one season
+        """
+        return self.teams[metric][self._rows(season)].sum(axis=0)
+
+    def player_record(self, player_id, season=None):
+        """
+        Career (or one season's) line of a player, with derived rates
+        """
+        rows = self._rows(season)
+        record = {metric: int(self.players[metric][rows, player_id].sum()) for metric in PLAYER_METRICS
+                  if metric not in ('highest', 'team')}
+        record['highest'] = int(self.players['highest'][rows, player_id].max(initial=0))
+        team = self.player_totals('team', season)[player_id]
+        record['team'] = self.team_names[team] if team >= 0 else None
+
+        dismissals = record['outs']
+        record['average'] = round(record['runs'] / dismissals, 2) if dismissals else None
+        record['strike_rate'] = round(record['runs'] * 100 / record['balls_faced'], 2) if record['balls_faced'] else None
+        record['economy'] = round(record['runs_conceded'] * 6 / record['balls_bowled'], 2) if record['balls_bowled'] else None
+        return record
+
+    def team_record(self, team_id, season=None):
+        """
+        Season (or all-time) record of a team
+        """
+        rows = self._rows(season)
+        record = {metric: int(self.teams[metric][rows, team_id].sum()) for metric in TEAM_METRICS}
+        decided = record['won'] + record['lost']
+        record['win_percentage'] = round(record['won'] * 100 / decided, 1) if decided else None
+        return record
+
+    def save(self, path):
+        """
+        Write the aggregates as one .npz snapshot (written atomically)
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        arrays = {f"player_{metric}": values for metric, values in self.players.items()}
+        arrays.update({f"team_{metric}": values for metric, values in self.teams.items()})
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                seasons=np.array(self.seasons, dtype=np.int64),
+                fingerprints=self.fingerprints,
+                player_names=np.array(self.player_names, dtype=str),
+                team_names=np.array(self.team_names, dtype=str),
+                **arrays,
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a snapshot written by save()
+        """
+        with np.load(path) as snapshot:
+            players = {metric: snapshot[f"player_{metric}"] for metric in PLAYER_METRICS}
+            teams = {metric: snapshot[f"team_{metric}"] for metric in TEAM_METRICS}
+            return cls(snapshot['seasons'], snapshot['fingerprints'], snapshot['player_names'],
+                       snapshot['team_names'], players, teams)
+
+    @classmethod
+    def build(cls, dataset, previous=None):
+        """
+        Materialize the aggregates of a dataset
+
+        Seasons whose fingerprint matches the previous snapshot are reused
+        (re-keyed to the dataset's ids); only new or changed seasons are
+        computed from the deliveries.
+        """
+        seasons = dataset.seasons
+        fingerprints = season_fingerprints(dataset, seasons)
+        num_players, num_teams = len(dataset.players), len(dataset.teams)
+
+        reused = {}
+        if previous is not None:
+            for i, season in enumerate(seasons):
+                row = previous.season_rows.get(season)
+                if row is not None and np.array_equal(previous.fingerprints[row], fingerprints[i]):
+                    reused[season] = row
+
+        changed = [season for season in seasons if season not in reused]
+        players = {metric: np.zeros((len(seasons), num_players), dtype=np.int32) for metric in PLAYER_METRICS}
+        players['team'] = np.full((len(seasons), num_players), -1, dtype=np.int16)
+        teams = {metric: np.zeros((len(seasons), num_teams), dtype=np.int32) for metric in TEAM_METRICS}
+
+        if reused:
+            player_map = np.array([dataset.player_id(name) for name in previous.player_names], dtype=np.int64)
+            team_map = np.array([dataset.team_id(name) for name in previous.team_names], dtype=np.int64)
+            rows = [seasons.index(season) for season in reused]
+            old_rows = list(reused.values())
+
+            for metric in PLAYER_METRICS:
+                values = previous.players[metric][old_rows]
+                fill = 0
+                if metric == 'team':
+                    values = np.where(values >= 0, team_map[np.maximum(values, 0)], -1)
+                    fill = -1
+                players[metric][rows, :] = _remap(values, player_map, num_players, fill)
+            for metric in TEAM_METRICS:
+                teams[metric][rows, :] = _remap(previous.teams[metric][old_rows], team_map, num_teams)
+
+        if changed:
+            new_players, new_teams = compute_season_aggregates(dataset, changed)
+            rows = [seasons.index(season) for season in changed]
+            for metric in PLAYER_METRICS:
+                players[metric][rows] = new_players[metric]
+            for metric in TEAM_METRICS:
+                teams[metric][rows] = new_teams[metric]
+
+        logger.info(f"Aggregates: reused {len(reused)} seasons, computed {len(changed)}")
+        return cls(seasons, fingerprints, dataset.players, dataset.teams, players, teams)
+
+def load_aggregates(dataset, cache_dir):
+    """
+    Load the aggregates snapshot next to the dataset cache, rebuilding the
+    seasons that changed and re-saving it when anything was recomputed
+    """
+    path = Path(cache_dir) / AGGREGATES_FILE
+    previous = None
+    if path.exists():
+        try:
+            previous = IPLAggregates.load(path)
+        except Exception as e:
+            logger.error(f"Error loading aggregates snapshot: {e}")
+
+    if (previous is not None and previous.seasons == dataset.seasons
+            and previous.player_names == dataset.players and previous.team_names == dataset.teams
+            and np.array_equal(previous.fingerprints, season_fingerprints(dataset, dataset.seasons))):
+        return previous
+
+    aggregates = IPLAggregates.build(dataset, previous)
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        aggregates.save(path)
+    except Exception as e:
+        logger.error(f"Error saving aggregates snapshot: {e}")
+    return aggregates
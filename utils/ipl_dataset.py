@@ -0,0 +1,465 @@
+import csv
+import json
+import logging
+import os
+from datetime import date, datetime
+from pathlib import Path
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when the cache layout changes, so stale caches are rebuilt
+CACHE_FORMAT = 1
+
+# Accepted CSV headers for each column, across the Kaggle IPL dataset releases
+MATCH_COLUMNS = {
+    'id': ('id', 'match_id'),
+    'season': ('season',),
+    'date': ('date',),
+    'city': ('city',),
+    'venue': ('venue',),
+    'team1': ('team1',),
+    'team2': ('team2',),
+    'toss_winner': ('toss_winner',),
+    'toss_decision': ('toss_decision',),
+    'winner': ('winner',),
+    'result': ('result',),
+    'result_margin': ('result_margin',),
+    'win_by_runs': ('win_by_runs',),
+    'win_by_wickets': ('win_by_wickets',),
+    'player_of_match': ('player_of_match',),
+}
+
+DELIVERY_COLUMNS = {
+    'match_id': ('match_id', 'id'),
+    'inning': ('inning', 'innings'),
+    'over': ('over',),
+    'ball': ('ball',),
+    'batter': ('batter', 'batsman', 'striker'),
+    'bowler': ('bowler',),
+    'non_striker': ('non_striker',),
+    'batting_team': ('batting_team',),
+    'bowling_team': ('bowling_team',),
+    'batter_runs': ('batsman_runs', 'batter_runs', 'runs_off_bat'),
+    'extra_runs': ('extra_runs', 'extras'),
+    'total_runs': ('total_runs',),
+    'is_wicket': ('is_wicket',),
+    'player_dismissed': ('player_dismissed',),
+    'dismissal_kind': ('dismissal_kind',),
+    'extras_type': ('extras_type',),
+    'wide_runs': ('wide_runs', 'wides'),
+    'noball_runs': ('noball_runs', 'noballs'),
+    'bye_runs': ('bye_runs', 'byes'),
+    'legbye_runs': ('legbye_runs', 'legbyes'),
+    'penalty_runs': ('penalty_runs', 'penalty'),
+}
+
+# Franchises that were renamed, mapped to one current name
+TEAM_RENAMES = {
+    'Delhi Daredevils': 'Delhi Capitals',
+    'Kings XI Punjab': 'Punjab Kings',
+    'Rising Pune Supergiants': 'Rising Pune Supergiant',
+    'Royal Challengers Bengaluru': 'Royal Challengers Bangalore',
+}
+
+# Result kinds, as dictionary ids
+RESULT_KINDS = ['runs', 'wickets', 'tie', 'no result']
+
+# Values that mean "no value" in the CSVs
+_EMPTY = {'', 'NA', 'N/A', 'nan', 'NaN', 'None'}
+
+_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y', '%Y/%m/%d')
+
+# Dictionary-encoded string columns and the dictionary each uses
+DICTIONARIES = ('players', 'teams', 'venues', 'cities', 'dismissal_kinds', 'extras_types')
+
+# Dictionary-encoded columns of the match and delivery tables, with their dictionary
+ENCODED_COLUMNS = {
+    'venue': 'venues', 'city': 'cities', 'team1': 'teams', 'team2': 'teams', 'toss_winner': 'teams',
+    'winner': 'teams', 'player_of_match': 'players', 'batter': 'players', 'bowler': 'players',
+    'non_striker': 'players', 'player_dismissed': 'players', 'batting_team': 'teams',
+    'bowling_team': 'teams', 'dismissal_kind': 'dismissal_kinds', 'extras_type': 'extras_types',
+}
+
+def _clean(value):
+    value = value.strip() if value else ''
+    return '' if value in _EMPTY else value
+
+def _team_name(value):
+    value = _clean(value)
+    return TEAM_RENAMES.get(value, value)
+
+def _venue_name(value):
+    # Later releases append the city ("Wankhede Stadium, Mumbai")
+    return _clean(value).split(',')[0].strip()
+
+def _parse_date(value):
+    value = _clean(value)
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def _parse_int(value, default=0):
+    value = _clean(value)
+    if not value:
+        return default
+    try:
+        return int(float(value))
+    except ValueError:
+        return default
+
+def _find_csv(source_dir, keywords, exclude=()):
+    """
+    Find the first CSV whose name contains one of the keywords
+    """
+    for path in sorted(Path(source_dir).glob('*.csv')):
+        name = path.name.lower()
+        if any(k in name for k in keywords) and not any(k in name for k in exclude):
+            return path
+    return None
+
+def find_source_files(source_dir):
+    """
+    Locate the matches and deliveries CSVs in a dataset directory
+    """
+    deliveries = _find_csv(source_dir, ('deliver', 'ball'))
+    matches = _find_csv(source_dir, ('match',), exclude=('deliver', 'ball'))
+    return matches, deliveries
+
+def _read_rows(path, aliases):
+    """
+    Yield rows of a CSV as dicts keyed by canonical column name
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = [h.strip().lower() for h in next(reader)]
+        positions = {}
+        for column, names in aliases.items():
+            for name in names:
+                if name in header:
+                    positions[column] = header.index(name)
+                    break
+
+        width = len(header)
+        for row in reader:
+            if len(row) < width:
+                row = row + [''] * (width - len(row))
+            yield {column: row[i] for column, i in positions.items()}
+
+class _Encoder:
+    """
+    Dictionary encoder: assigns consecutive ids to distinct strings
+    """
+
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.ids = {value: i for i, value in enumerate(self.values)}
+
+    def __call__(self, value):
+        if not value:
+            return -1
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return i
+
+class IPLDataset:
+    """
+    Columnar ball-by-ball IPL dataset
+
+    Matches and deliveries are dicts of equal-length NumPy columns. Player,
+    team, venue, city, dismissal and extras names are dictionary-encoded as
+    integer ids (-1 for none). Deliveries are sorted by match, innings and
+    ball, and match_offsets[m]:match_offsets[m + 1] is the delivery range of
+    match row m. Overs are 0-based.
+    """
+
+    def __init__(self, matches, deliveries, dictionaries, source=None):
+        self.matches = matches
+        self.deliveries = deliveries
+        self.source = source or {}
+
+        # Materialized player and team aggregates (utils.ipl_aggregates), once built
+        self.aggregates = None
+
+        # Lazily loaded season partitions (utils.ipl_partitions), once written
+        self.partitions = None
+
+        # Batter-vs-bowler and phase-split index (utils.ipl_matchups), once built
+        self.matchups = None
+
+        # Win-probability lookup table (utils.ipl_winprob), once built
+        self.win_probability = None
+
+        for name in DICTIONARIES:
+            setattr(self, name, list(dictionaries.get(name, [])))
+
+        self.player_ids = {name: i for i, name in enumerate(self.players)}
+        self.team_ids = {name: i for i, name in enumerate(self.teams)}
+        self.venue_ids = {name: i for i, name in enumerate(self.venues)}
+
+        counts = np.bincount(deliveries['match'], minlength=self.num_matches) if self.num_matches else []
+        self.match_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    @property
+    def num_matches(self):
+        return len(self.matches['id'])
+
+    @property
+    def num_deliveries(self):
+        return len(self.deliveries['match'])
+
+    @property
+    def seasons(self):
+        return sorted(int(s) for s in np.unique(self.matches['season']))
+
+    @property
+    def dictionaries(self):
+        return {name: getattr(self, name) for name in DICTIONARIES}
+
+    def player_id(self, name):
+        return self.player_ids.get(name, -1)
+
+    def team_id(self, name):
+        return self.team_ids.get(TEAM_RENAMES.get(name, name), -1)
+
+    def venue_id(self, name):
+        return self.venue_ids.get(name, -1)
+
+    def delivery_season(self):
+        """
+        Season of every delivery
+        """
+        return self.matches['season'][self.deliveries['match']]
+
+    @classmethod
+    def from_csv(cls, matches_path, deliveries_path):
+        """
+        Parse the Kaggle matches and deliveries CSVs into columns
+        """
+        players, teams, venues, cities = _Encoder(), _Encoder(), _Encoder(), _Encoder()
+        dismissal_kinds, extras_types = _Encoder(), _Encoder()
+
+        match_rows = []
+        for row in _read_rows(matches_path, MATCH_COLUMNS):
+            match_date = _parse_date(row.get('date'))
+            season = match_date.year if match_date else _parse_int(row.get('season', '')[:4])
+
+            result = _clean(row.get('result')).lower()
+            margin = _parse_int(row.get('result_margin'), -1)
+            if result not in RESULT_KINDS:
+                # Older releases: result is 'normal' and the margin is split in two columns
+                runs, wickets = _parse_int(row.get('win_by_runs')), _parse_int(row.get('win_by_wickets'))
+                if result not in ('tie', 'no result'):
+                    result = 'runs' if runs else 'wickets' if wickets else 'no result'
+                    margin = runs or wickets or -1
+
+            match_rows.append((
+                _parse_int(row.get('id')),
+                season,
+                match_date,
+                venues(_venue_name(row.get('venue'))),
+                cities(_clean(row.get('city'))),
+                teams(_team_name(row.get('team1'))),
+                teams(_team_name(row.get('team2'))),
+                teams(_team_name(row.get('toss_winner'))),
+                1 if _clean(row.get('toss_decision')).lower() == 'bat' else 0,
+                teams(_team_name(row.get('winner'))),
+                RESULT_KINDS.index(result),
+                margin,
+                players(_clean(row.get('player_of_match'))),
+            ))
+
+        # Matches in date order; the row number is the match id used by deliveries
+        match_rows.sort(key=lambda r: (r[2] or date.min, r[0]))
+        matches = {
+            name: np.array([r[i] for r in match_rows], dtype=dtype)
+            for i, (name, dtype) in enumerate((
+                ('id', np.int64), ('season', np.int16), ('date', 'datetime64[D]'),
+                ('venue', np.int32), ('city', np.int32), ('team1', np.int16), ('team2', np.int16),
+                ('toss_winner', np.int16), ('toss_bat', np.int8), ('winner', np.int16),
+                ('result', np.int8), ('result_margin', np.int16), ('player_of_match', np.int32),
+            ))
+        }
+        match_rows_by_id = {int(match_id): i for i, match_id in enumerate(matches['id'])}
+
+        columns = {name: [] for name in (
+            'match', 'inning', 'over', 'ball', 'batter', 'bowler', 'non_striker', 'batting_team',
+            'bowling_team', 'batter_runs', 'extra_runs', 'total_runs', 'is_wicket',
+            'player_dismissed', 'dismissal_kind', 'extras_type',
+        )}
+        skipped = 0
+        for row in _read_rows(deliveries_path, DELIVERY_COLUMNS):
+            match = match_rows_by_id.get(_parse_int(row.get('match_id'), -1))
+            if match is None:
+                skipped += 1
+                continue
+
+            batter_runs = _parse_int(row.get('batter_runs'))
+            extra_runs = _parse_int(row.get('extra_runs'))
+            player_dismissed = _clean(row.get('player_dismissed'))
+
+            extras_type = _clean(row.get('extras_type'))
+            if not extras_type:
+                # Older releases: one runs column per kind of extra
+                for kind in ('wide', 'noball', 'bye', 'legbye', 'penalty'):
+                    if _parse_int(row.get(f'{kind}_runs')):
+                        extras_type = f'{kind}s' if kind != 'penalty' else kind
+                        break
+
+            columns['match'].append(match)
+            columns['inning'].append(_parse_int(row.get('inning'), 1))
+            columns['over'].append(_parse_int(row.get('over')))
+            columns['ball'].append(_parse_int(row.get('ball')))
+            columns['batter'].append(players(_clean(row.get('batter'))))
+            columns['bowler'].append(players(_clean(row.get('bowler'))))
+            columns['non_striker'].append(players(_clean(row.get('non_striker'))))
+            columns['batting_team'].append(teams(_team_name(row.get('batting_team'))))
+            columns['bowling_team'].append(teams(_team_name(row.get('bowling_team'))))
+            columns['batter_runs'].append(batter_runs)
+            columns['extra_runs'].append(extra_runs)
+            columns['total_runs'].append(_parse_int(row.get('total_runs'), batter_runs + extra_runs))
+            columns['is_wicket'].append(_parse_int(row.get('is_wicket'), 1 if player_dismissed else 0))
+            columns['player_dismissed'].append(players(player_dismissed))
+            columns['dismissal_kind'].append(dismissal_kinds(_clean(row.get('dismissal_kind'))))
+            columns['extras_type'].append(extras_types(extras_type))
+
+        if skipped:
+            logger.warning(f"Skipped {skipped} deliveries of unknown matches")
+
+        dtypes = {
+            'match': np.int32, 'inning': np.int8, 'over': np.int8, 'ball': np.int8,
+            'batter': np.int32, 'bowler': np.int32, 'non_striker': np.int32,
+            'batting_team': np.int16, 'bowling_team': np.int16, 'batter_runs': np.int8,
+            'extra_runs': np.int8, 'total_runs': np.int8, 'is_wicket': np.int8,
+            'player_dismissed': np.int32, 'dismissal_kind': np.int8, 'extras_type': np.int8,
+        }
+        deliveries = {name: np.array(values, dtype=dtypes[name]) for name, values in columns.items()}
+
+        # Some releases number overs from 1
+        if len(deliveries['over']) and deliveries['over'].min() >= 1:
+            deliveries['over'] -= 1
+
+        order = np.lexsort((deliveries['ball'], deliveries['over'], deliveries['inning'], deliveries['match']))
+        deliveries = {name: column[order] for name, column in deliveries.items()}
+
+        dictionaries = {
+            'players': players.values, 'teams': teams.values, 'venues': venues.values,
+            'cities': cities.values, 'dismissal_kinds': dismissal_kinds.values,
+            'extras_types': extras_types.values,
+        }
+        return cls(matches, deliveries, dictionaries)
+
+    def save(self, cache_dir):
+        """
+        Write the columns as .npy files plus a meta.json
+
+        Every file is written under a temporary name and renamed into place,
+        with meta.json last, so readers never see a half-written cache and
+        processes that still map the old files keep a consistent view.
+        """
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+        for table, columns in (('matches', self.matches), ('deliveries', self.deliveries)):
+            for name, column in columns.items():
+                path = cache_dir / f"{table}.{name}.npy"
+                tmp_path = path.with_suffix('.npy.tmp')
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, np.ascontiguousarray(column))
+                os.replace(tmp_path, path)
+
+        meta = {
+            'format': CACHE_FORMAT,
+            'created': datetime.now().isoformat(),
+            'source': self.source,
+            'num_matches': self.num_matches,
+            'num_deliveries': self.num_deliveries,
+            'columns': {'matches': list(self.matches), 'deliveries': list(self.deliveries)},
+            'dictionaries': self.dictionaries,
+        }
+        tmp_path = cache_dir / 'meta.json.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_dir / 'meta.json')
+
+    @classmethod
+    def read_meta(cls, cache_dir):
+        """
+        Read a cache's meta.json, or None if there is no usable cache
+        """
+        path = Path(cache_dir) / 'meta.json'
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        return meta if meta.get('format') == CACHE_FORMAT else None
+
+    @classmethod
+    def load(cls, cache_dir, mmap=True):
+        """
+        Load a cache written by save(), memory-mapping the columns
+        """
+        cache_dir = Path(cache_dir)
+        meta = cls.read_meta(cache_dir)
+        if meta is None:
+            raise FileNotFoundError(f"No IPL dataset cache in {cache_dir}")
+
+        mmap_mode = 'r' if mmap else None
+        tables = {}
+        for table in ('matches', 'deliveries'):
+            tables[table] = {
+                name: np.load(cache_dir / f"{table}.{name}.npy", mmap_mode=mmap_mode)
+                for name in meta['columns'][table]
+            }
+            length = meta[f'num_{table}']
+            if any(len(column) != length for column in tables[table].values()):
+                raise ValueError(f"IPL dataset cache in {cache_dir} is inconsistent")
+
+        return cls(tables['matches'], tables['deliveries'], meta['dictionaries'], meta.get('source'))
+
+def source_stamp(paths):
+    """
+    Size and modification time of each source file, to detect changes
+    """
+    stamp = {}
+    for path in paths:
+        stat = Path(path).stat()
+        stamp[Path(path).name] = {'size': stat.st_size, 'mtime': int(stat.st_mtime)}
+    return stamp
+
+def load_dataset(source_dir, cache_dir):
+    """
+    Load the IPL dataset, parsing the CSVs only when the cache is stale
+
+    Returns None when the source directory has no dataset and there is no
+    cache to fall back on.
+    """
+    matches_path, deliveries_path = find_source_files(source_dir) if Path(source_dir).is_dir() else (None, None)
+    meta = IPLDataset.read_meta(cache_dir)
+
+    if matches_path is None or deliveries_path is None:
+        if meta is None:
+            return None
+        logger.info(f"No IPL CSVs in {source_dir}, using the cached dataset")
+        return IPLDataset.load(cache_dir)
+
+    stamp = source_stamp((matches_path, deliveries_path))
+    if meta is not None and meta.get('source') == stamp:
+        return IPLDataset.load(cache_dir)
+
+    started = datetime.now()
+    dataset = IPLDataset.from_csv(matches_path, deliveries_path)
+    dataset.source = stamp
+    dataset.save(cache_dir)
+    logger.info(
+        f"Parsed {dataset.num_matches} matches and {dataset.num_deliveries} deliveries "
+        f"in {(datetime.now() - started).total_seconds():.1f}s"
+    )
+
+    # Serve from the memory-mapped cache, like every later startup
+    return IPLDataset.load(cache_dir)
@@ -0,0 +1,128 @@
+import logging
+import numpy as np
+from utils.ipl_aggregates import ILLEGAL_EXTRAS, NON_BOWLER_DISMISSALS, NON_BOWLER_EXTRAS, NOT_OUT_DISMISSALS, ids_of
+
+logger = logging.getLogger(__name__)
+
+# Innings phases as [first over, last over) ranges, with 0-based overs
+PHASES = {'powerplay': (0, 6), 'middle': (6, 15), 'death': (15, 20)}
+
+# Counters of each batter-vs-bowler pair
+MATCHUP_METRICS = ('runs', 'balls', 'dismissals', 'fours', 'sixes', 'dots')
+
+# Counters of each player per phase
+PHASE_METRICS = ('runs', 'balls_faced', 'outs', 'runs_conceded', 'balls_bowled', 'wickets')
+
+def phase_of_over(overs):
+    """
+    Phase number (index into PHASES) of every 0-based over; overs past the
+    last phase count as its final phase
+    """
+    table = np.full(max(20, int(overs.max(initial=0)) + 1), len(PHASES) - 1, dtype=np.int64)
+    for phase, (first, last) in enumerate(PHASES.values()):
+        table[first:last] = phase
+    return table[overs]
+
+class MatchupIndex:
+    """
+    Sparse batter-vs-bowler counters and per-player phase splits
+
+    Only pairs that actually faced each other are stored: keys holds the
+    sorted pair keys (batter id * number of players + bowler id) and every
+    metric one value per pair. rows maps a pair key to its position, so a
+    lookup is a dict read. Phase splits are (phase, player) arrays.
+    """
+
+    def __init__(self, num_players, keys, pairs, phases):
+        self.num_players = num_players
+        self.keys = keys
+        self.pairs = pairs
+        self.phases = phases
+        self.rows = {key: row for row, key in enumerate(keys.tolist())}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def matchup(self, batter_id, bowler_id):
+        """
+        Counters of a batter against a bowler, or None if they never met
+        """
+        row = self.rows.get(batter_id * self.num_players + bowler_id)
+        if row is None:
+            return None
+        return {metric: int(self.pairs[metric][row]) for metric in MATCHUP_METRICS}
+
+    def phase_split(self, player_id):
+        """
+        Batting and bowling counters of a player in each phase
+        """
+        return {
+            phase: {metric: int(self.phases[metric][i, player_id]) for metric in PHASE_METRICS}
+            for i, phase in enumerate(PHASES)
+        }
+
+    @classmethod
+    def build(cls, dataset):
+        """
+        Build the index in one vectorized pass over the deliveries
+        (super overs excluded)
+        """
+        deliveries = dataset.deliveries
+        num_players = len(dataset.players)
+        selected = deliveries['inning'] <= 2
+
+        batter = deliveries['batter'][selected].astype(np.int64)
+        bowler = deliveries['bowler'][selected].astype(np.int64)
+        dismissed = deliveries['player_dismissed'][selected].astype(np.int64)
+        batter_runs = deliveries['batter_runs'][selected].astype(np.int64)
+        extra_runs = deliveries['extra_runs'][selected].astype(np.int64)
+        extras_type = deliveries['extras_type'][selected]
+        dismissal_kind = deliveries['dismissal_kind'][selected]
+        is_wicket = deliveries['is_wicket'][selected] > 0
+
+        faced = ~np.isin(extras_type, ids_of(dataset.extras_types, {'wides'}))
+        legal = ~np.isin(extras_type, ids_of(dataset.extras_types, ILLEGAL_EXTRAS))
+        out = is_wicket & (dismissed >= 0) & ~np.isin(dismissal_kind, ids_of(dataset.dismissal_kinds, NOT_OUT_DISMISSALS))
+        bowler_wicket = is_wicket & ~np.isin(dismissal_kind, ids_of(dataset.dismissal_kinds, NON_BOWLER_DISMISSALS))
+        conceded = batter_runs + np.where(
+            np.isin(extras_type, ids_of(dataset.extras_types, NON_BOWLER_EXTRAS)), 0, extra_runs
+        )
+
+        # Batter-vs-bowler: one bincount per counter over the distinct pairs
+        keys, pair = np.unique(batter * num_players + bowler, return_inverse=True)
+        pair = pair.reshape(-1)
+
+        def per_pair(weights):
+            return np.bincount(pair, weights=weights, minlength=len(keys)).astype(np.int32)
+
+        pairs = {
+            'runs': per_pair(batter_runs),
+            'balls': per_pair(faced),
+            # Wickets the bowler took of the batter on strike
+            'dismissals': per_pair(bowler_wicket & (dismissed == batter)),
+            'fours': per_pair(batter_runs == 4),
+            'sixes': per_pair(batter_runs == 6),
+            'dots': per_pair(faced & (batter_runs == 0)),
+        }
+
+        # Phase splits: (phase, player) counters
+        phase = phase_of_over(deliveries['over'][selected].astype(np.int64))
+        size = len(PHASES) * num_players
+
+        def per_phase(player, weights):
+            valid = player >= 0
+            return np.bincount(
+                phase[valid] * num_players + player[valid], weights=weights[valid], minlength=size
+            ).reshape(len(PHASES), num_players).astype(np.int32)
+
+        phases = {
+            'runs': per_phase(batter, batter_runs),
+            'balls_faced': per_phase(batter, faced),
+            'outs': per_phase(dismissed, out),
+            'runs_conceded': per_phase(bowler, conceded),
+            'balls_bowled': per_phase(bowler, legal),
+            'wickets': per_phase(bowler, bowler_wicket),
+        }
+
+        logger.info(f"Matchup index: {len(keys)} batter-vs-bowler pairs")
+        return cls(num_players, keys, pairs, phases)
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+from utils.ipl_aggregates import season_fingerprints
+
+logger = logging.getLogger(__name__)
+
+# Directory of the season partition index, inside the dataset cache
+PARTITIONS_DIR = 'seasons'
+
+# Fingerprints and summaries of the partitions
+PARTITION_INDEX = 'index.json'
+
+# Season partitions held open at once
+PARTITION_CACHE_SIZE = int(os.getenv('IPL_PARTITION_CACHE_SIZE', '4'))
+
+class SeasonView:
+    """
+    One season of an IPLDataset: every match, but only that season's deliveries
+
+    Reads like the dataset itself (dictionaries, matches, match_mask inputs),
+    so the stats engine runs on it unchanged.
+    """
+
+    def __init__(self, dataset, season, deliveries):
+        self.dataset = dataset
+        self.season = season
+        self.deliveries = deliveries
+
+    def __getattr__(self, name):
+        return getattr(self.dataset, name)
+
+    @property
+    def num_deliveries(self):
+        return len(self.deliveries['match'])
+
+class SeasonPartitions:
+    """
+    The deliveries of each season, served as slices of the memory-mapped
+    dataset columns
+
+    Deliveries are sorted by match and matches by date, so a season is one
+    contiguous range of rows and its columns are views that copy nothing
+    (a season that is not contiguous, such as one with undated matches, is
+    gathered into a copy). At most maxsize seasons are held at once; the
+    least recently used one is dropped when another is opened. The index,
+    the only file written, keeps each season's fingerprint and an optional
+    summary, which is recomputed only for changed seasons.
+    """
+
+    def __init__(self, directory, dataset, index, maxsize=PARTITION_CACHE_SIZE):
+        self.directory = Path(directory)
+        self.dataset = dataset
+        self.index = index
+        self.maxsize = maxsize
+        self.loaded = OrderedDict()
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def __contains__(self, season):
+        return str(season) in self.index
+
+    @property
+    def seasons(self):
+        return sorted(int(season) for season in self.index)
+
+    def summary(self, season):
+        """
+        Summary stored with a season's partition, or None
+        """
+        return self.index.get(str(season), {}).get('summary')
+
+    def summaries(self):
+        """
+        Summaries of every season, in season order, without reading any deliveries
+        """
+        return [self.summary(season) for season in self.seasons]
+
+    def deliveries(self, season):
+        """
+        Delivery columns of one season, opening the partition on a miss
+        """
+        columns = self.loaded.get(season)
+        if columns is not None:
+            self.loaded.move_to_end(season)
+            self.hits += 1
+            return columns
+
+        columns = season_deliveries(self.dataset, season)
+        self.loads += 1
+
+        self.loaded[season] = columns
+        while len(self.loaded) > self.maxsize:
+            self.loaded.popitem(last=False)
+            self.evictions += 1
+        return columns
+
+    def view(self, season):
+        """
+        The dataset restricted to one season's deliveries
+        """
+        return SeasonView(self.dataset, season, self.deliveries(season))
+
+    @classmethod
+    def write(cls, dataset, directory, summarize=None, maxsize=PARTITION_CACHE_SIZE):
+        """
+        Write the partition index of a dataset, summarizing only the seasons
+        that changed
+
+        summarize(view, season) is stored in the index for every changed
+        season (it must return JSON-serializable values).
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        index_path = directory / PARTITION_INDEX
+
+        try:
+            previous = json.loads(index_path.read_text())
+        except FileNotFoundError:
+            previous = {}
+
+        seasons = dataset.seasons
+        fingerprints = season_fingerprints(dataset, seasons).tolist()
+
+        index = {}
+        changed = []
+        for season, fingerprint in zip(seasons, fingerprints):
+            key = str(season)
+            if previous.get(key, {}).get('fingerprint') == fingerprint:
+                index[key] = previous[key]
+                continue
+
+            columns = season_deliveries(dataset, season)
+            summary = summarize(SeasonView(dataset, season, columns), season) if summarize else None
+            index[key] = {'fingerprint': fingerprint, 'deliveries': len(columns['match']), 'summary': summary}
+            changed.append(season)
+
+        tmp_path = index_path.with_name(index_path.name + '.tmp')
+        tmp_path.write_text(json.dumps(index))
+        os.replace(tmp_path, index_path)
+
+        # Partition copies written by earlier versions
+        for path in directory.glob('*.npz'):
+            path.unlink(missing_ok=True)
+
+        logger.info(f"Season partitions: summarized {len(changed)}, kept {len(index) - len(changed)}")
+        return cls(directory, dataset, index, maxsize)
+
+def season_deliveries(dataset, season):
+    """
+    Delivery columns of one season: views when its matches are contiguous
+    """
+    rows = np.flatnonzero(dataset.matches['season'] == season)
+    if not len(rows):
+        return {name: column[:0] for name, column in dataset.deliveries.items()}
+
+    offsets = dataset.match_offsets
+    if rows[-1] - rows[0] + 1 == len(rows):
+        start, stop = offsets[rows[0]], offsets[rows[-1] + 1]
+        return {name: column[start:stop] for name, column in dataset.deliveries.items()}
+
+    selected = np.concatenate([np.arange(offsets[row], offsets[row + 1]) for row in rows])
+    return {name: column[selected] for name, column in dataset.deliveries.items()}
+
+def load_partitions(dataset, cache_dir, summarize=None):
+    """
+    Season partitions of a dataset, with the index in its cache directory
+    """
+    return SeasonPartitions.write(dataset, Path(cache_dir) / PARTITIONS_DIR, summarize)
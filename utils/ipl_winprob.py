@@ -0,0 +1,209 @@
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from utils.ipl_aggregates import ILLEGAL_EXTRAS, NOT_OUT_DISMISSALS, TIE, ids_of, season_fingerprints
+
+logger = logging.getLogger(__name__)
+
+# Win-probability tables, next to the dataset cache
+WIN_PROBABILITY_FILE = 'win_probability.npz'
+
+# Table bounds: balls remaining in a 20-over innings, runs (scored so far in
+# the first innings, needed in the chase) and wickets in hand
+MAX_BALLS = 120
+MAX_RUNS = 300
+MAX_WICKETS = 10
+
+# Wickets slot for a situation where the wickets in hand are not known
+ANY_WICKETS = MAX_WICKETS + 1
+
+# Neighbourhoods (balls, runs) pooled when smoothing: a narrow one for the
+# estimate and a wide one for the prior it is shrunk towards
+NARROW_WINDOW = (3, 2)
+WIDE_WINDOW = (12, 10)
+
+# Pseudo-observations given to the prior
+PRIOR_WEIGHT = 20
+
+def _box_sum(values, radius, axis):
+    """
+    Sum of values over a window of +-radius along an axis (clipped at the edges)
+    """
+    size = values.shape[axis]
+    padded = np.concatenate([np.zeros_like(np.take(values, [0], axis=axis)), values], axis=axis)
+    totals = np.cumsum(padded, axis=axis)
+    index = np.arange(size)
+    upper = np.take(totals, np.minimum(index + radius + 1, size), axis=axis)
+    lower = np.take(totals, np.maximum(index - radius, 0), axis=axis)
+    return upper - lower
+
+def _smooth(values, window):
+    balls, runs = window
+    return _box_sum(_box_sum(values, balls, axis=1), runs, axis=2)
+
+def innings_states(dataset):
+    """
+    The situation before every delivery of the first two innings
+
+    Returns (innings, balls remaining, runs, wickets in hand, outcome), one
+    value per delivery, where runs are the runs scored so far in the first
+    innings and the runs needed in the second, and outcome is 1 if the
+    batting side went on to win, 0.5 for a tie and -1 for no result.
+    """
+    deliveries = dataset.deliveries
+    selected = np.flatnonzero((deliveries['inning'] >= 1) & (deliveries['inning'] <= 2))
+
+    match = deliveries['match'][selected].astype(np.int64)
+    inning = deliveries['inning'][selected].astype(np.int64)
+    order = np.lexsort((deliveries['ball'][selected], deliveries['over'][selected], inning, match))
+    selected, match, inning = selected[order], match[order], inning[order]
+
+    total_runs = deliveries['total_runs'][selected].astype(np.int64)
+    legal = ~np.isin(deliveries['extras_type'][selected], ids_of(dataset.extras_types, ILLEGAL_EXTRAS))
+    wicket = (deliveries['is_wicket'][selected] > 0) & ~np.isin(
+        deliveries['dismissal_kind'][selected], ids_of(dataset.dismissal_kinds, NOT_OUT_DISMISSALS)
+    )
+
+    # Running totals before each delivery, restarted at every innings
+    innings_key = match * 2 + inning - 1
+    starts = np.flatnonzero(np.r_[True, innings_key[1:] != innings_key[:-1]])
+    lengths = np.diff(np.r_[starts, len(innings_key)])
+
+    def before(values):
+        totals = np.cumsum(values) - values
+        return totals - np.repeat(totals[starts], lengths)
+
+    runs = before(total_runs)
+    balls_remaining = np.maximum(MAX_BALLS - before(legal.astype(np.int64)), 0)
+    wickets_in_hand = np.maximum(MAX_WICKETS - before(wicket.astype(np.int64)), 0)
+
+    # The chase target is the first innings total plus one
+    first_innings = np.bincount(match[inning == 1], weights=total_runs[inning == 1], minlength=dataset.num_matches)
+    runs = np.where(inning == 2, first_innings[match].astype(np.int64) + 1 - runs, runs)
+
+    winner = dataset.matches['winner'][match]
+    outcome = np.where(
+        dataset.matches['result'][match] == TIE, 0.5,
+        np.where(winner < 0, -1.0, (deliveries['batting_team'][selected] == winner).astype(np.float64)),
+    )
+    return inning, balls_remaining, runs, wickets_in_hand, outcome
+
+class WinProbabilityTable:
+    """
+    Win probability of the batting side by (innings, balls remaining, runs,
+    wickets in hand), precomputed from historical deliveries
+
+    Every situation that can be asked about has a cell, so a lookup is one
+    array read. Cells are smoothed: the win rate of the situations near a
+    cell is shrunk towards the win rate of a wider neighbourhood, and the
+    table is made monotone (more runs needed, fewer balls or fewer wickets
+    never help the chasing side).
+    """
+
+    def __init__(self, table, fingerprints, situations=0):
+        self.table = table
+        self.fingerprints = fingerprints
+        self.situations = situations
+
+    def lookup(self, innings, balls_remaining, runs, wickets_in_hand=None):
+        """
+        Win probability of the batting side, between 0 and 1
+
+        runs are the runs scored so far in the first innings and the runs
+        still needed in the second. Without wickets in hand the estimate
+        pools every wickets count.
+        """
+        if innings == 2 and runs <= 0:
+            return 1.0
+        wickets = ANY_WICKETS if wickets_in_hand is None else min(max(int(wickets_in_hand), 0), MAX_WICKETS)
+        return float(self.table[
+            min(max(int(innings), 1), 2) - 1,
+            min(max(int(balls_remaining), 0), MAX_BALLS),
+            min(max(int(runs), 0), MAX_RUNS),
+            wickets,
+        ])
+
+    def save(self, path):
+        """
+        Write the table as one .npz file (written atomically)
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, table=self.table, fingerprints=self.fingerprints, situations=self.situations)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a table written by save()
+        """
+        with np.load(path) as snapshot:
+            return cls(snapshot['table'], snapshot['fingerprints'], int(snapshot['situations']))
+
+    @classmethod
+    def build(cls, dataset):
+        """
+        Count wins in every situation of the dataset and smooth them into a table
+        """
+        inning, balls, runs, wickets, outcome = innings_states(dataset)
+        decided = (outcome >= 0) & (runs >= 0)
+        inning, balls, runs, wickets, outcome = (
+            column[decided] for column in (inning, balls, runs, wickets, outcome)
+        )
+
+        shape = (2, MAX_BALLS + 1, MAX_RUNS + 1, ANY_WICKETS + 1)
+        cells = np.ravel_multi_index((inning - 1, balls, np.minimum(runs, MAX_RUNS), wickets), shape)
+        any_cells = np.ravel_multi_index((inning - 1, balls, np.minimum(runs, MAX_RUNS), ANY_WICKETS), shape)
+        cells = np.concatenate([cells, any_cells])
+        outcome = np.concatenate([outcome, outcome])
+
+        size = int(np.prod(shape))
+        seen = np.bincount(cells, minlength=size).reshape(shape).astype(np.float64)
+        won = np.bincount(cells, weights=outcome, minlength=size).reshape(shape)
+
+        # Shrink the narrow neighbourhood's win rate towards the wide one's,
+        # and that towards an even contest
+        wide_seen, wide_won = _smooth(seen, WIDE_WINDOW), _smooth(won, WIDE_WINDOW)
+        prior = (wide_won + PRIOR_WEIGHT * 0.5) / (wide_seen + PRIOR_WEIGHT)
+        table = (_smooth(won, NARROW_WINDOW) + PRIOR_WEIGHT * prior) / (_smooth(seen, NARROW_WINDOW) + PRIOR_WEIGHT)
+
+        # Settled chases: no balls or wickets left with runs still needed
+        table[1, :, 0, :] = 1.0
+        table[1, 0, 1:, :] = 0.0
+        table[1, :, 1:, 0] = 0.0
+
+        # Monotone in every direction: more balls and wickets help the
+        # batting side, as do more runs scored (first innings) or fewer
+        # runs needed (second innings)
+        np.maximum.accumulate(table, axis=1, out=table)
+        np.maximum.accumulate(table[..., :ANY_WICKETS], axis=3, out=table[..., :ANY_WICKETS])
+        np.maximum.accumulate(table[0], axis=1, out=table[0])
+        np.minimum.accumulate(table[1], axis=1, out=table[1])
+
+        logger.info(f"Win probability table: {len(outcome) // 2} situations")
+        return cls(table.astype(np.float32), season_fingerprints(dataset, dataset.seasons), len(outcome) // 2)
+
+def load_win_probability(dataset, cache_dir):
+    """
+    Load the win-probability table next to the dataset cache, rebuilding
+    and re-saving it when the dataset changed
+    """
+    path = Path(cache_dir) / WIN_PROBABILITY_FILE
+    fingerprints = season_fingerprints(dataset, dataset.seasons)
+    if path.exists():
+        try:
+            previous = WinProbabilityTable.load(path)
+            if np.array_equal(previous.fingerprints, fingerprints):
+                return previous
+        except Exception as e:
+            logger.error(f"Error loading win probability table: {e}")
+
+    table = WinProbabilityTable.build(dataset)
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        table.save(path)
+    except Exception as e:
+        logger.error(f"Error saving win probability table: {e}")
+    return table